@@ -1,13 +1,23 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import pickle
 import os
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-import seaborn as sns
-import plotly.graph_objects as go
-import altair as alt
+import io
+import time
+from time import perf_counter_ns
+
+# Plotting libraries are imported by the pages that draw with them (matplotlib
+# and seaborn only when a figure misses the cache), so the Predict page never
+# loads them and a cold start pays only for the page it opens on.
+# `python benchmarks/bench_startup.py --check` guards this.
+from creditiq.curves import package_curve
+from creditiq.figcache import FigureCache
+from creditiq.figures import confusion_matrix_figure, importance_figure
+from creditiq.io import file_format, read_table, write_table
+from creditiq.predcache import PredictionCache
+from creditiq.registry import ModelRegistry
+from creditiq.scoring import find_package
+from creditiq.trace import TRACER
+from creditiq.whatif import AXES as WHATIF_AXES, sensitivity_grid
 
 st.set_page_config(
     page_title="CreditIQ — Credit Risk Intelligence",
@@ -642,32 +652,31 @@ h1, h2, h3, h4, h5, h6 {
 
 # ─── DATA LOADING ──────────────────────────────────────────────────────────────
 @st.cache_resource
-def load_model():
-    for path in ["dt_model.pkl", "model/dt_model.pkl"]:
-        if os.path.exists(path):
-            with open(path, "rb") as f:
-                return pickle.load(f)
-    return None
-
-pkg = load_model()
-
-if pkg is None:
+def load_registry():
+    # One registry per server process. It hot-reloads new versions dropped into
+    # models/; the bundled package is served until one appears.
+    # The registry checks the bundled artifact against its source pickle itself,
+    # and records it in its history if that has been retrained.
+    return ModelRegistry("models", fallback=find_package(skip_stale=False)).start()
+
+# Taken once per run: a version swap mid-run never mixes models within a page.
+registry = load_registry()
+scorer   = registry.current
+
+if scorer is None:
     st.markdown("""
     <div style="display:flex;align-items:center;justify-content:center;height:60vh;
                 flex-direction:column;gap:1rem;background:#FFFFFF;">
         <div style="font-family:'Playfair Display',Georgia,serif;font-size:1.8rem;
                     color:#000000;font-weight:700;">Model Not Found</div>
         <div style="color:#222222;font-size:0.95rem;">
-            Place dt_model.pkl in the same directory as app.py</div>
+            Place model_artifact/ or dt_model.pkl in the same directory as app.py</div>
     </div>
     """, unsafe_allow_html=True)
     st.stop()
 
-model          = pkg["model"]
-lr_model       = pkg["lr_model"]
-scaler         = pkg["scaler"]
-encoders       = pkg.get("encoders", {})
-feature_cols   = pkg["feature_columns"]
+pkg            = scorer.package
+feature_cols   = scorer.feature_columns
 dt_threshold   = pkg.get("dt_threshold", 0.35)
 lr_threshold   = pkg.get("lr_threshold", 0.35)
 dinfo          = pkg["dataset_info"]
@@ -683,7 +692,17 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
-    page = st.radio("", ["Overview", "Performance", "Predict"], label_visibility="collapsed")
+    # ?page=Predict deep-links to a page (and lets the startup benchmark open one cold).
+    # Diagnostics stays out of the menu until ?page=Diagnostics opens it or
+    # tracing is on (CREDITIQ_TRACE=1); then it is kept for the session.
+    pages = ["Overview", "Performance", "Predict"]
+    requested = st.query_params.get("page")
+    if requested == "Diagnostics" or TRACER.enabled:
+        st.session_state["diagnostics"] = True
+    if st.session_state.get("diagnostics"):
+        pages.append("Diagnostics")
+    page = st.radio("", pages, index=pages.index(requested) if requested in pages else 0,
+                    label_visibility="collapsed")
 
     st.markdown(f"""
     <div class="model-badge">
@@ -701,12 +720,19 @@ with st.sidebar:
         <div class="badge-value">DT: {dtm.get('roc_auc',0):.4f} &middot; LR: {lrm.get('roc_auc',0):.4f}</div>
         <div class="badge-sub">Area under curve</div>
     </div>
+    <div class="model-badge">
+        <div class="badge-label">Model Version</div>
+        <div class="badge-value">{scorer.version}</div>
+        <div class="badge-sub">Hot-reloaded from models/</div>
+    </div>
     <div class="model-badge">
         <div class="badge-label">Dataset</div>
         <div class="badge-value">{dinfo.get('total_samples',0):,} samples</div>
         <div class="badge-sub">{dinfo.get('n_features',0)} features &middot; Binary classification</div>
     </div>
     """, unsafe_allow_html=True)
+    if scorer.version in registry.stale:
+        st.warning(registry.stale[scorer.version])
 
 
 # ─── HELPERS ──────────────────────────────────────────────────────────────────
@@ -720,29 +746,49 @@ def fmt(v, pct=False):
     if v is None: return "—"
     return f"{v*100:.2f}%" if pct else f"{v:.4f}"
 
-def _matplotlib_light():
-    plt.rcParams.update({
-        "figure.facecolor": "#FFFFFF",
-        "axes.facecolor":   "#FFFFFF",
-        "axes.edgecolor":   "#CCCCCC",
-        "axes.labelcolor":  "#000000",
-        "xtick.color":      "#000000",
-        "ytick.color":      "#000000",
-        "text.color":       "#000000",
-        "grid.color":       "#F5F5F5",
-        "grid.linestyle":   "-",
-        "grid.alpha":       1.0,
-        "font.family":      "serif",
-        "font.size":        11,
-    })
-
-_matplotlib_light()
+
+# ─── FIGURES ──────────────────────────────────────────────────────────────────
+# Rendered once per model version and served as PNG bytes from a process-wide
+# LRU; reruns and other sessions never touch matplotlib for a cached figure.
+@st.cache_resource
+def figure_cache():
+    return FigureCache(max_entries=64)
+
+
+# ─── SCORING ──────────────────────────────────────────────────────────────────
+# Single-applicant results, shared by every session. Keys include the scorer's
+# load, so a reloaded model package never serves the previous model's results.
+@st.cache_resource
+def prediction_cache():
+    return PredictionCache(max_entries=50_000, ttl=3600)
+
+# `fingerprint` is part of the cache key, so a retrained or swapped model
+# re-scores uploads; `_scorer` itself is not hashed.
+@st.cache_data(show_spinner=False, max_entries=4)
+def score_upload(data, name, fingerprint, explain, _scorer):
+    df = read_table(io.BytesIO(data), fmt=file_format(name))
+    t0 = time.perf_counter()
+    scores, unknown = _scorer.score(df, contributions=explain, shap=explain, return_unknown=True)
+    scored = df.assign(**scores)
+    elapsed = time.perf_counter() - t0
+    return scored, elapsed, unknown
+
+# Download bytes are built on click (a callable `data`) and cached, so reruns
+# with an upload on the page never serialize the scored frame.
+@st.cache_data(show_spinner=False, max_entries=4)
+def scored_file(data, name, fingerprint, explain, fmt, _scorer):
+    scored, _, _ = score_upload(data, name, fingerprint, explain, _scorer)
+    buf = io.BytesIO()
+    write_table(scored, buf, fmt=fmt)
+    return buf.getvalue()
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # PAGE 1 — OVERVIEW
 # ══════════════════════════════════════════════════════════════════════════════
 if page == "Overview":
+    import plotly.graph_objects as go
+
     st.markdown("""
     <div class="page-header">
         <h1>Credit Risk Intelligence</h1>
@@ -852,6 +898,8 @@ if page == "Overview":
 # PAGE 2 — PERFORMANCE
 # ══════════════════════════════════════════════════════════════════════════════
 elif page == "Performance":
+    import plotly.graph_objects as go
+
     st.markdown("""
     <div class="page-header">
         <h1>Model Performance</h1>
@@ -861,11 +909,7 @@ elif page == "Performance":
 
     tab1, tab2 = st.tabs(["  Decision Tree  ", "  Logistic Regression  "])
 
-    def render_model_tab(metrics, model_name):
-        if not metrics:
-            st.warning("No metrics available.")
-            return
-
+    def render_metrics(metrics, model_name, live=False):
         acc   = metrics.get("test_accuracy", 0)
         roc   = metrics.get("roc_auc", 0)
         wf1   = metrics.get("weighted_avg", {}).get("f1_score", metrics.get("weighted_avg", {}).get("f1-score", 0))
@@ -901,55 +945,15 @@ elif page == "Performance":
         with cm_col:
             st.markdown('<div class="section-title" style="margin-top:0">Confusion Matrix</div>', unsafe_allow_html=True)
             cm = metrics.get("confusion_matrix")
-            if cm:
-                fig, ax = plt.subplots(figsize=(5, 4))
-                cm_arr = np.array(cm)
-                total = cm_arr.sum()
-
-                # Normalize for color mapping (0 to 1)
-                cm_norm = cm_arr / cm_arr.max()
-
-                # Auto-contrast: white text on dark cells, black text on light
-                annot_colors = []
-                for row_idx in range(cm_arr.shape[0]):
-                    row_colors = []
-                    for col_idx in range(cm_arr.shape[1]):
-                        intensity = cm_norm[row_idx, col_idx]
-                        row_colors.append("#FFFFFF" if intensity > 0.55 else "#000000")
-                    annot_colors.append(row_colors)
-
-                labels = np.array([[f"{v}\n({v/total*100:.1f}%)" for v in row] for row in cm_arr])
-
-                # Light grey scale: #F5F5F5 (light) to #555555 (dark)
-                from matplotlib.colors import LinearSegmentedColormap
-                cmap = LinearSegmentedColormap.from_list('bw', ['#F5F5F5', '#AAAAAA', '#555555'])
-
-                sns.heatmap(
-                    cm_arr, annot=False, fmt="", cmap=cmap,
-                    xticklabels=["Good Loan", "Default"],
-                    yticklabels=["Good Loan", "Default"],
-                    linewidths=3, linecolor="#FFFFFF",
-                    cbar=False, ax=ax,
-                )
-
-                # Manually place text with auto-contrast colors
-                for row_idx in range(cm_arr.shape[0]):
-                    for col_idx in range(cm_arr.shape[1]):
-                        ax.text(col_idx + 0.5, row_idx + 0.5,
-                                labels[row_idx, col_idx],
-                                ha='center', va='center',
-                                fontsize=13, fontweight='bold',
-                                color=annot_colors[row_idx][col_idx])
-
-                ax.set_xlabel("Predicted", labelpad=12, fontsize=12, fontweight='bold')
-                ax.set_ylabel("Actual", labelpad=12, fontsize=12, fontweight='bold')
-                ax.set_title(f"{model_name} — Confusion Matrix",
-                            fontsize=13, pad=14, color="#000000",
-                            fontweight='bold', fontfamily='serif')
-                ax.tick_params(colors='#000000', labelsize=11)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
+            if cm and live:
+                # Off the trained threshold every slider step is a new matrix:
+                # drawn in the browser, never rendered or added to the figure cache.
+                st.plotly_chart(confusion_matrix_chart(cm), use_container_width=True,
+                                config={'displayModeBar': False})
+            elif cm:
+                key = (scorer.fingerprint, "confusion_matrix", model_name, str(cm))
+                st.image(figure_cache().get(key, lambda: confusion_matrix_figure(cm, model_name)),
+                         use_container_width=True)
 
         with rep_col:
             st.markdown('<div class="section-title" style="margin-top:0">Classification Report</div>', unsafe_allow_html=True)
@@ -1013,41 +1017,117 @@ elif page == "Performance":
             </div>
             """, unsafe_allow_html=True)
 
+        render_curves(metrics, model_name)
+
+    def confusion_matrix_chart(cm):
+        # Plotly twin of creditiq.figures.confusion_matrix_figure.
+        cm_arr = np.array(cm)
+        total  = max(cm_arr.sum(), 1)
+        labels = ["Good Loan", "Default"]
+        fig = go.Figure(go.Heatmap(
+            z=cm_arr, x=labels, y=labels, xgap=3, ygap=3, showscale=False, hoverinfo='skip',
+            colorscale=[[0, '#F5F5F5'], [0.5, '#AAAAAA'], [1, '#555555']], zmin=0,
+        ))
+        peak = max(cm_arr.max(), 1)
+        for i, actual in enumerate(labels):
+            for j, predicted in enumerate(labels):
+                v = int(cm_arr[i, j])
+                fig.add_annotation(x=predicted, y=actual, showarrow=False,
+                                   text=f"<b>{v:,}<br>({v/total*100:.1f}%)</b>",
+                                   font=dict(size=15, color='#FFFFFF' if v / peak > 0.55 else '#000000'))
+        fig.update_layout(
+            paper_bgcolor='#FFFFFF', plot_bgcolor='#FFFFFF', height=340,
+            font=dict(family="Inter, sans-serif", color="#000000", size=12),
+            margin=dict(l=10, r=10, t=10, b=10),
+            xaxis=dict(title="<b>Predicted</b>", side='bottom'),
+            yaxis=dict(title="<b>Actual</b>", autorange='reversed'),
+        )
+        return fig
+
+    def curve_figure(x, y, hover, baseline, point, x_title, y_title):
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=baseline[0], y=baseline[1], mode='lines', name='Chance',
+            line=dict(color='#CCCCCC', dash='dash', width=1.5), hoverinfo='skip',
+        ))
+        fig.add_trace(go.Scatter(
+            x=x, y=y, mode='lines', name='Model',
+            line=dict(color='#000000', width=2.5),
+            customdata=hover, hovertemplate='threshold %{customdata:.3f}<br>(%{x:.3f}, %{y:.3f})<extra></extra>',
+        ))
+        fig.add_trace(go.Scatter(
+            x=[point[0]], y=[point[1]], mode='markers', name='Current threshold',
+            marker=dict(color='#FFFFFF', size=11, line=dict(color='#000000', width=2.5)),
+            hovertemplate='current threshold<br>(%{x:.3f}, %{y:.3f})<extra></extra>',
+        ))
+        fig.update_layout(
+            paper_bgcolor='#FFFFFF', plot_bgcolor='#FFFFFF', showlegend=False, height=340,
+            font=dict(family="Inter, sans-serif", color="#000000", size=12),
+            margin=dict(l=10, r=10, t=10, b=10),
+            xaxis=dict(title=x_title, range=[0, 1.01], gridcolor='#F5F5F5', linecolor='#CCCCCC'),
+            yaxis=dict(title=y_title, range=[0, 1.02], gridcolor='#F5F5F5', linecolor='#CCCCCC'),
+        )
+        return fig
+
+    def render_curves(metrics, model_name):
+        # Downsampled at training time; drawn in the browser, no figure rendering here.
+        roc, pr = metrics.get("roc_curve"), metrics.get("pr_curve")
+        if not (roc and pr):
+            return
+        (tn, fp), (fn, tp) = metrics["confusion_matrix"]
+        prevalence = (tp + fn) / max(tn + fp + fn + tp, 1)
+        st.markdown('<div class="section-title">ROC and Precision-Recall Curves</div>', unsafe_allow_html=True)
+        roc_col, pr_col = st.columns(2, gap="large")
+        with roc_col:
+            st.caption(f"{model_name} · ROC-AUC {roc['auc']:.4f}")
+            fig = curve_figure(roc["fpr"], roc["tpr"], roc["thresholds"], ([0, 1], [0, 1]),
+                               (fp / max(tn + fp, 1), tp / max(tp + fn, 1)),
+                               "False positive rate", "True positive rate (recall)")
+            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+        with pr_col:
+            st.caption(f"{model_name} · Average precision {pr['average_precision']:.4f}")
+            fig = curve_figure(pr["recall"], pr["precision"], pr["thresholds"], ([0, 1], [prevalence] * 2),
+                               (tp / max(tp + fn, 1), tp / max(tp + fp, 1) if tp + fp else 1.0),
+                               "Recall (defaults caught)", "Precision")
+            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+
+    @st.fragment
+    def render_threshold_view(metrics, model_name, key, curve):
+        # Reruns on its own when the slider moves: one binary search in the
+        # stored test-set counts, no model or dataset access.
+        trained = round(float(metrics.get("threshold", 0.35)), 2)
+        threshold = st.slider("Decision threshold", 0.01, 0.99, trained, 0.01, key=f"threshold_{key}",
+                              help="Predict default when the probability is at or above this value.")
+        st.caption(f"Trained threshold {trained:.2f}. Metrics below are recomputed from "
+                   f"{len(curve.scores):,} stored test-set scores; ROC-AUC does not depend on the threshold.")
+        render_metrics({**metrics, **curve.metrics(threshold)}, model_name, live=threshold != trained)
+
+    def render_model_tab(metrics, model_name, key):
+        if not metrics:
+            st.warning("No metrics available.")
+            return
+
+        curve = package_curve(pkg, key)
+        if curve is None:
+            render_metrics(metrics, model_name)
+        else:
+            render_threshold_view(metrics, model_name, key, curve)
+
         # ── Feature Importance ────────────────────────────────────────────────
         fi = metrics.get("feature_importance")
         if fi:
             st.markdown('<div class="section-title">Feature Importance</div>', unsafe_allow_html=True)
-            sorted_fi = sorted(fi.items(), key=lambda x: x[1])
-            names  = [k for k, _ in sorted_fi]
-            scores = [v for _, v in sorted_fi]
-            max_score = max(scores) if scores else 1
-
-            # Monochrome grey scale for bars
-            grey_shades = [f'#{int(60 + (i/len(names))*120):02x}{int(60 + (i/len(names))*120):02x}{int(60 + (i/len(names))*120):02x}' for i in range(len(names))]
-
-            fig, ax = plt.subplots(figsize=(9, max(3.5, len(names)*0.42)))
-            bars = ax.barh(names, scores, color=grey_shades, height=0.6, edgecolor="#CCCCCC", linewidth=0.5)
-            for bar, score in zip(bars, scores):
-                ax.text(score + max_score*0.008, bar.get_y() + bar.get_height()/2,
-                        f"{score:.4f}", va="center", fontsize=9,
-                        color="#000000", fontfamily="monospace", fontweight="bold")
-            ax.set_xlabel("Importance Score", fontsize=11, fontweight="bold")
-            ax.set_title(f"{model_name} — Feature Importance",
-                        fontsize=13, pad=14, color="#000000",
-                        fontweight="bold", fontfamily="serif")
-            ax.set_xlim(0, max_score * 1.18)
-            ax.spines["top"].set_visible(False)
-            ax.spines["right"].set_visible(False)
-            ax.spines["bottom"].set_color("#CCCCCC")
-            ax.spines["left"].set_color("#CCCCCC")
-            ax.grid(axis="x", color="#F5F5F5")
-            ax.tick_params(colors="#000000")
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close()
-
-    with tab1: render_model_tab(dtm, "Decision Tree")
-    with tab2: render_model_tab(lrm, "Logistic Regression")
+            key = (scorer.fingerprint, "feature_importance", model_name)
+            st.image(figure_cache().get(key, lambda: importance_figure(fi, model_name)),
+                     use_container_width=True)
+
+    with tab1: render_model_tab(dtm, "Decision Tree", "dt")
+    with tab2: render_model_tab(lrm, "Logistic Regression", "lr")
+
+    fc = figure_cache().stats()
+    st.caption(f"Figure cache: {fc['hits']:,} hits, {fc['misses']:,} renders "
+               f"({fc['hit_rate']*100:.0f}% hit rate), {fc['entries']} figures, "
+               f"{fc['bytes']/2**20:.1f} MB, {fc['render_s']:.2f}s spent rendering")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -1061,6 +1141,57 @@ elif page == "Predict":
     </div>
     """, unsafe_allow_html=True)
 
+    @st.fragment
+    def render_whatif(raw, model_key, model_name):
+        # Reruns on its own when an axis changes: the whole grid is one batched
+        # predict_proba call, drawn by Plotly in the browser.
+        import plotly.graph_objects as go
+        st.markdown('<div class="section-title" style="font-size:0.78rem;">What-If Sensitivity</div>', unsafe_allow_html=True)
+        axes = list(WHATIF_AXES)
+        c1, c2 = st.columns(2)
+        with c1: x = st.selectbox("Horizontal axis", axes, index=0, format_func=lambda c: WHATIF_AXES[c][0], key="whatif_x")
+        with c2: y = st.selectbox("Vertical axis", axes, index=1, format_func=lambda c: WHATIF_AXES[c][0], key="whatif_y")
+        if x == y:
+            st.info("Choose two different inputs to vary.")
+            return
+
+        t0 = time.perf_counter()
+        grid = sensitivity_grid(scorer, raw, x, y, model_key)
+        elapsed = time.perf_counter() - t0
+        x_label, y_label = WHATIF_AXES[x][0], WHATIF_AXES[y][0]
+        customdata = np.empty(grid["prob"].shape + (2,), dtype=object)
+        customdata[..., 0], customdata[..., 1] = grid["grade"], grid["loan_percent_income"]
+        fig = go.Figure()
+        fig.add_trace(go.Heatmap(
+            x=grid["x"], y=grid["y"], z=grid["prob"], zmin=0, zmax=1,
+            colorscale=[[0, '#FFFFFF'], [1, '#000000']],
+            colorbar=dict(title='P(default)', thickness=12, outlinewidth=0),
+            customdata=customdata,
+            hovertemplate=f'{x_label} %{{x:,.2f}}<br>{y_label} %{{y:,.2f}}<br>'
+                          'Default probability %{z:.1%}<br>Grade %{customdata[0]} · '
+                          'Loan/income %{customdata[1]:.1%}<extra></extra>',
+        ))
+        fig.add_trace(go.Contour(
+            x=grid["x"], y=grid["y"], z=grid["prob"], showscale=False, hoverinfo='skip',
+            contours=dict(coloring='none', start=grid["threshold"], end=grid["threshold"], size=1),
+            line=dict(color='#888888', width=2, dash='dash'),
+        ))
+        fig.add_trace(go.Scatter(
+            x=[grid["current"][0]], y=[grid["current"][1]], mode='markers', name='This applicant',
+            marker=dict(color='#FFFFFF', size=11, line=dict(color='#000000', width=2.5)),
+            hovertemplate='this applicant<extra></extra>',
+        ))
+        fig.update_layout(
+            paper_bgcolor='#FFFFFF', plot_bgcolor='#FFFFFF', showlegend=False, height=380,
+            font=dict(family="Inter, sans-serif", color="#000000", size=12),
+            margin=dict(l=10, r=10, t=10, b=10),
+            xaxis=dict(title=x_label, linecolor='#CCCCCC'),
+            yaxis=dict(title=y_label, linecolor='#CCCCCC'),
+        )
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+        st.caption(f"{grid['prob'].size:,} variations of this applicant scored by the {model_name} in one "
+                   f"call ({elapsed*1e3:.1f} ms). The dashed line is the {grid['threshold']} decision threshold.")
+
     form_col, result_col = st.columns([1, 1], gap="large")
 
     with form_col:
@@ -1112,56 +1243,33 @@ elif page == "Predict":
             """, unsafe_allow_html=True)
         else:
             with st.spinner("Analyzing risk profile..."):
-                active_model     = model        if selected_model_name == "Decision Tree" else lr_model
-                active_threshold = dt_threshold if selected_model_name == "Decision Tree" else lr_threshold
+                model_key = "dt" if selected_model_name == "Decision Tree" else "lr"
 
                 loan_percent_income = round(loan_amnt / person_income, 4) if person_income > 0 else 0.0
 
-                risk_score = (loan_int_rate * 2) + (loan_percent_income * 100) - cred_hist
-                if risk_score <= 25:   derived_grade = "A"
-                elif risk_score <= 35: derived_grade = "B"
-                elif risk_score <= 45: derived_grade = "C"
-                elif risk_score <= 55: derived_grade = "D"
-                elif risk_score <= 65: derived_grade = "E"
-                elif risk_score <= 75: derived_grade = "F"
-                else:                  derived_grade = "G"
-
-                grade_map = {"A":0,"B":1,"C":2,"D":3,"E":4,"F":5,"G":6}
                 raw = {
                     "person_age":               person_age,
                     "person_income($)":          person_income,
                     "person_home_ownership":     person_home_ownership,
                     "person_emp_length":         person_emp_length,
                     "loan_intent":               loan_intent,
-                    "loan_grade":                grade_map[derived_grade],
                     "loan_amnt($)":              loan_amnt,
                     "loan_int_rate":             loan_int_rate,
                     "loan_percent_income":       loan_percent_income,
                     "cb_person_default_on_file": cb_default,
                     "cb_person_cred_hist_length":cred_hist,
-                    "person_income":             person_income,
-                    "loan_amnt":                 loan_amnt,
                 }
 
-                enc = raw.copy()
-                for col in feature_cols:
-                    if col in encoders:
-                        le  = encoders[col]
-                        val = enc.get(col)
-                        enc[col] = int(le.transform([val])[0]) if val in le.classes_ else 0
-
                 try:
-                    X    = pd.DataFrame([[enc.get(c, 0) for c in feature_cols]], columns=feature_cols)
-                    X_sc = scaler.transform(X)
+                    result = prediction_cache().score_one(scorer, raw, model_key)
+                    t_render = perf_counter_ns() if TRACER.enabled else 0
 
-                    proba        = active_model.predict_proba(X_sc)[0]
-                    default_prob = float(proba[1])
-                    pred         = 1 if default_prob >= active_threshold else 0
-                    conf         = max(default_prob, 1 - default_prob) * 100
-
-                    if default_prob < 0.30:   risk, risk_cls = "LOW RISK",    "risk-low"
-                    elif default_prob < 0.60: risk, risk_cls = "MEDIUM RISK", "risk-med"
-                    else:                     risk, risk_cls = "HIGH RISK",   "risk-high"
+                    default_prob     = result["default_prob"]
+                    pred             = result["pred"]
+                    conf             = result["confidence"] * 100
+                    risk, risk_cls   = result["risk_level"], result["risk_class"]
+                    derived_grade    = result["derived_grade"]
+                    active_threshold = result["threshold"]
 
                     # ── Result Card ────────────────────────────────────────────
                     if pred == 0:
@@ -1204,6 +1312,10 @@ elif page == "Predict":
                             <span class="sr-label">Model Used</span>
                             <span class="sr-value">{selected_model_name}</span>
                         </div>
+                        <div class="summary-row">
+                            <span class="sr-label">Model Version</span>
+                            <span class="sr-value">{result["model_version"]}</span>
+                        </div>
                         <div class="summary-row">
                             <span class="sr-label">Decision Threshold</span>
                             <span class="sr-value">{active_threshold}</span>
@@ -1236,42 +1348,171 @@ elif page == "Predict":
                     """, unsafe_allow_html=True)
 
                     # ── Feature Insights ──────────────────────────────────────
-                    if selected_model_name == "Decision Tree":
-                        fi = dtm.get("feature_importance", {})
-                        if fi:
-                            st.markdown('<div class="section-title" style="margin-top:0;font-size:0.78rem;">Top Features (Importance)</div>', unsafe_allow_html=True)
-                            top3 = sorted(fi.items(), key=lambda x: x[1], reverse=True)[:3]
-                            max_fi = top3[0][1] if top3 else 1
-                            rows_html = ""
-                            for i, (fname, fscore) in enumerate(top3, 1):
-                                bar_w = int(fscore / max_fi * 100)
-                                rows_html += f"""
-                                <div class="fi-row">
-                                    <span class="fi-rank">#{i}</span>
-                                    <span class="fi-name">{fname}</span>
-                                    <div class="fi-bar-wrap"><div class="fi-bar" style="width:{bar_w}%;"></div></div>
-                                    <span class="fi-score">{fscore:.4f}</span>
-                                </div>"""
-                            st.markdown(rows_html, unsafe_allow_html=True)
+                    # This applicant's own drivers: the tree's Shapley values
+                    # (percentage points of default probability) or the LR's
+                    # coef × scaled value terms (log-odds).
+                    X_app = scorer.encode(raw)[0]
+                    if model_key == "dt":
+                        base, contrib = scorer.shap_values(X_app)
+                        title, scale, label = f"Top Drivers (Shapley, vs. {base*100:.1f}% base rate)", 100, "{:+.1f} pp"
                     else:
-                        coef = lrm.get("feature_coefficients", {})
-                        if coef:
-                            st.markdown('<div class="section-title" style="margin-top:0;font-size:0.78rem;">Top Risk Drivers (Coefficients)</div>', unsafe_allow_html=True)
-                            top3 = sorted(coef.items(), key=lambda x: abs(x[1]), reverse=True)[:3]
-                            max_abs = max(abs(v) for _, v in top3) if top3 else 1
-                            rows_html = ""
-                            for i, (fname, fcoef) in enumerate(top3, 1):
-                                bar_w = int(abs(fcoef) / max_abs * 100)
-                                sign  = "Default" if fcoef > 0 else "Good Loan"
-                                rows_html += f"""
-                                <div class="fi-row">
-                                    <span class="fi-rank">#{i}</span>
-                                    <span class="fi-name">{fname}</span>
-                                    <div class="fi-bar-wrap"><div class="fi-bar" style="width:{bar_w}%;"></div></div>
-                                    <span class="fi-score" style="width:5.5rem;">{fcoef:+.4f} {sign}</span>
-                                </div>"""
-                            st.markdown(rows_html, unsafe_allow_html=True)
+                        base, contrib = scorer.contributions(X_app, model_key)
+                        title, scale, label = "Top Drivers (log-odds)", 1, "{:+.3f}"
+                    contrib = contrib[0]
+                    st.markdown(f'<div class="section-title" style="margin-top:0;font-size:0.78rem;">{title}</div>', unsafe_allow_html=True)
+                    top3 = sorted(zip(scorer.contribution_inputs, contrib), key=lambda x: abs(x[1]), reverse=True)[:3]
+                    max_abs = max(abs(v) for _, v in top3) or 1
+                    rows_html = ""
+                    for i, (fname, value) in enumerate(top3, 1):
+                        bar_w = int(abs(value) / max_abs * 100)
+                        sign  = "Default" if value > 0 else "Good Loan"
+                        rows_html += f"""
+                        <div class="fi-row">
+                            <span class="fi-rank">#{i}</span>
+                            <span class="fi-name">{fname}</span>
+                            <div class="fi-bar-wrap"><div class="fi-bar" style="width:{bar_w}%;"></div></div>
+                            <span class="fi-score" style="width:7rem;">{label.format(value * scale)} {sign}</span>
+                        </div>"""
+                    st.markdown(rows_html, unsafe_allow_html=True)
+                    if t_render:
+                        TRACER.lap("render", t_render)
+
+                    render_whatif(raw, model_key, selected_model_name)
 
                 except Exception as e:
                     st.error(f"Prediction failed: {e}")
 
+
+    # ── Batch Scoring ─────────────────────────────────────────────────────────
+    st.markdown('<div class="section-title">Batch Scoring</div>', unsafe_allow_html=True)
+    st.markdown('<p style="color:#222222; font-size:0.95rem; margin-top:-0.5rem; margin-bottom:1.5rem; font-style:italic;">Upload a CSV or Parquet file shaped like the cleaned dataset to score every applicant with both models, optionally with the contribution of every input to each score and Shapley values for the decision tree.</p>', unsafe_allow_html=True)
+
+    upload  = st.file_uploader("Applicant file", type=["csv", "parquet"], label_visibility="collapsed")
+    explain = st.checkbox("Include input contributions and Shapley values",
+                          help="Adds a column per input and model; scoring takes several times longer.")
+    if upload is not None:
+        key = (upload.getvalue(), upload.name, scorer.fingerprint, explain)
+        try:
+            with st.spinner("Scoring portfolio..."):
+                scored, elapsed, unknown = score_upload(*key, scorer)
+        except Exception as e:
+            st.error(f"Batch scoring failed: {e}")
+        else:
+            n_rows  = len(scored)
+            rate    = n_rows / elapsed if elapsed > 0 else 0
+            flagged = int(scored["dt_pred"].sum())
+            st.markdown(f"""
+            <div class="metric-grid">
+                <div class="metric-card fade-in">
+                    <div class="m-label">Rows Scored</div>
+                    <div class="m-value">{n_rows:,}</div>
+                    <div class="m-sub">{rate:,.0f} rows/sec</div>
+                </div>
+                <div class="metric-card fade-in" style="animation-delay:0.05s">
+                    <div class="m-label">Flagged (DT)</div>
+                    <div class="m-value">{flagged:,}</div>
+                    <div class="m-sub">Threshold {dt_threshold}</div>
+                </div>
+                <div class="metric-card fade-in" style="animation-delay:0.1s">
+                    <div class="m-label">Flagged (LR)</div>
+                    <div class="m-value">{int(scored["lr_pred"].sum()):,}</div>
+                    <div class="m-sub">Threshold {lr_threshold}</div>
+                </div>
+                <div class="metric-card fade-in" style="animation-delay:0.15s">
+                    <div class="m-label">Mean Default Prob.</div>
+                    <div class="m-value">{scored["dt_default_prob"].mean()*100:.1f}%</div>
+                    <div class="m-sub">Decision Tree</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+            if unknown:
+                st.warning("Unrecognized categories were scored as the reference level: "
+                           + ", ".join(f"{c} ({n:,} rows)" for c, n in unknown.items()))
+            unscored = int(scored[[f"{k}_default_prob" for k in ("dt", "lr")]].isna().any(axis=1).sum())
+            if unscored:
+                st.warning(f"{unscored:,} rows have missing inputs and were left unscored by at least "
+                           "one model: their prediction and risk level are empty.")
+            st.dataframe(scored.head(100), use_container_width=True, hide_index=True)
+            stem = os.path.splitext(upload.name)[0]
+            dl1, dl2 = st.columns(2)
+            with dl1:
+                st.download_button(
+                    "Download Scored CSV",
+                    data=lambda: scored_file(*key, "csv", scorer),
+                    file_name=f"scored_{stem}.csv",
+                    mime="text/csv",
+                    use_container_width=True,
+                )
+            with dl2:
+                st.download_button(
+                    "Download Scored Parquet",
+                    data=lambda: scored_file(*key, "parquet", scorer),
+                    file_name=f"scored_{stem}.parquet",
+                    mime="application/vnd.apache.parquet",
+                    use_container_width=True,
+                )
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE 4 — DIAGNOSTICS (hidden; open with ?page=Diagnostics)
+# ══════════════════════════════════════════════════════════════════════════════
+elif page == "Diagnostics":
+    st.markdown("""
+    <div class="page-header">
+        <h1>Diagnostics</h1>
+        <p>Latency of each stage of the scoring path, across every session of this server</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    c1, c2 = st.columns([3, 1])
+    with c1:
+        TRACER.enabled = st.toggle("Trace the scoring path", value=TRACER.enabled,
+                                   help="Process-wide: times every prediction until switched off.")
+    with c2:
+        if st.button("Reset", use_container_width=True):
+            TRACER.reset()
+
+    def us(seconds): return f"{seconds * 1e6:,.1f}"
+
+    stages = TRACER.snapshot()
+    if not stages:
+        st.info("No traced predictions yet. Switch tracing on and run a prediction on the Predict page.")
+    else:
+        rows = "".join(f"""
+                <tr>
+                    <td>{name}</td>
+                    <td>{s['count']:,}</td>
+                    <td>{us(s['p50_s'])}</td>
+                    <td>{us(s['p95_s'])}</td>
+                    <td>{us(s['p99_s'])}</td>
+                    <td>{us(s['mean_s'])}</td>
+                    <td>{s['sum_s']:,.3f}</td>
+                </tr>""" for name, s in stages.items())
+        st.markdown('<div class="section-title">Stage Latency</div>', unsafe_allow_html=True)
+        st.markdown(f"""
+        <table class="report-table">
+            <thead><tr>
+                <th>Stage</th><th>Count</th><th>p50 (µs)</th><th>p95 (µs)</th><th>p99 (µs)</th>
+                <th>Mean (µs)</th><th>Total (s)</th>
+            </tr></thead>
+            <tbody>{rows}
+            </tbody>
+        </table>
+        """, unsafe_allow_html=True)
+        st.caption(f"Percentiles and means cover the last {TRACER.window:,} samples of each stage; "
+                   "counts and totals cover the whole process.")
+
+    st.markdown('<div class="section-title">Prometheus Export</div>', unsafe_allow_html=True)
+    prom = TRACER.prometheus()
+    st.code(prom, language="text")
+    st.download_button("Download metrics.prom", data=prom.encode("utf-8"), file_name="metrics.prom",
+                       mime="text/plain")
+
+    fc = figure_cache().stats()
+    pc = prediction_cache().stats()
+    st.caption(f"Model version {scorer.version}. Figure cache: {fc['hits']:,} hits, "
+               f"{fc['misses']:,} renders, {fc['entries']} figures, {fc['bytes']/2**20:.1f} MB. "
+               f"Prediction cache: {pc['hits']:,} hits, {pc['misses']:,} misses "
+               f"({pc['hit_rate']*100:.0f}% hit rate), {pc['evictions']:,} evicted, "
+               f"{pc['expirations']:,} expired, {pc['entries']:,} entries, {pc['bytes']/2**20:.1f} MB.")
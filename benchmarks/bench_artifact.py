@@ -0,0 +1,101 @@
+"""Model load time and memory: pickled package vs artifact directory.
+
+    python benchmarks/bench_artifact.py [--repeats 5]
+
+Each measurement runs in a fresh interpreter, the way a new worker process
+starts: import creditiq, build a `CreditScorer` from the given path, score
+one applicant. Reported per format (median over repeats): time to a ready
+scorer, time to the first score, peak RSS, and whether sklearn was imported.
+Both scorers are then checked to score the cleaned dataset identically.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA     = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+PICKLE   = os.path.join(ROOT, "dt_model.pkl")
+ARTIFACT = os.path.join(ROOT, "model_artifact")
+
+APPLICANT = {"person_age": 30, "person_income($)": 50000, "person_home_ownership": "RENT",
+             "person_emp_length": 4, "loan_intent": "EDUCATION", "loan_amnt($)": 8000,
+             "loan_int_rate": 11.5, "cb_person_default_on_file": "N",
+             "cb_person_cred_hist_length": 5}
+
+
+def peak_rss_mb():
+    # VmHWM starts fresh at exec; ru_maxrss would include the parent's RSS at fork.
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    except (OSError, StopIteration):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(path):
+    import time
+    warnings.filterwarnings("ignore")
+    t0 = time.perf_counter()
+    from creditiq import CreditScorer
+    scorer = CreditScorer.from_path(path)
+    t_load = time.perf_counter() - t0
+    scorer.score_one(APPLICANT)
+    t_first = time.perf_counter() - t0
+    print(json.dumps({
+        "load_s":        t_load,
+        "first_score_s": t_first,
+        "peak_rss_mb":   peak_rss_mb(),
+        "sklearn":       "sklearn" in sys.modules,
+    }))
+
+
+def measure(path, repeats):
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, __file__, "--child", path], cwd=ROOT,
+                             check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {k: (statistics.median(r[k] for r in runs) if k != "sklearn" else runs[0][k])
+            for k in runs[0]}
+
+
+def check_equal(pickle_path, artifact_path):
+    import numpy as np
+    import pandas as pd
+    from creditiq import CreditScorer
+    warnings.filterwarnings("ignore", module="sklearn")
+    df = pd.read_csv(DATA)
+    a = CreditScorer.from_path(pickle_path).score(df)
+    b = CreditScorer.from_path(artifact_path).score(df)
+    if not all(np.array_equal(a[k], b[k]) for k in a):
+        raise AssertionError("pickle and artifact scorers disagree")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pickle", default=PICKLE)
+    parser.add_argument("--artifact", default=ARTIFACT)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return child(args.child)
+
+    print(f"{'format':<10} {'ready':>10} {'1st score':>10} {'peak RSS':>10}  sklearn")
+    for name, path in (("pickle", args.pickle), ("artifact", args.artifact)):
+        r = measure(path, args.repeats)
+        print(f"{name:<10} {r['load_s'] * 1e3:>8.0f}ms {r['first_score_s'] * 1e3:>8.0f}ms "
+              f"{r['peak_rss_mb']:>8.1f}MB  {'yes' if r['sklearn'] else 'no'}")
+    check_equal(args.pickle, args.artifact)
+    print("Both formats score the cleaned dataset identically.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Load time and memory: CSV vs Parquet, with projection and predicate pushdown.
+
+    python benchmarks/bench_io.py [--scale 100] [--repeats 3]
+
+The cleaned dataset is tiled `--scale` times and written once as CSV and
+once as typed Parquet (`creditiq.io.write_table`). Each load then runs in a
+fresh interpreter so the measurements do not share caches or allocator
+state. Reported per case (median over repeats): load time, peak RSS added by
+the load, and the DataFrame's own memory.
+
+Cases: the whole CSV as the notebooks read it (`pd.read_csv`), the CSV with
+`usecols`, the whole Parquet file, Parquet projected onto the columns the
+models need, and the same projection filtered to one loan intent. All
+variants of the same selection must produce the same values.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA   = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+FILTER = [("loan_intent", "==", "EDUCATION")]
+
+
+def rss_kb(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+
+def child(spec):
+    spec = json.loads(spec)
+    import pandas as pd
+    from creditiq.io import read_table
+    before = rss_kb("VmRSS")
+    t0 = time.perf_counter()
+    if spec["reader"] == "pandas":
+        df = pd.read_csv(spec["path"], usecols=spec["columns"])
+    else:
+        df = read_table(spec["path"], spec["columns"], spec["filters"])
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({
+        "load_s":     elapsed,
+        "peak_mb":    (rss_kb("VmHWM") - before) / 1024,
+        "frame_mb":   df.memory_usage(deep=True).sum() / 2**20,
+        "rows":       len(df),
+        "checksum":   float(df["loan_int_rate"].sum()),
+    }))
+
+
+def measure(spec, repeats):
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, __file__, "--child", json.dumps(spec)], cwd=ROOT,
+                             check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+
+
+def write_inputs(scale, out_dir):
+    import numpy as np
+    import pandas as pd
+    from creditiq.io import write_table
+    df = pd.read_csv(DATA)
+    big = df.iloc[np.tile(np.arange(len(df)), scale)].reset_index(drop=True)
+    paths = {"csv": os.path.join(out_dir, "cleaned_x.csv"),
+             "parquet": os.path.join(out_dir, "cleaned_x.parquet")}
+    big.to_csv(paths["csv"], index=False)
+    write_table(big, paths["parquet"])
+    return paths, len(big)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return child(args.child)
+    warnings.filterwarnings("ignore", module="sklearn")
+
+    from creditiq import CreditScorer
+    from creditiq.io import scoring_columns, table_columns
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, n_rows = write_inputs(args.scale, tmp)
+        features = scoring_columns(CreditScorer.from_path(), table_columns(paths["csv"]))
+        sizes = {fmt: os.path.getsize(p) / 2**20 for fmt, p in paths.items()}
+        print(f"{n_rows:,} rows; CSV {sizes['csv']:.1f} MB, Parquet {sizes['parquet']:.1f} MB "
+              f"({len(features)} of {len(table_columns(paths['csv']))} columns used for scoring)")
+
+        cases = [
+            ("csv, all columns",         "pandas", "csv",     None,     None),
+            ("csv, feature columns",     "pandas", "csv",     features, None),
+            ("parquet, all columns",     "io",     "parquet", None,     None),
+            ("parquet, feature columns", "io",     "parquet", features, None),
+            ("parquet, features+filter", "io",     "parquet", features, FILTER),
+            ("csv, features+filter",     "io",     "csv",     features, FILTER),
+        ]
+        print(f"{'case':<26} {'load':>9} {'peak RSS':>10} {'frame':>10} {'rows':>11}")
+        checksums, base = {}, None
+        for name, reader, fmt, columns, filters in cases:
+            r = measure({"reader": reader, "path": paths[fmt], "columns": columns,
+                         "filters": filters}, args.repeats)
+            base = base or r["load_s"]
+            print(f"{name:<26} {r['load_s'] * 1e3:>7.0f}ms {r['peak_mb']:>8.1f}MB "
+                  f"{r['frame_mb']:>8.1f}MB {int(r['rows']):>11,}  {base / r['load_s']:>5.1f}x")
+            checksums.setdefault(filters is not None, set()).add((int(r["rows"]), round(r["checksum"], 4)))
+        if any(len(v) != 1 for v in checksums.values()):
+            raise AssertionError(f"formats disagree: {checksums}")
+        print("CSV and Parquet reads agree.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Cold-start time to first render, per app page.
+
+    python benchmarks/bench_startup.py [--repeats 3] [--check] [--budget-ms 4000]
+
+Each run starts a fresh interpreter and opens one page directly
+(`?page=<name>`) through Streamlit's `AppTest`, so nothing is cached or
+imported ahead of the page. Reported per page (median over repeats): time to
+import Streamlit, time for the first full script run (registry start, model
+load and page render), time for a second rerun, and which heavy libraries
+the page pulled in.
+
+`--check` fails (exit 1) when a page imports a library it has no use for,
+as listed in `FORBIDDEN`, or when the first render exceeds `--budget-ms`.
+Import contracts are deterministic, so they catch a stray module-level
+import even on a machine too noisy to compare timings.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP  = os.path.join(ROOT, "app.py")
+
+PAGES = ("Overview", "Performance", "Predict")
+HEAVY = ("pandas", "pyarrow", "matplotlib", "seaborn", "altair", "sklearn", "scipy")
+# Libraries each page must not load on its own. Performance renders the
+# confusion matrix with seaborn (which imports pandas) on a figure-cache miss.
+FORBIDDEN = {
+    "Overview":    ("pandas", "pyarrow", "matplotlib", "seaborn", "altair", "sklearn"),
+    "Performance": ("altair", "sklearn"),
+    "Predict":     ("pandas", "pyarrow", "matplotlib", "seaborn", "altair", "sklearn"),
+}
+
+
+def child(page):
+    import logging
+    import warnings
+    warnings.filterwarnings("ignore")
+    logging.disable(logging.CRITICAL)
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    t_import = time.perf_counter() - t0
+    before = {m for m in HEAVY if m in sys.modules}
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.query_params["page"] = page
+    t1 = time.perf_counter()
+    at.run()
+    t_first = time.perf_counter() - t1
+    errors = [str(e.value) for e in at.exception]
+    t2 = time.perf_counter()
+    at.run()
+    t_rerun = time.perf_counter() - t2
+    print(json.dumps({
+        "import_s": t_import, "first_s": t_first, "rerun_s": t_rerun,
+        "loaded":   sorted(m for m in HEAVY if m in sys.modules and m not in before),
+        "page":     at.sidebar.radio[0].value if len(at.sidebar.radio) else None,
+        "errors":   errors,
+    }))
+
+
+def measure(page, repeats):
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, __file__, "--child", page], cwd=ROOT,
+                             check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    result = {k: statistics.median(r[k] for r in runs) for k in ("import_s", "first_s", "rerun_s")}
+    result["loaded"] = sorted(set().union(*(r["loaded"] for r in runs)))
+    result["errors"] = [e for r in runs for e in r["errors"]]
+    result["page"]   = runs[-1]["page"]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="+", choices=PAGES, default=list(PAGES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 on a forbidden import or an over-budget first render")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="with --check: maximum first-render time per page")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return child(args.child)
+
+    print(f"{'page':<12} {'streamlit':>10} {'first run':>10} {'rerun':>8}  heavy imports")
+    failures = []
+    for page in args.pages:
+        r = measure(page, args.repeats)
+        print(f"{page:<12} {r['import_s'] * 1e3:>8.0f}ms {r['first_s'] * 1e3:>8.0f}ms "
+              f"{r['rerun_s'] * 1e3:>6.0f}ms  {', '.join(r['loaded']) or '-'}")
+        if r["errors"] or r["page"] != page:
+            failures.append(f"{page}: did not render ({r['errors'][:1] or 'opened ' + str(r['page'])})")
+        bad = sorted(set(r["loaded"]) & set(FORBIDDEN[page]))
+        if bad:
+            failures.append(f"{page}: imports {', '.join(bad)}")
+        if args.budget_ms is not None and r["first_s"] * 1e3 > args.budget_ms:
+            failures.append(f"{page}: first render {r['first_s'] * 1e3:.0f}ms > {args.budget_ms:.0f}ms")
+    for f in failures:
+        print(f"FAIL {f}", file=sys.stderr)
+    if args.check and failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
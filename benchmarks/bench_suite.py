@@ -0,0 +1,269 @@
+"""Benchmark suite: loading, scoring, encoding and figure rendering, as JSON.
+
+    python benchmarks/bench_suite.py [--out run.json] [--only 'batch.*'] [--quick]
+    python benchmarks/bench_suite.py --compare base.json run.json [--threshold 10]
+    python benchmarks/bench_suite.py --baseline base.json          # run, then compare
+
+Cases:
+
+    load.*         `load_package` of the pickle and of the artifact directory,
+                   and a full `CreditScorer` build (fusing, lookup tables)
+    score_one.*    one applicant through `CreditScorer.score_one`, per model, and
+                   a `PredictionCache` hit for the same applicant
+    sklearn_one.*  one scaled row through the pickle's `model` / `lr_model`
+    batch.*        `CreditScorer.score` (both models) on the first N rows of the
+                   cleaned dataset, and on a synthetic variant scaled up to
+                   `--synthetic-rows` (rows resampled, numeric columns jittered)
+    encode.*       `CreditScorer.encode` alone on the same data
+    contrib.*      `CreditScorer.contributions` per model on the encoded dataset,
+                   and `score(..., contributions=True)` (both models)
+    shap.dt        `CreditScorer.shap_values` (TreeSHAP) on the encoded dataset
+    whatif.*       a 50x50 what-if grid (`creditiq.whatif`) around one applicant
+    figure.*       Performance-page figures rendered to PNG as the figure cache
+                   does, and a figure-cache hit
+
+Every case runs in this process, repeated for at least `--min-time` seconds
+(three times at least); the JSON keeps the best and the median time per call
+and rows/s for row-based cases, together with the commit, library versions
+and machine it ran on.
+
+`--compare` flags every case whose time (`--metric`, best by default: the
+least noisy) grew by more than `--threshold` percent, and exits 1 if any did.
+"""
+import argparse
+import datetime
+import fnmatch
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.figcache import SAVEFIG, FigureCache  # noqa: E402
+from creditiq.io import read_table  # noqa: E402
+from creditiq.predcache import PredictionCache  # noqa: E402
+from creditiq.scoring import MODEL_KEYS, CreditScorer, load_package  # noqa: E402
+from creditiq.whatif import GRID_SIZE, sensitivity_grid  # noqa: E402
+
+DATA     = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+PICKLE   = os.path.join(ROOT, "dt_model.pkl")
+ARTIFACT = os.path.join(ROOT, "model_artifact")
+SIZES    = (1, 100, 10_000)
+APPLICANT = {
+    "person_age": 30, "person_income($)": 50000, "person_home_ownership": "RENT",
+    "person_emp_length": 5.0, "loan_intent": "PERSONAL", "loan_amnt($)": 10000,
+    "loan_int_rate": 11.0, "loan_percent_income": 0.2, "cb_person_default_on_file": "N",
+    "cb_person_cred_hist_length": 5,
+}
+
+
+def timed(fn, min_time, max_repeats=10_000):
+    """Per-call wall times of `fn`, run for at least `min_time` seconds and 3 times."""
+    times, total = [], 0.0
+    while len(times) < max_repeats and (total < min_time or len(times) < 3):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        times.append(dt)
+        total += dt
+    return times
+
+
+def synthetic(df, rows, seed=0):
+    """`rows` applicants resampled from `df`, numeric columns jittered by ~5%."""
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(df), rows)
+    out = {}
+    for col in df.columns:
+        values = df[col].to_numpy()[idx]
+        if np.issubdtype(values.dtype, np.number) and col != "loan_status":
+            jittered = values * rng.normal(1.0, 0.05, rows).clip(0.8, 1.2)
+            values = (np.rint(jittered) if np.issubdtype(values.dtype, np.integer)
+                      else jittered).astype(values.dtype)
+        out[col] = values
+    return out
+
+
+def head(df, n):
+    return {col: df[col].to_numpy()[:n] for col in df.columns}
+
+
+def png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", **SAVEFIG)
+    return buf.getvalue()
+
+
+def cases(synthetic_rows):
+    """`(name, fn, rows)` for every case; `rows` is None for non-row cases."""
+    from creditiq.figures import confusion_matrix_figure, importance_figure
+
+    scorer  = CreditScorer.from_path(ARTIFACT)
+    package = load_package(PICKLE)
+    df      = read_table(DATA)
+
+    yield "load.pickle", lambda: load_package(PICKLE), None
+    yield "load.artifact", lambda: load_package(ARTIFACT), None
+    yield "load.scorer", lambda: CreditScorer.from_path(ARTIFACT), None
+
+    for model in MODEL_KEYS:
+        yield f"score_one.{model}", lambda model=model: scorer.score_one(APPLICANT, model), 1
+    predictions = PredictionCache()
+    yield "score_one.cache_hit", lambda: predictions.score_one(scorer, APPLICANT), 1
+    x = scorer.transform(scorer.encode(APPLICANT)[0])
+    for model, key in (("dt", "model"), ("lr", "lr_model")):
+        yield f"sklearn_one.{model}", lambda est=package[key]: est.predict_proba(x), 1
+
+    data = {f"{n}": head(df, n) for n in SIZES}
+    data[f"{len(df)}"] = head(df, len(df))
+    data[f"synthetic_{synthetic_rows}"] = synthetic(df, synthetic_rows)
+    for label, cols in data.items():
+        rows = len(next(iter(cols.values())))
+        yield f"batch.{label}", lambda cols=cols: scorer.score(cols), rows
+    for label in (f"{len(df)}", f"synthetic_{synthetic_rows}"):
+        cols = data[label]
+        yield f"encode.{label}", lambda cols=cols: scorer.encode(cols), len(next(iter(cols.values())))
+    X = scorer.encode(data[f"{len(df)}"])[0]
+    for model in MODEL_KEYS:
+        yield f"contrib.{model}", lambda model=model: scorer.contributions(X, model), len(df)
+    yield ("contrib.score", lambda cols=data[f"{len(df)}"]: scorer.score(cols, contributions=True),
+           len(df))
+    yield "shap.dt", lambda: scorer.shap_values(X), len(df)
+
+    for model in MODEL_KEYS:
+        yield (f"whatif.{model}",
+               lambda model=model: sensitivity_grid(scorer, APPLICANT, "loan_amnt($)", "loan_int_rate", model),
+               GRID_SIZE ** 2)
+
+    cm = package["dt_metrics"]["confusion_matrix"]
+    fi = package["dt_metrics"]["feature_importance"]
+    yield "figure.confusion_matrix", lambda: png(confusion_matrix_figure(cm, "Decision Tree")), None
+    yield "figure.importance", lambda: png(importance_figure(fi, "Decision Tree")), None
+    cache = FigureCache()
+    cache.get("cm", lambda: confusion_matrix_figure(cm, "Decision Tree"))
+    yield "figure.cache_hit", lambda: cache.get("cm", lambda: confusion_matrix_figure(cm, "Decision Tree")), None
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment():
+    versions = {"python": platform.python_version(), "numpy": np.__version__}
+    for name in ("pandas", "pyarrow", "sklearn", "matplotlib"):
+        module = sys.modules.get(name)
+        if module is not None:
+            versions[name] = module.__version__
+    return {"commit": git_commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "machine": platform.machine(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "versions": versions}
+
+
+def run(only, min_time, synthetic_rows):
+    results = {}
+    print(f"{'case':<34} {'best':>11} {'median':>11} {'rows/s':>14}")
+    for name, fn, rows in cases(synthetic_rows):
+        if only and not any(fnmatch.fnmatch(name, pattern) for pattern in only):
+            continue
+        fn()                                    # warm-up: imports, caches, allocations
+        times = timed(fn, min_time)
+        best, median = min(times), statistics.median(times)
+        result = {"best_s": best, "median_s": median, "repeats": len(times)}
+        if rows:
+            result.update(rows=rows, rows_per_s=rows / best)
+        results[name] = result
+        rate = f"{rows / best:,.0f}" if rows else "-"
+        print(f"{name:<34} {best * 1e3:>9.3f}ms {median * 1e3:>9.3f}ms {rate:>14}", flush=True)
+    return results
+
+
+def compare(base, new, threshold, metric):
+    """Print per-case changes of `metric`; returns the names of regressed cases."""
+    old, cur = base["results"], new["results"]
+    print(f"{base['env']['commit']} -> {new['env']['commit']}, {metric}, threshold {threshold:g}%")
+    print(f"{'case':<34} {'base':>11} {'new':>11} {'change':>9}")
+    regressed = []
+    for name in cur:
+        if name not in old:
+            continue
+        a, b = old[name][metric], cur[name][metric]
+        change = (b - a) / a * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<34} {a * 1e3:>9.3f}ms {b * 1e3:>9.3f}ms {change:>+8.1f}%{flag}")
+    missing = sorted(old.keys() - cur.keys())
+    if missing:
+        print(f"not in the new run: {', '.join(missing)}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=None,
+                        help="JSON results path (default: .cache/bench/<commit>.json)")
+    parser.add_argument("--only", nargs="+", default=None, metavar="GLOB",
+                        help="run only cases matching these patterns, e.g. 'batch.*'")
+    parser.add_argument("--quick", action="store_true",
+                        help="shorter runs and a 200k-row synthetic set, for smoke checks")
+    parser.add_argument("--min-time", type=float, default=None,
+                        help="seconds to repeat each case for (default 1, 0.2 with --quick)")
+    parser.add_argument("--synthetic-rows", type=int, default=None,
+                        help="rows in the scaled-up synthetic set (default 1,000,000)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--baseline", default=None,
+                        help="result file to compare this run against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent slowdown that counts as a regression")
+    parser.add_argument("--metric", choices=("best_s", "median_s"), default="best_s")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        base, new = (json.load(open(path)) for path in args.compare)
+        if compare(base, new, args.threshold, args.metric):
+            raise SystemExit(1)
+        return
+
+    warnings.filterwarnings("ignore")
+    min_time = args.min_time if args.min_time is not None else (0.2 if args.quick else 1.0)
+    synthetic_rows = args.synthetic_rows or (200_000 if args.quick else 1_000_000)
+    results = run(args.only, min_time, synthetic_rows)
+    report = {"env": environment(), "min_time_s": min_time, "results": results}
+
+    out = args.out or os.path.join(ROOT, ".cache", "bench", f"{report['env']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"\nwrote {out}")
+
+    if args.baseline:
+        print()
+        with open(args.baseline) as f:
+            base = json.load(f)
+        if compare(base, report, args.threshold, args.metric):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
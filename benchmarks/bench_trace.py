@@ -0,0 +1,99 @@
+"""Cost of stage tracing on the scoring path.
+
+    python benchmarks/bench_trace.py [--calls 20000] [--repeats 7] [--page]
+
+Times `CreditScorer.score_one` and a 1,000-row `score_records` batch with
+`TRACER` off and on, alternating the two so drift hits both alike, and
+reports the median per call. `--page` also submits the Predict page through
+`AppTest` with tracing on and relates the same overhead to a whole page
+prediction: the traced scoring stages plus rendering the result.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.scoring import CreditScorer  # noqa: E402
+from creditiq.trace import TRACER  # noqa: E402
+
+APPLICANT = {
+    "person_age": 30, "person_income($)": 50000, "person_home_ownership": "RENT",
+    "person_emp_length": 5.0, "loan_intent": "PERSONAL", "loan_amnt($)": 10000,
+    "loan_int_rate": 11.0, "loan_percent_income": 0.2, "cb_person_default_on_file": "N",
+    "cb_person_cred_hist_length": 5,
+}
+
+
+def per_call(fn, calls):
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t0) / calls
+
+
+def off_on(fn, calls, repeats):
+    """Median seconds per call with tracing off and on."""
+    times = {False: [], True: []}
+    for _ in range(repeats):
+        for enabled in (False, True):
+            TRACER.enabled = enabled
+            times[enabled].append(per_call(fn, calls))
+    TRACER.enabled = False
+    return statistics.median(times[False]), statistics.median(times[True])
+
+
+def page_stages(submits):
+    """p50 seconds per traced stage over `submits` Predict-page predictions."""
+    from streamlit.testing.v1 import AppTest
+    warnings.filterwarnings("ignore")
+    logging.disable(logging.CRITICAL)
+    TRACER.reset()
+    TRACER.enabled = True
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.query_params["page"] = "Predict"
+    at.run()
+    for _ in range(submits):
+        at.button[0].click().run()
+    TRACER.enabled = False
+    return {stage: s["p50_s"] for stage, s in TRACER.snapshot().items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000, help="single-applicant calls per repeat")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--page", action="store_true", help="also measure a Predict-page prediction")
+    args = parser.parse_args(argv)
+
+    scorer = CreditScorer.from_path()
+    batch  = [APPLICANT] * 1000
+    for _ in range(1000):
+        scorer.score_one(APPLICANT)
+
+    print(f"{'path':<22} {'off':>10} {'on':>10} {'overhead':>10}")
+    rows = [("score_one", lambda: scorer.score_one(APPLICANT), args.calls),
+            ("score_records x1000", lambda: scorer.score_records(batch), max(args.calls // 500, 5))]
+    overhead = {}
+    for name, fn, calls in rows:
+        off, on = off_on(fn, calls, args.repeats)
+        overhead[name] = on - off
+        print(f"{name:<22} {off * 1e6:>8.1f}us {on * 1e6:>8.1f}us {(on - off) / off * 100:>9.2f}%")
+
+    if args.page:
+        stages = page_stages(submits=50)
+        total  = sum(stages.values())
+        print("\nPredict page, p50 per stage with tracing on:")
+        for stage, s in stages.items():
+            print(f"  {stage:<14} {s * 1e6:>9.1f}us")
+        print(f"  {'total':<14} {total * 1e6:>9.1f}us  tracing overhead "
+              f"{overhead['score_one'] / total * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compiled tree vs `DecisionTreeClassifier.predict_proba`.
+
+    python benchmarks/bench_tree.py [--sizes 1 100 10000 1000000]
+
+Rows are the cleaned dataset, encoded and scaled by `CreditScorer`, tiled up to
+each batch size. Every size is first checked for bit-for-bit equality with
+sklearn, then both paths are timed (best of several repeats).
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.scoring import CreditScorer  # noqa: E402
+from creditiq.tree import CompiledTree  # noqa: E402
+
+DATA  = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+SIZES = (1, 100, 10_000, 1_000_000)
+
+
+def best_time(fn, min_time=0.5, max_repeats=1000):
+    """Best per-call wall time over repeats, running for at least `min_time`."""
+    best, total, n = float("inf"), 0.0, 0
+    while n < max_repeats and (total < min_time or n < 3):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best, total, n = min(best, dt), total + dt, n + 1
+    return best
+
+
+def scaled_matrix(scorer):
+    import pandas as pd
+    X, _ = scorer.encode(pd.read_csv(DATA))
+    return scorer.transform(X)
+
+
+def run(sizes=SIZES, model_path=None):
+    warnings.filterwarnings("ignore", module="sklearn")
+    scorer = CreditScorer.from_path(model_path)
+    clf    = scorer.models["dt"]
+    tree   = CompiledTree.from_sklearn(clf)
+    X_all  = scaled_matrix(scorer)
+
+    results = []
+    for n in sizes:
+        X = X_all[np.arange(n) % len(X_all)]
+        if not np.array_equal(tree.predict_proba(X), clf.predict_proba(X)):
+            raise AssertionError(f"compiled tree diverges from sklearn at batch size {n}")
+        t_sk  = best_time(lambda: clf.predict_proba(X))
+        t_cmp = best_time(lambda: tree.predict_proba(X))
+        results.append({"rows": n, "sklearn_s": t_sk, "compiled_s": t_cmp, "speedup": t_sk / t_cmp})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--model-path", default=None)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'sklearn':>12} {'compiled':>12} {'speedup':>8}  (bit-identical)")
+    for r in run(args.sizes, args.model_path):
+        print(f"{r['rows']:>10,} {r['sklearn_s'] * 1e3:>10.3f}ms {r['compiled_s'] * 1e3:>10.3f}ms "
+              f"{r['speedup']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""TreeSHAP throughput on the cleaned dataset, in-process and per worker count.
+
+    python benchmarks/bench_treeshap.py [--rows 32576] [--workers 1 2 4] [--brute-rows 3]
+
+Shapley values of the decision tree for every row of the cleaned dataset
+(tiled to `--rows` if larger): the explainer build, `CreditScorer.shap_values`
+in this process, then `ParallelScorer.shap_values` at each worker count (pool
+started and explainers built before timing; pool timings include encoding
+the batch in the parent). Every pool run must match the in-process values
+exactly. For scale, brute force over all `2**n_features`
+coalitions (`scripts/check_treeshap.py`) is timed on `--brute-rows` rows and
+extrapolated to the whole dataset.
+
+By default worker counts go up to the number of CPUs this process may run on.
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from check_treeshap import brute_shap  # noqa: E402
+from creditiq import CreditScorer  # noqa: E402
+from creditiq.parallel import ParallelScorer, default_workers  # noqa: E402
+from creditiq.treeshap import TreeShap  # noqa: E402
+
+DATA = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+
+
+def timed(fn, repeats):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def worker_counts(limit):
+    counts, n = [], 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    return counts + [limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=None, help="default: the whole dataset")
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--brute-rows", type=int, default=3)
+    parser.add_argument("--model-path", default=None)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", module="sklearn")
+
+    scorer = CreditScorer.from_path(args.model_path)
+    df     = pd.read_csv(DATA)
+    if args.rows:
+        df = df.iloc[np.arange(args.rows) % len(df)].reset_index(drop=True)
+    X, _   = scorer.encode(df)
+    tree   = scorer.fused["dt"]
+    n      = len(X)
+    print(f"{n:,} rows, {tree.n_features} features, {len(tree.feature)} nodes (depth {tree.depth}), "
+          f"{default_workers()} CPU(s) available, model {scorer.version}")
+
+    t_build, explainer = timed(lambda: TreeShap(tree), args.repeats)
+    print(f"{'explainer build':<22} {t_build * 1e3:>9.1f}ms  "
+          f"(pattern tables {explainer.nbytes / 1e6:.1f} MB)")
+
+    t_pred, _ = timed(lambda: scorer.predict_proba(X, "dt"), args.repeats)
+    scorer.shap_values(X[:10])
+    t_ref, (_, ref) = timed(lambda: scorer.shap_values(X), args.repeats)
+    print(f"{'':<22} {'time':>11} {'rows/s':>12} {'speedup':>8}")
+    print(f"{'predict_proba':<22} {t_pred * 1e3:>9.1f}ms {n / t_pred:>12,.0f}")
+    print(f"{'in-process':<22} {t_ref * 1e3:>9.1f}ms {n / t_ref:>12,.0f}")
+
+    t_brute, _ = timed(lambda: [brute_shap(tree, x) for x in X[:args.brute_rows]], 1)
+    per_row = t_brute / args.brute_rows
+    print(f"{'brute force (est.)':<22} {per_row * n:>10,.0f}s {1 / per_row:>12,.1f} "
+          f"{'':>8}  ({per_row * 1e3:.0f} ms per row)")
+
+    rate0 = None
+    for workers in args.workers or worker_counts(default_workers()):
+        with ParallelScorer(scorer, workers) as pool:
+            pool.shap_values(df)              # workers up, explainers built
+            elapsed, (_, out) = timed(lambda: pool.shap_values(df), args.repeats)
+        if not np.array_equal(out, ref):
+            raise AssertionError(f"{workers} workers disagree with in-process Shapley values")
+        rate = n / elapsed
+        rate0 = rate0 or rate
+        label = f"{workers} worker{'s' if workers > 1 else ''}"
+        print(f"{label:<22} {elapsed * 1e3:>9.1f}ms {rate:>12,.0f} {rate / rate0:>7.2f}x")
+    print("All worker counts match in-process Shapley values.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Open-loop load test for the scoring service (`python -m creditiq.server`).
+
+    python benchmarks/loadtest.py --spawn --rate 2000 --duration 10
+
+Requests are fired on a fixed schedule (`rate` per second) regardless of how
+fast responses come back, and latency is measured from each request's
+*scheduled* send time, so client-side queueing is counted rather than hidden.
+Payloads are real applicants sampled from the cleaned dataset. Exits non-zero
+when p99 latency exceeds `--p99-ms`.
+"""
+import argparse
+import asyncio
+import csv
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+NUMERIC = {"person_age", "person_income($)", "person_emp_length", "loan_amnt($)",
+           "loan_int_rate", "loan_percent_income", "cb_person_cred_hist_length"}
+
+
+def load_payloads(path, n=2000, model="dt", seed=0):
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    rng = random.Random(seed)
+    payloads = []
+    for row in rng.sample(rows, min(n, len(rows))):
+        applicant = {k: (float(v) if k in NUMERIC else v) for k, v in row.items()
+                     if k not in ("loan_status", "loan_grade")}
+        applicant["model"] = model
+        payloads.append(json.dumps(applicant).encode())
+    return payloads
+
+
+async def _request(reader, writer, host, path, body):
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = next(int(line.split(b":", 1)[1]) for line in head.split(b"\r\n")
+                  if line.lower().startswith(b"content-length:"))
+    await reader.readexactly(length)
+    return status
+
+
+async def _get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b"\r\n\r\n", 1)[1])
+
+
+async def run_load(host, port, rate, duration, connections, payloads, path="/score"):
+    loop = asyncio.get_running_loop()
+    pool = asyncio.Queue()
+    for _ in range(connections):
+        pool.put_nowait(await asyncio.open_connection(host, port))
+
+    latencies, errors = [], 0
+
+    async def fire(sched, body):
+        nonlocal errors
+        conn = await pool.get()
+        try:
+            status = await _request(*conn, host, path, body)
+            if status != 200:
+                errors += 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            errors += 1
+            conn = await asyncio.open_connection(host, port)
+        finally:
+            pool.put_nowait(conn)
+        latencies.append(loop.time() - sched)
+
+    # Each request's task is created at its scheduled time: creating them all
+    # up front takes long enough on a slow core to make the first ones late.
+    n_requests = int(rate * duration)
+    start, tasks = loop.time(), []
+    for i in range(n_requests):
+        sched = start + i / rate
+        delay = sched - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(loop.create_task(fire(sched, payloads[i % len(payloads)])))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+
+    while not pool.empty():
+        _, writer = pool.get_nowait()
+        writer.close()
+    return sorted(latencies), errors, elapsed
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def spawn_server(port, window_ms, model_path=None):
+    cmd = [sys.executable, "-m", "creditiq.server", "--port", str(port),
+           "--window-ms", str(window_ms)]
+    if model_path:
+        cmd += ["--model-path", model_path]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    proc.stdout.readline()  # "listening on ..." once the model is loaded
+    return proc
+
+
+async def main_async(args):
+    payloads = load_payloads(args.data, model=args.model)
+    gc.freeze()
+    if args.warmup > 0:
+        await run_load(args.host, args.port, args.rate, args.warmup, args.connections, payloads)
+    before = (await _get_json(args.host, args.port, "/health"))["batching"]
+    lat, errors, elapsed = await run_load(args.host, args.port, args.rate, args.duration,
+                                          args.connections, payloads)
+    after = (await _get_json(args.host, args.port, "/health"))["batching"]
+
+    batches  = after["batches"] - before["batches"]
+    requests = after["requests"] - before["requests"]
+    p = {q: percentile(lat, q) * 1000 for q in (50, 90, 99, 99.9)}
+    print(f"requests      {len(lat):,} in {elapsed:.2f}s  ({len(lat) / elapsed:,.0f} req/s, target {args.rate:,})")
+    print(f"errors        {errors}")
+    print(f"latency ms    p50 {p[50]:.2f}  p90 {p[90]:.2f}  p99 {p[99]:.2f}  "
+          f"p99.9 {p[99.9]:.2f}  max {lat[-1] * 1000:.2f}")
+    print(f"micro-batches {batches:,} (mean {requests / max(batches, 1):.1f} rows/batch, "
+          f"max {after['max_batch']})")
+    ok = p[99] <= args.p99_ms and errors == 0
+    print(f"{'PASS' if ok else 'FAIL'}: p99 {p[99]:.2f} ms vs target {args.p99_ms} ms")
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--rate", type=int, default=2000, help="requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds first")
+    parser.add_argument("--connections", type=int, default=64, help="keep-alive connections")
+    parser.add_argument("--model", default="dt", choices=["dt", "lr"])
+    parser.add_argument("--p99-ms", type=float, default=5.0)
+    parser.add_argument("--data", default=DATA)
+    parser.add_argument("--spawn", action="store_true",
+                        help="start a local server instance for the duration of the test")
+    parser.add_argument("--window-ms", type=float, default=0.0, help="window for --spawn")
+    args = parser.parse_args(argv)
+
+    proc = spawn_server(args.port, args.window_ms) if args.spawn else None
+    try:
+        return asyncio.run(main_async(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""CreditIQ scoring library — the model package behind app.py, without the UI."""
+
+__all__ = ["CreditScorer", "load_package"]
+
+
+def __getattr__(name):
+    # Imported on first use, so `python -m creditiq.<module>` does not import
+    # the module it is about to run (and everything scoring pulls in) twice.
+    if name in __all__:
+        from . import scoring
+        return getattr(scoring, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
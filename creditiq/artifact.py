@@ -0,0 +1,354 @@
+"""Versioned model artifact directories.
+
+A pickle-free alternative to `dt_model.pkl`:
+
+    model_artifact/
+        manifest.json      format version, feature layout, thresholds, grade breakpoints,
+                           array index
+        metrics.json       dt_metrics, lr_metrics, dataset_info (read on first use)
+        dt_*.npy           fused decision tree (raw-feature thresholds; `dt_cover`,
+                           the training weight per node, is optional)
+        lr_*.npy           fused logistic regression
+        scaler_*.npy       StandardScaler mean_ / scale_
+
+Arrays are plain `.npy` files loaded with `mmap_mode="r"` and `allow_pickle=False`,
+so workers on one host share a single page-cached copy and loading never runs
+code from the artifact. Neither loading nor scoring needs sklearn.
+
+    python -m creditiq.artifact convert dt_model.pkl model_artifact/ --curves
+    python -m creditiq.artifact verify model_artifact/
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from .encoding import CATEGORIES
+from .fused import FusedLinear, fuse_package, scaler_stats
+from .tree import ARRAY_FIELDS, OPTIONAL_FIELDS, CompiledTree
+
+FORMAT          = "creditiq-artifact"
+FORMAT_VERSION  = 1
+MANIFEST        = "manifest.json"
+METRICS         = "metrics.json"
+METRICS_KEYS    = ("dt_metrics", "lr_metrics", "dataset_info")
+LINEAR_FIELDS   = ("coef", "intercept")
+
+
+class ArtifactError(ValueError):
+    """The directory is not a valid model artifact for this version of creditiq."""
+
+
+class StaleArtifactError(ArtifactError):
+    """The pickle the artifact was converted from has been retrained since."""
+
+
+def is_artifact(path):
+    return path is not None and os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def package_fingerprint(package):
+    """SHA-256 identifying a package's content.
+
+    Artifact directories hash their manifest (which carries every array's
+    checksum) and metrics file; other packages hash their metrics, feature
+    layout and thresholds, which is everything derived from the models that
+    a viewer can see.
+    """
+    h = hashlib.sha256()
+    path = getattr(package, "path", None)
+    if path is not None:
+        for name in (MANIFEST, METRICS):
+            file = os.path.join(path, name)
+            if os.path.exists(file):
+                h.update(_sha256(file).encode())
+    else:
+        h.update(json.dumps({k: package.get(k) for k in (*METRICS_KEYS, "feature_columns",
+                                                          "dt_threshold", "lr_threshold")},
+                            sort_keys=True, default=_json_default).encode())
+    return h.hexdigest()
+
+
+class ArtifactPackage(dict):
+    """Package dict read from an artifact directory.
+
+    Holds the same keys as the pickled package except the sklearn objects:
+    `fused` replaces `model` / `lr_model`, and `scaler_mean` / `scaler_scale`
+    replace `scaler`. The metrics keys are read from `metrics.json` on first
+    access, so scoring-only workers never parse them.
+    """
+
+    def __init__(self, path, manifest, **items):
+        super().__init__(**items)
+        self.path     = path
+        self.manifest = manifest
+
+    def _load_metrics(self):
+        with open(os.path.join(self.path, METRICS)) as f:
+            metrics = json.load(f)
+        for key in METRICS_KEYS:
+            dict.setdefault(self, key, metrics.get(key, {}))
+
+    def __missing__(self, key):
+        if key in METRICS_KEYS:
+            self._load_metrics()
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in METRICS_KEYS
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+def convert(package, out_dir, source=None, overwrite=False, curves=False, data_path=None):
+    """Write a pickled model package as an artifact directory.
+
+    `source` is the pickle `package` was read from; its name and SHA-256 go
+    in the manifest, for `check_source`.
+
+    `curves=True` adds test-set threshold, ROC and PR curves to the metrics
+    (`creditiq.curves.package_curves`) for packages that do not carry them.
+    The directory is assembled next to `out_dir` and renamed into place, so
+    readers never observe a half-written artifact.
+    """
+    from .scoring import grade_table  # scoring imports this module
+
+    out_dir = os.path.abspath(out_dir)
+    if os.path.exists(out_dir) and not overwrite:
+        raise FileExistsError(f"{out_dir} already exists")
+    breakpoints, labels = grade_table(package)
+    tmp = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    metrics = {k: package.get(k, {}) for k in METRICS_KEYS}
+    if curves:
+        from .curves import METRIC_KEYS, package_curves
+        entries = package_curves(package, data_path)
+        for k, key in METRIC_KEYS.items():
+            metrics[key] = {**(metrics[key] or {}), **entries[k]}
+
+    fused = fuse_package(package)
+    mean, scale = scaler_stats(package["scaler"])
+    n_features  = len(package["feature_columns"])
+    arrays = {f"dt_{k}": v for k, v in fused["dt"].to_arrays().items()}
+    arrays.update({f"lr_{k}": v for k, v in fused["lr"].to_arrays().items()})
+    arrays["scaler_mean"]  = np.broadcast_to(np.asarray(mean, np.float64), n_features)
+    arrays["scaler_scale"] = np.broadcast_to(np.asarray(scale, np.float64), n_features)
+
+    index = {}
+    for name, value in arrays.items():
+        value = np.ascontiguousarray(value)
+        if value.dtype == np.intp:
+            value = value.astype(np.int64)
+        filename = f"{name}.npy"
+        np.save(os.path.join(tmp, filename), value, allow_pickle=False)
+        index[name] = {"file": filename, "dtype": value.dtype.str, "shape": list(value.shape),
+                       "sha256": _sha256(os.path.join(tmp, filename))}
+
+    cat_cols   = list(package.get("cat_cols", []))
+    categories = package.get("categories") or {c: CATEGORIES[c] for c in cat_cols if c in CATEGORIES}
+    manifest = {
+        "format":          FORMAT,
+        "format_version":  FORMAT_VERSION,
+        "created":         time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "source":          source and os.path.basename(source),
+        "source_sha256":   _sha256(source) if source and os.path.isfile(source) else None,
+        "feature_columns": list(package["feature_columns"]),
+        "cat_cols":        cat_cols,
+        "categories":      categories,
+        "thresholds":      {"dt": float(package.get("dt_threshold", 0.35)),
+                            "lr": float(package.get("lr_threshold", 0.35))},
+        "grades":          {"breakpoints": breakpoints.tolist(), "labels": labels.tolist()},
+        "models":          {"dt": {"type": "tree", "input": "raw"},
+                            "lr": {"type": "linear", "input": "raw"}},
+        "arrays":          index,
+    }
+    with open(os.path.join(tmp, METRICS), "w") as f:
+        json.dump(metrics, f, indent=1, default=_json_default)
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.replace(tmp, out_dir)
+    return out_dir
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+def read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ArtifactError(f"unreadable manifest in {path}: {e}") from e
+    if manifest.get("format") != FORMAT:
+        raise ArtifactError(f"{path} is not a {FORMAT} directory")
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(f"{path} has format version {manifest.get('format_version')}, "
+                            f"expected {FORMAT_VERSION}")
+    missing = [k for k in ("feature_columns", "thresholds", "arrays") if k not in manifest]
+    if missing:
+        raise ArtifactError(f"manifest in {path} lacks {', '.join(missing)}")
+    return manifest
+
+
+def source_path(path):
+    """Path of the pickle the artifact at `path` was converted from, when it
+    sits next to the artifact; else None."""
+    source = read_manifest(path).get("source")
+    pickle_path = os.path.join(os.path.dirname(os.path.normpath(path)), source) if source else None
+    return pickle_path if pickle_path and os.path.isfile(pickle_path) else None
+
+
+def derived_artifact(pickle_path, name="model_artifact"):
+    """The `name` directory next to `pickle_path` if it was converted from that pickle, else None."""
+    path = os.path.join(os.path.dirname(os.path.abspath(pickle_path)), name)
+    if not is_artifact(path):
+        return None
+    try:
+        source = source_path(path)
+    except ArtifactError:
+        return None
+    return path if source and os.path.abspath(source) == os.path.abspath(pickle_path) else None
+
+
+def check_source(path):
+    """Raise `StaleArtifactError` if the pickle the artifact was converted from,
+    when it sits next to the artifact, has changed since (retrained).
+
+    Compares the recorded `source_sha256`; artifacts converted before it was
+    recorded compare modification times instead.
+    """
+    pickle_path = source_path(path)
+    if pickle_path is None:
+        return
+    recorded = read_manifest(path).get("source_sha256")
+    if recorded is not None:
+        stale = _sha256(pickle_path) != recorded
+    else:
+        stale = os.path.getmtime(pickle_path) > os.path.getmtime(os.path.join(path, MANIFEST))
+    if stale:
+        raise StaleArtifactError(f"{pickle_path} has changed since {path} was converted from it; "
+                            f"regenerate the artifact with `python -m creditiq.artifact convert "
+                            f"{pickle_path} {path} --curves --force`")
+
+
+def _load_array(path, name, spec, mmap, verify):
+    file = os.path.join(path, spec["file"])
+    if os.path.dirname(os.path.normpath(spec["file"])):
+        raise ArtifactError(f"array {name} points outside the artifact: {spec['file']}")
+    if verify and _sha256(file) != spec["sha256"]:
+        raise ArtifactError(f"checksum mismatch for {spec['file']}")
+    try:
+        arr = np.load(file, mmap_mode="r" if mmap else None, allow_pickle=False)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"cannot load {spec['file']}: {e}") from e
+    if arr.dtype.str != spec["dtype"] or list(arr.shape) != spec["shape"]:
+        raise ArtifactError(f"{spec['file']} is {arr.dtype.str}{list(arr.shape)}, "
+                            f"manifest says {spec['dtype']}{spec['shape']}")
+    return arr
+
+
+def load_artifact(path, mmap=True, verify=False):
+    """Load an artifact directory into an `ArtifactPackage` for `CreditScorer`.
+
+    `verify=True` also checks every array's SHA-256 against the manifest.
+    """
+    manifest = read_manifest(path)
+    arrays = {name: _load_array(path, name, spec, mmap, verify)
+              for name, spec in manifest["arrays"].items()}
+    try:
+        tree = CompiledTree.from_arrays({f: arrays[f"dt_{f}"] for f in ARRAY_FIELDS + OPTIONAL_FIELDS
+                                         if f in ARRAY_FIELDS or f"dt_{f}" in arrays},
+                                        input_dtype=np.float64)
+        lr   = FusedLinear.from_arrays({f: arrays[f"lr_{f}"] for f in LINEAR_FIELDS})
+        mean, scale = arrays["scaler_mean"], arrays["scaler_scale"]
+    except KeyError as e:
+        raise ArtifactError(f"artifact {path} lacks array {e.args[0]}") from e
+    if tree.n_features > len(manifest["feature_columns"]) or len(lr.coef) != len(manifest["feature_columns"]):
+        raise ArtifactError(f"model arrays in {path} do not match its feature_columns")
+
+    return ArtifactPackage(
+        path, manifest,
+        feature_columns   = manifest["feature_columns"],
+        cat_cols          = manifest.get("cat_cols", []),
+        categories        = manifest.get("categories"),
+        dt_threshold      = manifest["thresholds"]["dt"],
+        lr_threshold      = manifest["thresholds"]["lr"],
+        grade_breakpoints = manifest.get("grades", {}).get("breakpoints"),
+        grade_labels      = manifest.get("grades", {}).get("labels"),
+        scaler_mean       = mean,
+        scaler_scale      = scale,
+        fused             = {"dt": tree, "lr": lr},
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and check model artifact directories.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="pickled package -> artifact directory")
+    conv.add_argument("package", help="model package, e.g. dt_model.pkl")
+    conv.add_argument("output", help="destination directory")
+    conv.add_argument("--force", action="store_true", help="replace an existing directory")
+    conv.add_argument("--curves", action="store_true",
+                      help="add test-set threshold, ROC and PR curves to the metrics")
+    conv.add_argument("--data", default=None, help="cleaned dataset the package was trained on (--curves)")
+    ver = sub.add_parser("verify", help="validate manifest, checksums and array shapes, "
+                                        "and that the source pickle is unchanged")
+    ver.add_argument("artifact")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        from .scoring import load_package
+
+        package = load_package(args.package)
+        if package is None:
+            parser.error(f"model package not found: {args.package}")
+        try:
+            out = convert(package, args.output, source=args.package, overwrite=args.force,
+                          curves=args.curves, data_path=args.data)
+        except FileExistsError as e:
+            parser.error(f"{e} (use --force to replace it)")
+        except ValueError as e:
+            raise SystemExit(f"convert: {e}")
+        print(f"Wrote artifact to {out}")
+    else:
+        try:
+            package = load_artifact(args.artifact, verify=True)
+            check_source(args.artifact)
+        except ArtifactError as e:
+            raise SystemExit(f"invalid artifact: {e}")
+        manifest = package.manifest
+        print(f"ok: {FORMAT} v{manifest['format_version']}, {len(manifest['arrays'])} arrays, "
+              f"{len(manifest['feature_columns'])} features, created {manifest.get('created')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Streaming scorer for files larger than memory.
+
+    python -m creditiq.batch portfolio.csv scored.csv --chunk-rows 100000
+    python -m creditiq.batch portfolio.parquet scored.parquet --features-only \
+        --filter "loan_intent == EDUCATION"
+
+Reads the input in fixed-size chunks, scores each one through the same
+`CreditScorer.score` pipeline as the Predict page's batch upload, and appends
+the chunk to the output before reading the next. Memory therefore scales with
+`--chunk-rows`, not with file size. Progress goes to stderr after every chunk:
+rows done, percent of input read, rows/second, current and peak RSS.
+`--workers N` scores each chunk across a `creditiq.parallel` process pool.
+
+Input and output may each be CSV, Parquet or Arrow (see `creditiq.io`).
+`--features-only` reads just the columns the models need, and `--filter`
+re-scores a subset; with Parquet input both are pushed down into the reader.
+`--contributions` adds each model's per-input contributions to every row
+(`CreditScorer.explain`), and `--shap` the decision tree's Shapley values
+(`CreditScorer.shap_columns`), computed by the pool's workers with `--workers`.
+
+Raw-dataset column names (`person_income`, `loan_amnt`) are accepted; rows
+whose inputs are missing values the logistic regression cannot score are
+counted and reported. Output goes to a temporary file that is renamed at the
+end, so an interrupted job never leaves a truncated result behind.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from .io import FrameWriter, file_format, iter_frames, parse_filter, scoring_columns, table_columns
+from .scoring import MODEL_KEYS, CreditScorer
+
+
+def rss_mb():
+    """`(current, peak)` resident set size in MiB, from /proc where available."""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith(("VmRSS", "VmHWM")))
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return peak, peak
+
+
+def score_file(scorer, src, dst, chunk_rows=100_000, models=MODEL_KEYS, progress=None, workers=1,
+               features_only=False, filters=None, contributions=False, shap=False):
+    """Score `src` into `dst` chunk by chunk; returns a summary dict.
+
+    `progress`, if given, is called after each chunk with the running summary.
+    With `workers > 1` every chunk is scored by a `ParallelScorer` pool.
+    `features_only` projects the input onto the columns the models need;
+    `filters` are `(column, op, value)` tuples as in `creditiq.io`.
+    `contributions` adds the `CreditScorer.explain` columns and `shap` the
+    `CreditScorer.shap_columns`.
+    """
+    if workers > 1:
+        from .parallel import ParallelScorer
+        with ParallelScorer(scorer, workers) as pool:
+            return _score_file(scorer, pool.score, src, dst, chunk_rows, models, progress,
+                               features_only, filters, contributions, shap)
+    return _score_file(scorer, scorer.score, src, dst, chunk_rows, models, progress,
+                       features_only, filters, contributions, shap)
+
+
+def _score_file(scorer, score, src, dst, chunk_rows, models, progress, features_only, filters,
+                contributions, shap):
+    columns = scoring_columns(scorer, table_columns(src)) if features_only else None
+    tmp = f"{dst}.tmp-{os.getpid()}"
+    stats = {"rows": 0, "chunks": 0, "unscored": 0, "elapsed_s": 0.0, "fraction": 0.0,
+             "model_version": scorer.version, "unknown_categories": {}}
+    t0 = time.perf_counter()
+    try:
+        with FrameWriter(tmp, file_format(dst)) as out:
+            for chunk, fraction in iter_frames(src, chunk_rows, columns, filters):
+                scores, unknown = score(chunk, models, contributions, shap, return_unknown=True)
+                for col, n in unknown.items():
+                    stats["unknown_categories"][col] = stats["unknown_categories"].get(col, 0) + n
+                out.write(chunk.assign(**scores))
+                probs = np.column_stack([scores[f"{key}_default_prob"] for key in models])
+                stats["unscored"]  += int(np.isnan(probs).any(axis=1).sum())
+                stats["rows"]      += len(chunk)
+                stats["chunks"]    += 1
+                stats["elapsed_s"]  = time.perf_counter() - t0
+                stats["fraction"]   = fraction or 0.0
+                if progress is not None:
+                    progress(stats)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    stats["elapsed_s"]  = time.perf_counter() - t0
+    stats["fraction"]   = 1.0
+    stats["rows_per_s"] = stats["rows"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+    stats["peak_rss_mb"] = rss_mb()[1]
+    return stats
+
+
+def _report(stats):
+    rss, peak = rss_mb()
+    rate = stats["rows"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+    pct  = f"{stats['fraction'] * 100:5.1f}%  " if stats["fraction"] else ""
+    print(f"\r{pct}{stats['rows']:>12,} rows  {rate:>10,.0f} rows/s  "
+          f"RSS {rss:,.0f} MB (peak {peak:,.0f} MB)", end="", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a table of applicants in bounded memory.")
+    parser.add_argument("input", help="applicant CSV, Parquet or Arrow file "
+                                      "(cleaned or raw column names; CSV may be compressed)")
+    parser.add_argument("output", help="destination (.csv, .parquet or .feather): "
+                                       "input columns plus score columns")
+    parser.add_argument("--chunk-rows", type=int, default=100_000,
+                        help="rows per chunk; bounds peak memory")
+    parser.add_argument("--model-path", default=None,
+                        help="artifact directory or pickled package (default: model_artifact/, then dt_model.pkl)")
+    parser.add_argument("--models", nargs="+", choices=MODEL_KEYS, default=list(MODEL_KEYS))
+    parser.add_argument("--workers", type=int, default=1,
+                        help="score each chunk across this many processes")
+    parser.add_argument("--features-only", action="store_true",
+                        help="read only the input columns the models need")
+    parser.add_argument("--filter", action="append", default=[], metavar="EXPR",
+                        help="only score rows matching `column op value`, e.g. "
+                             "\"loan_amnt($) > 10000\"; repeatable")
+    parser.add_argument("--contributions", action="store_true",
+                        help="add per-input contribution columns for each model")
+    parser.add_argument("--shap", action="store_true",
+                        help="add the decision tree's per-input Shapley value columns")
+    parser.add_argument("--quiet", action="store_true", help="no per-chunk progress")
+    args = parser.parse_args(argv)
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be positive")
+    try:
+        filters = [parse_filter(f) for f in args.filter] or None
+    except ValueError as e:
+        parser.error(str(e))
+
+    scorer = CreditScorer.from_path(args.model_path)
+    try:
+        stats = score_file(scorer, args.input, args.output, args.chunk_rows, args.models,
+                           progress=None if args.quiet else _report, workers=args.workers,
+                           features_only=args.features_only, filters=filters,
+                           contributions=args.contributions, shap=args.shap)
+    except (ValueError, KeyError) as e:
+        if not args.quiet:
+            print(file=sys.stderr)
+        raise SystemExit(f"scoring failed: {e}")
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Scored {stats['rows']:,} rows in {stats['chunks']} chunks, {stats['elapsed_s']:.1f}s "
+          f"({stats['rows_per_s']:,.0f} rows/s), peak RSS {stats['peak_rss_mb']:,.0f} MB, "
+          f"model {stats['model_version']} -> {args.output}")
+    if stats["unscored"]:
+        print(f"warning: {stats['unscored']:,} rows were left unscored (missing numeric inputs): "
+              f"NaN probability, empty pred and risk level", file=sys.stderr)
+    for col, n in stats["unknown_categories"].items():
+        print(f"warning: {n:,} rows with an unrecognized {col} were scored as the reference level",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+"""Incremental cleaning: raw applications -> the cleaned dataset.
+
+    python -m creditiq.cleaning                 # clean raw rows appended since the last run
+    python -m creditiq.cleaning --verify        # cleaned file == a full rebuild from raw?
+    python -m creditiq.cleaning --rebuild       # refit the statistics, re-clean everything
+
+Runs the steps of `notebook/data_cleaning.ipynb`, vectorized over a frame of
+raw rows:
+
+    impute_int_rate    missing loan_int_rate -> median
+    filter_age         keep 18 <= person_age <= 100
+    clip_amount        loan_amnt clipped to the IQR fences (Q1 - 1.5 IQR, Q3 + 1.5 IQR)
+    rename             person_income -> person_income($), loan_amnt -> loan_amnt($)
+    clip_emp_length    person_emp_length capped at 60
+    impute_emp_length  missing person_emp_length -> median
+    types              integer columns back to int64, columns in the cleaned order
+
+The medians and fences are statistics of the whole history. They are fitted
+once, on the first run, exactly as the notebook fits them, and then kept in a
+state file next to the cleaned dataset, like the scaler is kept with the
+models. New rows are cleaned with the same statistics, so appending them gives
+the same file as re-cleaning all raw rows would. `--rebuild` refits on the
+current raw file and rewrites the cleaned dataset (refusing, without
+`--force`, when that would empty a column the raw file does not have).
+
+The state also records every processed raw row's content hash, in order, and
+the length and sha256 of the processed prefix of the raw file. When that
+prefix is unchanged (the file only grew), just the bytes after it are parsed.
+Otherwise the whole raw file is hashed row by row and the rows not yet
+processed are found by hash; raw duplicates are legitimate, so hashes are
+counted, not just matched. Rows already cleaned that were edited or removed
+are an error, to be fixed with `--rebuild`.
+
+New rows are appended to the cleaned CSV, and the typed Parquet copy next to
+it is refreshed when one exists. The state is written last, after the
+cleaned file's new length; a run interrupted in between is undone by the
+next one, which truncates the cleaned CSV (and the Parquet copy) back to what
+the state records.
+
+A missing value where the notebook never imputes one (any column other than
+the two imputed ones) drops the row in `types`: the cleaned dataset has no
+missing values. Raw files without `loan_grade`, like
+`data/raw/credit_risk_dataset_raw.csv`, leave it empty in new rows.
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .io import PARQUET, read_table, write_table
+from .scoring import COLUMN_ALIASES
+
+RAW      = os.path.join("data", "raw", "credit_risk_dataset_raw.csv")
+CLEANED  = os.path.join("data", "cleaned", "cleaned_credit_risk.csv")
+
+# The cleaned dataset's columns, in order, and how they are stored.
+COLUMNS = ["person_age", "person_income($)", "person_home_ownership", "person_emp_length",
+           "loan_intent", "loan_grade", "loan_amnt($)", "loan_int_rate", "loan_status",
+           "loan_percent_income", "cb_person_default_on_file", "cb_person_cred_hist_length"]
+INT_COLUMNS    = ["person_age", "person_income($)", "loan_amnt($)", "loan_status",
+                  "cb_person_cred_hist_length"]
+FLOAT_COLUMNS  = ["person_emp_length", "loan_int_rate", "loan_percent_income"]
+# Numeric raw columns are parsed as float64 whatever a chunk contains, so a
+# chunk without missing values parses (and hashes) like the whole file.
+RAW_NUMERIC = [{v: k for k, v in COLUMN_ALIASES.items()}.get(c, c) for c in INT_COLUMNS + FLOAT_COLUMNS]
+# Columns that may be absent from the raw file; they stay empty in cleaned rows.
+OPTIONAL = ("loan_grade",)
+
+AGE_RANGE        = (18, 100)
+IQR_FENCE        = 1.5
+EMP_LENGTH_MAX   = 60
+STATE_VERSION    = 1
+
+
+# ── Steps ───────────────────────────────────────────────────────────────────
+# Each step takes `(df, params, fit)` and returns `(df, changed)`: the cleaned
+# frame and how many values (or rows) it changed. With `fit`, a step first
+# fits its statistics on `df` into `params`, as the notebook does at that point.
+
+def impute_int_rate(df, params, fit):
+    col = df["loan_int_rate"]
+    if fit:
+        params["int_rate_median"] = float(col.median())
+    missing = int(col.isna().sum())
+    df["loan_int_rate"] = col.fillna(params["int_rate_median"])
+    return df, missing
+
+
+def filter_age(df, params, fit):
+    lo, hi = AGE_RANGE
+    keep = df["person_age"].between(lo, hi)
+    return df[keep], int((~keep).sum())
+
+
+def clip_amount(df, params, fit):
+    col = df["loan_amnt"]
+    if fit:
+        q1, q3 = col.quantile(0.25), col.quantile(0.75)
+        # Inward to whole dollars, so amounts stay integers; the notebook's
+        # fences on the committed data are whole already (-5,800 and 23,000).
+        params["amount_lower"] = float(np.ceil(q1 - IQR_FENCE * (q3 - q1)))
+        params["amount_upper"] = float(np.floor(q3 + IQR_FENCE * (q3 - q1)))
+    lo, hi = params["amount_lower"], params["amount_upper"]
+    changed = int(((col < lo) | (col > hi)).sum())
+    df["loan_amnt"] = col.clip(lo, hi)
+    return df, changed
+
+
+def rename(df, params, fit):
+    return df.rename(columns=COLUMN_ALIASES), 0
+
+
+def clip_emp_length(df, params, fit):
+    col = df["person_emp_length"]
+    changed = int((col > EMP_LENGTH_MAX).sum())
+    df["person_emp_length"] = col.clip(upper=EMP_LENGTH_MAX)
+    return df, changed
+
+
+def impute_emp_length(df, params, fit):
+    col = df["person_emp_length"]
+    if fit:
+        params["emp_length_median"] = float(col.median())
+    missing = int(col.isna().sum())
+    df["person_emp_length"] = col.fillna(params["emp_length_median"])
+    return df, missing
+
+
+def types(df, params, fit):
+    import pandas as pd
+
+    for name in OPTIONAL:
+        if name not in df:
+            df[name] = pd.Series(pd.NA, index=df.index, dtype="str")
+    required = [c for c in COLUMNS if c not in OPTIONAL]
+    ints = df[INT_COLUMNS]
+    keep = df[required].notna().all(axis=1) & (ints == np.round(ints)).all(axis=1)
+    df = df.loc[keep, COLUMNS].astype({c: "int64" for c in INT_COLUMNS})
+    return df, int((~keep).sum())
+
+
+STEPS = (impute_int_rate, filter_age, clip_amount, rename, clip_emp_length, impute_emp_length, types)
+
+
+def clean(df, params=None):
+    """Run every step over raw rows `df`: `(cleaned, params, timings)`.
+
+    Without `params` the statistics are fitted on `df`, as a full rebuild does;
+    `timings` lists one `{"step", "rows", "changed", "seconds"}` dict per step,
+    `rows` counting the rows left after it.
+    """
+    fit = params is None
+    params = {} if fit else dict(params)
+    df = df.copy()
+    timings = []
+    for step in STEPS:
+        t0 = time.perf_counter()
+        df, changed = step(df, params, fit)
+        timings.append({"step": step.__name__, "rows": len(df), "changed": changed,
+                        "seconds": time.perf_counter() - t0})
+    return df.reset_index(drop=True), params, timings
+
+
+# ── Raw rows ────────────────────────────────────────────────────────────────
+
+def parse_raw(data, header=None):
+    """Raw CSV bytes to a frame, numeric columns as float64.
+
+    `header` names the columns of headerless bytes (a tail of the raw file).
+    """
+    import pandas as pd
+
+    names = dict(header=None, names=header) if header else {}
+    df = pd.read_csv(io.BytesIO(data), **names)
+    return df.astype({c: "float64" for c in RAW_NUMERIC if c in df})
+
+
+def row_hashes(df):
+    """Content hash (uint64) of every raw row; equal rows hash equally whatever
+    the chunk or file layout they were read from."""
+    import pandas as pd
+
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def _count(keys, values, counts):
+    """Occurrences of each of `keys` in the multiset given by sorted `values` and their `counts`."""
+    if not len(values):
+        return np.zeros(len(keys), dtype=np.intp)
+    pos = np.searchsorted(values, keys).clip(max=len(values) - 1)
+    return np.where(values[pos] == keys, counts[pos], 0)
+
+
+def unseen(hashes, seen):
+    """Mask of the rows of `hashes` beyond those in the multiset `seen`.
+
+    The k-th occurrence of a hash is new once `seen` holds fewer than k of it.
+    Returns `(new, missing)`, `missing` counting `seen` rows no longer present.
+    """
+    order = np.argsort(hashes, kind="stable")
+    ordered = hashes[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    sizes = np.diff(np.r_[starts, len(hashes)])
+    rank = np.empty(len(hashes), dtype=np.intp)
+    rank[order] = np.arange(len(hashes)) - np.repeat(starts, sizes)
+
+    values, counts = np.unique(seen, return_counts=True)
+    new = rank >= _count(hashes, values, counts)
+    missing = counts - _count(values, ordered[starts], sizes)
+    return new, int(np.maximum(missing, 0).sum())
+
+
+def _complete(data):
+    """Length of `data` up to and including its last newline: a row still being
+    written at the end of the raw file waits for the next run."""
+    return data.rfind(b"\n") + 1
+
+
+# ── State ───────────────────────────────────────────────────────────────────
+
+def state_path(cleaned):
+    return os.path.splitext(cleaned)[0] + ".state.npz"
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta.get("version") != STATE_VERSION:
+            raise ValueError(f"{path}: unsupported state version {meta.get('version')}")
+        meta["hashes"] = data["hashes"]
+    return meta
+
+
+def save_state(path, state):
+    meta = {k: v for k, v in state.items() if k != "hashes"}
+    tmp = f"{path}.tmp-{os.getpid()}.npz"
+    np.savez(tmp, meta=np.array(json.dumps({"version": STATE_VERSION, **meta}, sort_keys=True)),
+             hashes=np.asarray(state["hashes"], dtype=np.uint64))
+    os.replace(tmp, path)
+
+
+def parquet_copy(cleaned):
+    """The typed Parquet copy next to the cleaned CSV, if there is one."""
+    stem = os.path.splitext(cleaned)[0]
+    return next((stem + ext for ext in PARQUET if os.path.exists(stem + ext)), None)
+
+
+# ── Pipeline ────────────────────────────────────────────────────────────────
+
+class _Clock:
+    """Collects the per-step report: reading and writing around the cleaning steps."""
+
+    def __init__(self):
+        self.timings = []
+
+    def lap(self, step, t0, rows, changed=0):
+        self.timings.append({"step": step, "rows": rows, "changed": changed,
+                             "seconds": time.perf_counter() - t0})
+        return time.perf_counter()
+
+
+def _read_raw(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return data[:_complete(data)]
+
+
+def _write_csv(df, path, header):
+    with open(path, "ab" if not header else "wb") as f:
+        df.to_csv(f, header=header, index=False)
+        return f.tell()
+
+
+def rebuild(raw=RAW, cleaned=CLEANED, params=None, force=False):
+    """Clean every raw row into a new `cleaned` file; returns the run summary.
+
+    The statistics are refitted unless `params` are given. An existing cleaned
+    file with values in a column the raw file lacks (`loan_grade` from the
+    Kaggle data) is only replaced with `force`: those values would be lost.
+    """
+    import pandas  # noqa: F401  (imported before the clock starts)
+
+    clock = _Clock()
+    t = time.perf_counter()
+    data = _read_raw(raw)
+    df = parse_raw(data)
+    lost = [c for c in OPTIONAL if c not in df] if os.path.exists(cleaned) and not force else []
+    lost = [c for c in lost if read_cleaned(cleaned)[c].notna().any()]
+    if lost:
+        raise ValueError(f"{raw} has no {', '.join(lost)} column; rebuilding would empty it in "
+                         f"{cleaned} (use --force to rebuild anyway)")
+    t = clock.lap("read", t, len(df))
+    hashes = row_hashes(df)
+    t = clock.lap("hash", t, len(df))
+    out, params, steps = clean(df, params)
+    clock.timings += steps
+    t = time.perf_counter()
+    cleaned_bytes = _write_csv(out, cleaned, header=True)
+    pq = parquet_copy(cleaned)
+    if pq:
+        write_table(out, pq)
+    t = clock.lap("write", t, len(out), len(out))
+    save_state(state_path(cleaned), {
+        "params": params, "raw_bytes": len(data), "raw_sha256": hashlib.sha256(data).hexdigest(),
+        "raw_columns": list(df.columns), "cleaned_bytes": cleaned_bytes, "cleaned_rows": len(out),
+        "hashes": hashes})
+    clock.lap("state", t, len(out))
+    return {"mode": "rebuild", "new_rows": len(df), "appended": len(out), "params": params,
+            "timings": clock.timings}
+
+
+def adopt(raw=RAW, cleaned=CLEANED):
+    """Start tracking an existing cleaned file built from `raw` by the notebook.
+
+    The statistics are fitted on all raw rows; the result must equal `cleaned`
+    on every column the raw file has, or nothing is recorded.
+    """
+    import pandas  # noqa: F401  (imported before the clock starts)
+
+    clock = _Clock()
+    t = time.perf_counter()
+    data = _read_raw(raw)
+    df = parse_raw(data)
+    t = clock.lap("read", t, len(df))
+    hashes = row_hashes(df)
+    t = clock.lap("hash", t, len(df))
+    out, params, steps = clean(df)
+    clock.timings += steps
+    t = time.perf_counter()
+    problems = compare(out, read_cleaned(cleaned), raw_columns(df.columns))
+    if problems:
+        raise ValueError(f"{cleaned} does not match the cleaned raw rows ({'; '.join(problems)}); "
+                         f"run with --rebuild to replace it")
+    t = clock.lap("compare", t, len(out))
+    save_state(state_path(cleaned), {
+        "params": params, "raw_bytes": len(data), "raw_sha256": hashlib.sha256(data).hexdigest(),
+        "raw_columns": list(df.columns), "cleaned_bytes": os.path.getsize(cleaned),
+        "cleaned_rows": len(out), "hashes": hashes})
+    clock.lap("state", t, len(out))
+    return {"mode": "adopt", "new_rows": len(df), "appended": 0, "params": params,
+            "timings": clock.timings}
+
+
+def update(raw=RAW, cleaned=CLEANED):
+    """Clean the raw rows not processed yet and append them to `cleaned`.
+
+    The first run adopts an existing cleaned file (or builds one); returns the
+    run summary with per-step `timings`.
+    """
+    state = load_state(state_path(cleaned))
+    if state is None:
+        return adopt(raw, cleaned) if os.path.exists(cleaned) else rebuild(raw, cleaned)
+    import pandas as pd
+
+    clock = _Clock()
+    t = time.perf_counter()
+    size = os.path.getsize(cleaned)
+    if size < state["cleaned_bytes"]:
+        raise ValueError(f"{cleaned} is shorter than when it was last written; run with --rebuild")
+    if size > state["cleaned_bytes"]:
+        # Rows of a run that stopped before recording them.
+        with open(cleaned, "r+b") as f:
+            f.truncate(state["cleaned_bytes"])
+
+    with open(raw, "rb") as f:
+        prefix = f.read(state["raw_bytes"])
+        digest = hashlib.sha256(prefix)
+        if len(prefix) == state["raw_bytes"] and digest.hexdigest() == state["raw_sha256"]:
+            tail = f.read()
+            tail = tail[:_complete(tail)]
+            digest.update(tail)
+            df = parse_raw(tail or _header(state), state["raw_columns"] if tail else None)
+            mode, raw_bytes = "append", len(prefix) + len(tail)
+        else:
+            data = prefix + f.read()
+            data = data[:_complete(data)]
+            digest = hashlib.sha256(data)
+            df = parse_raw(data)
+            mode, raw_bytes = "rescan", len(data)
+    t = clock.lap("read", t, len(df))
+
+    hashes = row_hashes(df)
+    if mode == "rescan":
+        if list(df.columns) != state["raw_columns"]:
+            raise ValueError(f"{raw} columns changed from {state['raw_columns']}; run with --rebuild")
+        new, missing = unseen(hashes, state["hashes"])
+        if missing:
+            raise ValueError(f"{missing:,} raw rows cleaned earlier were changed or removed "
+                             f"from {raw}; run with --rebuild")
+        df, hashes = df[new], hashes[new]
+    t = clock.lap("hash", t, len(df))
+
+    out, _, steps = clean(df, state["params"])
+    clock.timings += steps
+    t = time.perf_counter()
+    cleaned_bytes = _write_csv(out, cleaned, header=False) if len(out) else state["cleaned_bytes"]
+    pq = parquet_copy(cleaned)
+    if pq:
+        _refresh_parquet(pq, cleaned, state["cleaned_rows"], out)
+    t = clock.lap("write", t, len(out), len(out))
+
+    state.update(raw_bytes=raw_bytes, raw_sha256=digest.hexdigest(), cleaned_bytes=cleaned_bytes,
+                 cleaned_rows=state["cleaned_rows"] + len(out),
+                 hashes=np.concatenate([state["hashes"], hashes]))
+    save_state(state_path(cleaned), state)
+    clock.lap("state", t, state["cleaned_rows"])
+    return {"mode": mode, "new_rows": len(df), "appended": len(out), "params": state["params"],
+            "timings": clock.timings}
+
+
+def _refresh_parquet(pq, cleaned, rows, out):
+    """Bring the Parquet copy of `cleaned` up to date: its first `rows` rows
+    (more are left by an interrupted run) plus `out`."""
+    import pandas as pd
+
+    copy = read_table(pq)
+    if len(copy) < rows:
+        write_table(read_cleaned(cleaned), pq)
+    elif len(copy) > rows or len(out):
+        write_table(pd.concat([copy.iloc[:rows], out], ignore_index=True), pq)
+
+
+def _header(state):
+    return (",".join(state["raw_columns"]) + "\n").encode()
+
+
+# ── Verification ────────────────────────────────────────────────────────────
+
+def read_cleaned(path):
+    import pandas as pd
+    return pd.read_csv(path, dtype={c: "float64" for c in FLOAT_COLUMNS})
+
+
+def raw_columns(columns):
+    """Cleaned columns that come from raw columns named `columns`."""
+    renamed = {COLUMN_ALIASES.get(c, c) for c in columns}
+    return [c for c in COLUMNS if c in renamed]
+
+
+def compare(expected, actual, columns):
+    """Differences between two cleaned frames on `columns`, as messages."""
+    if len(expected) != len(actual):
+        return [f"{len(actual):,} rows, expected {len(expected):,}"]
+    problems = []
+    for col in columns:
+        if col not in actual:
+            problems.append(f"no {col} column")
+            continue
+        a, b = expected[col].reset_index(drop=True), actual[col].reset_index(drop=True)
+        same = (a == b) | (a.isna() & b.isna())
+        if not same.all():
+            problems.append(f"{col} differs in {int((~same).sum()):,} rows")
+    return problems
+
+
+def verify(raw=RAW, cleaned=CLEANED):
+    """Problems found comparing `cleaned` with a full rebuild from `raw`.
+
+    The rebuild uses the recorded statistics. Also reports how refitting on
+    the current raw file would move them, under `drift`.
+    """
+    state = load_state(state_path(cleaned))
+    if state is None:
+        return {"problems": [f"no cleaning state for {cleaned}; run an update first"], "drift": {}}
+    df = parse_raw(_read_raw(raw))
+    expected, _, _ = clean(df, state["params"])
+    problems = compare(expected, read_cleaned(cleaned), raw_columns(df.columns))
+    if not np.array_equal(row_hashes(df), state["hashes"]):
+        problems.append("recorded row hashes differ from the raw file's rows")
+    pq = parquet_copy(cleaned)
+    if pq:
+        copy = read_table(pq)
+        copy = copy.astype({c: str(expected[c].dtype) for c in copy.columns
+                            if str(copy[c].dtype) == "category" and c in expected})
+        problems += [f"{os.path.basename(pq)}: {p}"
+                     for p in compare(expected, copy, raw_columns(df.columns))]
+    refit = clean(df)[1]
+    drift = {k: (v, refit[k]) for k, v in state["params"].items() if refit[k] != v}
+    return {"problems": problems, "drift": drift, "rows": len(expected)}
+
+
+def _report(summary, file=sys.stderr):
+    print(f"{'step':<18} {'rows':>10} {'changed':>9} {'time':>10}", file=file)
+    for t in summary["timings"]:
+        print(f"{t['step']:<18} {t['rows']:>10,} {t['changed']:>9,} {t['seconds'] * 1e3:>8.1f}ms", file=file)
+    print(f"{'total':<18} {'':>10} {'':>9} {sum(t['seconds'] for t in summary['timings']) * 1e3:>8.1f}ms",
+          file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean newly arrived raw applications into the cleaned dataset.")
+    parser.add_argument("--raw", default=RAW, help="raw applications CSV, appended to over time")
+    parser.add_argument("--cleaned", default=CLEANED, help="cleaned dataset CSV to append to")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rebuild", action="store_true",
+                      help="refit the statistics and re-clean every raw row")
+    mode.add_argument("--verify", action="store_true",
+                      help="compare the cleaned file with a full rebuild; exit 1 on differences")
+    parser.add_argument("--force", action="store_true",
+                        help="with --rebuild, replace a cleaned file even if columns missing from raw lose their values")
+    parser.add_argument("--quiet", action="store_true", help="no per-step table")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.verify:
+            result = verify(args.raw, args.cleaned)
+            for problem in result["problems"]:
+                print(f"FAIL  {problem}")
+            for name, (kept, refit) in result["drift"].items():
+                print(f"note  {name}: {kept:g} recorded, {refit:g} if refitted on the current raw file")
+            if result["problems"]:
+                raise SystemExit(1)
+            print(f"ok: {args.cleaned} matches a full rebuild ({result['rows']:,} rows)")
+            return
+        if args.rebuild:
+            summary = rebuild(args.raw, args.cleaned, force=args.force)
+        else:
+            summary = update(args.raw, args.cleaned)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"cleaning failed: {e}")
+    if not args.quiet:
+        _report(summary)
+    print(f"{summary['mode']}: {summary['new_rows']:,} new raw rows, {summary['appended']:,} "
+          f"cleaned rows written -> {args.cleaned}")
+
+
+if __name__ == "__main__":
+    main()
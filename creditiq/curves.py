@@ -0,0 +1,224 @@
+"""Test-set metrics at any decision threshold, from precomputed counts.
+
+Training stores, per model, the distinct test-set default probabilities in
+ascending order and, for each one, how many defaults (TP) and good loans
+(FP) score at or above it. Predicting default at `prob >= t` then flags
+exactly the applicants at or above the first stored score `>= t`, so one
+binary search gives the confusion matrix at `t`, and precision, recall, F1
+and accuracy follow from its four cells. Neither the model nor the dataset
+is touched.
+
+    curve = ThresholdCurve.from_dict(package["dt_metrics"]["threshold_curve"])
+    curve.metrics(0.42)     # same keys as dt_metrics: confusion_matrix, class_metrics, ...
+
+The same counts give the ROC and precision-recall curves. `roc()` and `pr()`
+thin them to at most `CURVE_POINTS` points, spaced evenly along the curve,
+which is what the package stores for plotting (`roc_curve`, `pr_curve`).
+
+Packages trained before the curves existed can be updated in place, or get
+them while being converted to an artifact; the test split is rebuilt from
+the cleaned dataset exactly as training does:
+
+    python -m creditiq.curves add model_artifact
+    python -m creditiq.artifact convert dt_model.pkl model_artifact --curves --force
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+CLASS_LABELS = ["Good Loan (0)", "Default (1)"]
+METRIC_KEYS  = {"dt": "dt_metrics", "lr": "lr_metrics"}
+CURVE_POINTS = 300
+
+
+def _thin(x, y, max_points):
+    """Indices of at most `max_points` points spaced evenly by path length, endpoints kept."""
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    path = np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))])
+    idx  = np.searchsorted(path, np.linspace(0.0, path[-1], max_points))
+    return np.unique(np.concatenate([[0], np.minimum(idx, len(x) - 1), [len(x) - 1]]))
+
+
+class ThresholdCurve:
+    """Cumulative TP/FP counts over the sorted distinct scores of one model.
+
+    `tp[i]` / `fp[i]` count defaults / good loans scoring `>= scores[i]`;
+    one trailing zero stands for thresholds above every score.
+    """
+
+    def __init__(self, scores, tp, fp):
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.tp     = np.asarray(tp, dtype=np.int64)
+        self.fp     = np.asarray(fp, dtype=np.int64)
+        if not (len(self.tp) == len(self.fp) == len(self.scores) + 1):
+            raise ValueError("tp and fp need one entry per score plus a trailing zero")
+        self.positives, self.negatives = int(self.tp[0]), int(self.fp[0])
+
+    @classmethod
+    def from_scores(cls, y_true, prob):
+        y_true, prob = np.asarray(y_true), np.asarray(prob, dtype=np.float64)
+        scores, inverse = np.unique(prob, return_inverse=True)
+        pos = np.bincount(inverse, weights=y_true == 1, minlength=len(scores))
+        neg = np.bincount(inverse, weights=y_true != 1, minlength=len(scores))
+        # Suffix sums: counts at or above each score, then the empty tail.
+        tp = np.append(np.cumsum(pos[::-1])[::-1], 0).astype(np.int64)
+        fp = np.append(np.cumsum(neg[::-1])[::-1], 0).astype(np.int64)
+        return cls(scores, tp, fp)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["scores"], d["tp"], d["fp"])
+
+    def to_dict(self):
+        return {"scores": self.scores.tolist(), "tp": self.tp.tolist(), "fp": self.fp.tolist()}
+
+    def roc(self, max_points=CURVE_POINTS):
+        """`{"fpr", "tpr", "thresholds", "auc"}`; the first point is the (0, 0) corner.
+
+        `auc` is the trapezoidal area under the full-resolution curve, which
+        equals `roc_auc_score`.
+        """
+        fpr = self.fp[::-1] / max(self.negatives, 1)
+        tpr = self.tp[::-1] / max(self.positives, 1)
+        thresholds = np.append(np.inf, self.scores[::-1])
+        keep = _thin(fpr, tpr, max_points)
+        return {"fpr": fpr[keep].tolist(), "tpr": tpr[keep].tolist(),
+                "thresholds": thresholds[keep].tolist(),
+                "auc": float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))}
+
+    def pr(self, max_points=CURVE_POINTS):
+        """`{"precision", "recall", "thresholds", "average_precision"}`, from recall 0 up.
+
+        `average_precision` is the step-wise sum of `average_precision_score`,
+        taken over the full-resolution curve.
+        """
+        tp, fp = self.tp[-2::-1], self.fp[-2::-1]      # descending thresholds, at least one flagged
+        precision = np.append(1.0, tp / (tp + fp))
+        recall    = np.append(0.0, tp / max(self.positives, 1))
+        thresholds = np.append(np.inf, self.scores[::-1])
+        keep = _thin(recall, precision, max_points)
+        ap = float(np.sum(np.diff(recall) * precision[1:]))
+        return {"precision": precision[keep].tolist(), "recall": recall[keep].tolist(),
+                "thresholds": thresholds[keep].tolist(), "average_precision": ap}
+
+    def confusion_matrix(self, threshold):
+        """`[[TN, FP], [FN, TP]]` when predicting default at `prob >= threshold`."""
+        i  = int(np.searchsorted(self.scores, threshold, side="left"))
+        tp, fp = int(self.tp[i]), int(self.fp[i])
+        return [[self.negatives - fp, fp], [self.positives - tp, tp]]
+
+    def metrics(self, threshold):
+        """The threshold-dependent entries of a model's metrics block at `threshold`.
+
+        Computed as `classification_report(..., output_dict=True)` does, with
+        0 for undefined ratios.
+        """
+        (tn, fp), (fn, tp) = self.confusion_matrix(threshold)
+        tp_sum   = np.array([tn, tp], dtype=np.float64)
+        pred_sum = np.array([tn + fn, tp + fp], dtype=np.float64)
+        true_sum = np.array([tn + fp, tp + fn], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.nan_to_num(tp_sum / pred_sum)
+            recall    = np.nan_to_num(tp_sum / true_sum)
+            f1        = np.nan_to_num(2 * tp_sum / (true_sum + pred_sum))
+
+        def avg(weights):
+            return {"precision": float(np.average(precision, weights=weights)),
+                    "recall":    float(np.average(recall, weights=weights)),
+                    "f1_score":  float(np.average(f1, weights=weights))}
+
+        return {
+            "test_accuracy":    (tn + tp) / (self.positives + self.negatives),
+            "threshold":        float(threshold),
+            "confusion_matrix": [[tn, fp], [fn, tp]],
+            "class_metrics":    {label: {"precision": float(precision[k]), "recall": float(recall[k]),
+                                         "f1_score": float(f1[k]), "support": int(true_sum[k])}
+                                 for k, label in enumerate(CLASS_LABELS)},
+            "macro_avg":        avg(None),
+            "weighted_avg":     avg(true_sum),
+        }
+
+
+def curve_metrics(y_true, prob):
+    """The stored curve entries of a model's metrics block."""
+    curve = ThresholdCurve.from_scores(y_true, prob)
+    return {"threshold_curve": curve.to_dict(), "roc_curve": curve.roc(), "pr_curve": curve.pr()}
+
+
+def package_curve(package, model):
+    """The stored `ThresholdCurve` of `model` ("dt" or "lr"), or None."""
+    d = (package.get(METRIC_KEYS[model]) or {}).get("threshold_curve")
+    return ThresholdCurve.from_dict(d) if d else None
+
+
+def test_scores(package, data_path=None):
+    """`(y_test, {model: probabilities})` for the package's models on the training test split."""
+    from .scoring import CreditScorer
+    from .train import DATA, StageCache, prepare, resolve
+    p = resolve()
+    _, _, _, (_, X_test, _, y_test) = prepare(data_path or DATA, p, StageCache(None))
+    scorer = CreditScorer(package)
+    X_test = X_test[scorer.feature_columns].to_numpy(dtype=np.float64)
+    return y_test.to_numpy(), {k: scorer.fused[k].predict_proba(np.asfortranarray(X_test))[:, 1]
+                               for k in METRIC_KEYS}
+
+
+def package_curves(package, data_path=None):
+    """`{model: curve entries}` for `package`, checked against its stored confusion matrices."""
+    y_test, probs = test_scores(package, data_path)
+    entries = {k: curve_metrics(y_test, probs[k]) for k in METRIC_KEYS}
+    for k, e in entries.items():
+        stored = (package.get(METRIC_KEYS[k]) or {}).get("confusion_matrix")
+        threshold = package.get(f"{k}_threshold", 0.35)
+        if stored and ThresholdCurve.from_dict(e["threshold_curve"]).confusion_matrix(threshold) != stored:
+            raise ValueError(f"{k} test-set scores do not reproduce the stored confusion matrix; "
+                             "was the package trained on a different dataset?")
+    return entries
+
+
+def add_curves(path, data_path=None):
+    """Store threshold, ROC and PR curves in the package at `path` (artifact directory or pickle)."""
+    from .artifact import METRICS, _json_default, is_artifact
+    from .scoring import load_package
+    package = load_package(path)
+    entries = package_curves(package, data_path)
+    curves  = {k: ThresholdCurve.from_dict(e["threshold_curve"]) for k, e in entries.items()}
+    if is_artifact(path):
+        metrics_path = os.path.join(path, METRICS)
+        with open(metrics_path) as f:
+            metrics = json.load(f)
+        for k, key in METRIC_KEYS.items():
+            metrics.setdefault(key, {}).update(entries[k])
+        tmp = f"{metrics_path}.tmp-{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(metrics, f, indent=1, default=_json_default)
+        os.replace(tmp, metrics_path)
+    else:
+        from .train import save_package
+        for k, key in METRIC_KEYS.items():
+            package[key].update(entries[k])
+        save_package(package, path)
+    return curves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precomputed threshold curves for a model package.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    add = sub.add_parser("add", help="compute test-set threshold, ROC and PR curves and store them")
+    add.add_argument("path", help="artifact directory or pickled package")
+    add.add_argument("--data", default=None, help="cleaned dataset the package was trained on")
+    args = parser.parse_args(argv)
+    try:
+        curves = add_curves(args.path, args.data)
+    except (ValueError, KeyError) as e:
+        raise SystemExit(f"curves: {e}")
+    for k, curve in curves.items():
+        print(f"{k}: {len(curve.scores):,} distinct scores, {curve.positives:,} defaults, "
+              f"{curve.negatives:,} good loans")
+
+
+if __name__ == "__main__":
+    main()
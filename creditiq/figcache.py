@@ -0,0 +1,88 @@
+"""Rendered-figure cache shared by every session of one app process.
+
+    cache = FigureCache(max_entries=64)
+    png = cache.get((scorer.fingerprint, "importance", "dt"), lambda: draw_importance(...))
+    st.image(png)
+
+Figures are rendered once, saved as PNG (or SVG) bytes with the options
+`st.pyplot` uses, and served from memory until evicted. Keys start with the
+package fingerprint, so a new or rolled-back model version never sees
+another version's figures; stale entries simply age out of the LRU.
+
+matplotlib is not thread-safe, and Streamlit serves sessions from threads,
+so renders are serialized. A session waiting on a render of the same key
+gets the finished bytes instead of rendering again. Hits never wait for a
+render in progress.
+"""
+import io
+import threading
+import time
+from collections import OrderedDict
+
+# What st.pyplot passes to savefig.
+SAVEFIG = {"dpi": 200, "bbox_inches": "tight"}
+
+
+class FigureCache:
+    """LRU of rendered figure bytes, bounded by entry count and total size."""
+
+    def __init__(self, max_entries=64, max_bytes=64 << 20):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self._entries    = OrderedDict()     # key -> bytes, least recently used first
+        self._bytes      = 0
+        self._lock       = threading.Lock()  # guards _entries and the counters
+        self._render     = threading.Lock()  # one matplotlib render at a time
+        self.hits = self.misses = self.evictions = 0
+        self.render_s = 0.0
+
+    def _lookup(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def get(self, key, render, fmt="png"):
+        """Bytes of the figure for `key`, calling `render()` -> Figure only on a miss."""
+        key = (*key, fmt) if isinstance(key, tuple) else (key, fmt)
+        data = self._lookup(key)
+        if data is None:
+            with self._render:
+                data = self._lookup(key)     # rendered while we waited
+                if data is None:
+                    t0  = time.perf_counter()
+                    fig = render()
+                    buf = io.BytesIO()
+                    fig.savefig(buf, format=fmt, **SAVEFIG)
+                    data = buf.getvalue()
+                    elapsed = time.perf_counter() - t0
+                    with self._lock:
+                        self.misses   += 1
+                        self.render_s += elapsed
+                        self._insert(key, data)
+                    return data
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def _insert(self, key, data):
+        self._entries[key] = data
+        self._bytes += len(data)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= len(old)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "entries": len(self._entries), "bytes": self._bytes,
+                    "render_s": self.render_s}
@@ -0,0 +1,118 @@
+"""matplotlib figures of the Performance page, in the app's monochrome theme.
+
+matplotlib and seaborn are imported on the first render, not with this
+module, so pages and processes that never draw a figure never load them.
+Figures are built with the object-oriented `Figure` API rather than pyplot:
+no global figure registry, nothing to close, and safe to render from any
+thread (one at a time; see `creditiq.figcache`).
+"""
+from functools import cache
+
+import numpy as np
+
+
+@cache
+def _matplotlib():
+    # First figure render in this process: import matplotlib and apply the theme.
+    import matplotlib
+    from matplotlib.figure import Figure
+    matplotlib.rcParams.update({
+        "figure.facecolor": "#FFFFFF",
+        "axes.facecolor":   "#FFFFFF",
+        "axes.edgecolor":   "#CCCCCC",
+        "axes.labelcolor":  "#000000",
+        "xtick.color":      "#000000",
+        "ytick.color":      "#000000",
+        "text.color":       "#000000",
+        "grid.color":       "#F5F5F5",
+        "grid.linestyle":   "-",
+        "grid.alpha":       1.0,
+        "font.family":      "serif",
+        "font.size":        11,
+    })
+    return Figure
+
+
+def confusion_matrix_figure(cm, model_name):
+    Figure = _matplotlib()
+    import seaborn as sns
+    fig = Figure(figsize=(5, 4))
+    ax = fig.subplots()
+    cm_arr = np.array(cm)
+    total = cm_arr.sum()
+
+    # Normalize for color mapping (0 to 1)
+    cm_norm = cm_arr / cm_arr.max()
+
+    # Auto-contrast: white text on dark cells, black text on light
+    annot_colors = []
+    for row_idx in range(cm_arr.shape[0]):
+        row_colors = []
+        for col_idx in range(cm_arr.shape[1]):
+            intensity = cm_norm[row_idx, col_idx]
+            row_colors.append("#FFFFFF" if intensity > 0.55 else "#000000")
+        annot_colors.append(row_colors)
+
+    labels = np.array([[f"{v}\n({v/total*100:.1f}%)" for v in row] for row in cm_arr])
+
+    # Light grey scale: #F5F5F5 (light) to #555555 (dark)
+    from matplotlib.colors import LinearSegmentedColormap
+    cmap = LinearSegmentedColormap.from_list('bw', ['#F5F5F5', '#AAAAAA', '#555555'])
+
+    sns.heatmap(
+        cm_arr, annot=False, fmt="", cmap=cmap,
+        xticklabels=["Good Loan", "Default"],
+        yticklabels=["Good Loan", "Default"],
+        linewidths=3, linecolor="#FFFFFF",
+        cbar=False, ax=ax,
+    )
+
+    # Manually place text with auto-contrast colors
+    for row_idx in range(cm_arr.shape[0]):
+        for col_idx in range(cm_arr.shape[1]):
+            ax.text(col_idx + 0.5, row_idx + 0.5,
+                    labels[row_idx, col_idx],
+                    ha='center', va='center',
+                    fontsize=13, fontweight='bold',
+                    color=annot_colors[row_idx][col_idx])
+
+    ax.set_xlabel("Predicted", labelpad=12, fontsize=12, fontweight='bold')
+    ax.set_ylabel("Actual", labelpad=12, fontsize=12, fontweight='bold')
+    ax.set_title(f"{model_name} — Confusion Matrix",
+                fontsize=13, pad=14, color="#000000",
+                fontweight='bold', fontfamily='serif')
+    ax.tick_params(colors='#000000', labelsize=11)
+    fig.tight_layout()
+    return fig
+
+
+def importance_figure(fi, model_name):
+    sorted_fi = sorted(fi.items(), key=lambda x: x[1])
+    names  = [k for k, _ in sorted_fi]
+    scores = [v for _, v in sorted_fi]
+    max_score = max(scores) if scores else 1
+
+    # Monochrome grey scale for bars
+    grey_shades = [f'#{int(60 + (i/len(names))*120):02x}{int(60 + (i/len(names))*120):02x}{int(60 + (i/len(names))*120):02x}' for i in range(len(names))]
+
+    Figure = _matplotlib()
+    fig = Figure(figsize=(9, max(3.5, len(names)*0.42)))
+    ax = fig.subplots()
+    bars = ax.barh(names, scores, color=grey_shades, height=0.6, edgecolor="#CCCCCC", linewidth=0.5)
+    for bar, score in zip(bars, scores):
+        ax.text(score + max_score*0.008, bar.get_y() + bar.get_height()/2,
+                f"{score:.4f}", va="center", fontsize=9,
+                color="#000000", fontfamily="monospace", fontweight="bold")
+    ax.set_xlabel("Importance Score", fontsize=11, fontweight="bold")
+    ax.set_title(f"{model_name} — Feature Importance",
+                fontsize=13, pad=14, color="#000000",
+                fontweight="bold", fontfamily="serif")
+    ax.set_xlim(0, max_score * 1.18)
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.spines["bottom"].set_color("#CCCCCC")
+    ax.spines["left"].set_color("#CCCCCC")
+    ax.grid(axis="x", color="#F5F5F5")
+    ax.tick_params(colors="#000000")
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,184 @@
+"""Scaler-free ("fused") models.
+
+Both models in the package were trained on `StandardScaler` output. The scaler
+is affine, so it can be folded into the models themselves and raw encoded
+features can go straight in — no scaling pass, no scaled copy of the matrix:
+
+* logistic regression: ``w' = w / scale`` and ``b' = b - sum(w * mean / scale)``;
+* decision tree: each split ``float32((x - mean) / scale) <= t`` is a monotone
+  condition on the raw value ``x``, so it is exactly ``x <= T`` for a single
+  raw threshold ``T``, found by bisection over the float64 values.
+
+Fused trees return bit-identical probabilities. Fused logistic regression only
+differs by floating-point reassociation (around 1e-16);
+`scripts/check_fused.py` verifies both against the package pipeline on the
+full cleaned dataset.
+
+    python -m creditiq.fused dt_model.pkl fused_model.npz      # export step
+"""
+import argparse
+
+import numpy as np
+
+from .tree import ARRAY_FIELDS, OPTIONAL_FIELDS, CompiledTree
+
+_SIGN = np.uint64(1 << 63)
+
+
+class FusedLinear:
+    """Binary logistic regression over raw (unscaled) features."""
+
+    def __init__(self, coef, intercept):
+        self.coef      = np.ascontiguousarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(np.ravel(intercept)[0])
+
+    @classmethod
+    def from_sklearn(cls, clf, mean=0.0, scale=1.0):
+        """Fold `(x - mean) / scale` into a fitted binary `LogisticRegression`."""
+        coef = np.asarray(clf.coef_, dtype=np.float64).ravel()
+        mean, scale = _broadcast(mean, scale, len(coef))
+        w = coef / scale
+        return cls(w, float(clf.intercept_[0]) - float(np.dot(w, mean)))
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict_proba(self, X):
+        z = self.decision_function(X)
+        with np.errstate(over="ignore"):
+            p = 1.0 / (1.0 + np.exp(-z))
+        return np.stack([1 - p, p], axis=1)
+
+    def contributions(self, X, mean=0.0):
+        """Per-feature terms of the decision function: `(bias, T)` with
+        `bias + T.sum(axis=1) == decision_function(X)` up to rounding.
+
+        Terms are centred on `mean`. With the scaler's mean they are the original
+        model's `coef × scaled value` and `bias` its intercept.
+        """
+        mean = np.broadcast_to(np.asarray(mean, dtype=np.float64), len(self.coef))
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        T = np.subtract(X, mean)
+        T *= self.coef                      # in place: a second temporary costs more than the math
+        return self.intercept + float(np.dot(self.coef, mean)), T
+
+    def to_arrays(self):
+        return {"coef": self.coef, "intercept": np.array([self.intercept])}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["coef"], arrays["intercept"])
+
+
+def _broadcast(mean, scale, n):
+    return (np.broadcast_to(np.asarray(mean, dtype=np.float64), n),
+            np.broadcast_to(np.asarray(scale, dtype=np.float64), n))
+
+
+def _to_key(x):
+    """Order-preserving map from float64 to uint64."""
+    bits = np.asarray(x, dtype=np.float64).view(np.uint64)
+    return np.where(bits & _SIGN, ~bits, bits | _SIGN)
+
+
+def _from_key(key):
+    return np.where(key & _SIGN, key & ~_SIGN, ~key).view(np.float64)
+
+
+def raw_thresholds(threshold, mean, scale):
+    """Largest raw float64 `T` per split with `x <= T` ⇔ `float32((x - mean) / scale) <= threshold`.
+
+    That is the exact condition sklearn evaluates on scaled features, so a tree
+    using these thresholds on raw inputs takes the same path for every input.
+    Thresholds of `inf` (leaves) are kept as they are.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+
+    def goes_left(x):
+        with np.errstate(over="ignore", invalid="ignore"):
+            return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    big = np.finfo(np.float64).max
+    lo  = np.full(threshold.shape, _to_key(-big))
+    hi  = np.full(threshold.shape, _to_key(big))
+    # Invariant: goes_left(lo) and not goes_left(hi); 64 halvings close any gap.
+    all_left  = goes_left(np.full(threshold.shape, big))
+    none_left = ~goes_left(np.full(threshold.shape, -big))
+    active = ~(all_left | none_left)
+    for _ in range(64):
+        if not active.any():
+            break
+        mid  = lo + (hi - lo) // np.uint64(2)
+        left = goes_left(_from_key(mid))
+        lo   = np.where(active & left, mid, lo)
+        hi   = np.where(active & ~left, mid, hi)
+        active &= hi - lo > np.uint64(1)
+
+    raw = _from_key(lo)
+    raw[all_left]  = big
+    raw[none_left] = -np.inf
+    raw[np.isinf(threshold) & (threshold > 0)] = np.inf
+    return raw
+
+
+def fuse_tree(tree, mean=0.0, scale=1.0):
+    """`CompiledTree` trained on scaled features → one that takes raw features."""
+    mean, scale = _broadcast(mean, scale, tree.n_features)
+    threshold = raw_thresholds(tree.threshold, mean[tree.feature], scale[tree.feature])
+    return CompiledTree(tree.feature, threshold, tree.children, tree.missing_left,
+                        tree.leaf_proba, input_dtype=np.float64, cover=tree.cover)
+
+
+def scaler_stats(scaler):
+    """`(mean, scale)` that `scaler.transform` applies, honouring with_mean/with_std."""
+    mean  = scaler.mean_ if getattr(scaler, "with_mean", True) else 0.0
+    scale = scaler.scale_ if getattr(scaler, "with_std", True) else 1.0
+    return mean, scale
+
+
+def fuse_package(package):
+    """Fused `{"dt": CompiledTree, "lr": FusedLinear}` for a pickled model package."""
+    mean, scale = scaler_stats(package["scaler"])
+    return {
+        "dt": fuse_tree(CompiledTree.from_sklearn(package["model"]), mean, scale),
+        "lr": FusedLinear.from_sklearn(package["lr_model"], mean, scale),
+    }
+
+
+# ── Persistence ───────────────────────────────────────────────────────────────
+def save(path, models):
+    arrays = {f"{key}_{name}": value for key, model in models.items()
+              for name, value in model.to_arrays().items()}
+    np.savez(path, **arrays)
+
+
+def load(path):
+    with np.load(path) as data:
+        return {
+            "dt": CompiledTree.from_arrays({f: data[f"dt_{f}"] for f in ARRAY_FIELDS + OPTIONAL_FIELDS
+                                            if f"dt_{f}" in data}, input_dtype=np.float64),
+            "lr": FusedLinear.from_arrays({f: data[f"lr_{f}"] for f in ("coef", "intercept")}),
+        }
+
+
+def main(argv=None):
+    from .scoring import load_package
+
+    parser = argparse.ArgumentParser(description="Export scaler-free versions of the package's models.")
+    parser.add_argument("package", help="model package, e.g. dt_model.pkl")
+    parser.add_argument("output", help="destination .npz")
+    args = parser.parse_args(argv)
+
+    package = load_package(args.package)
+    if package is None:
+        parser.error(f"model package not found: {args.package}")
+    models = fuse_package(package)
+    save(args.output, models)
+    print(f"Exported fused tree ({len(models['dt'].feature)} nodes) and "
+          f"logistic regression ({len(models['lr'].coef)} coefficients) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
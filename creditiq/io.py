@@ -0,0 +1,387 @@
+"""Columnar (Parquet / Arrow) and CSV table I/O.
+
+    python -m creditiq.io convert data/cleaned/cleaned_credit_risk.csv data/cleaned/cleaned_credit_risk.parquet
+
+The format follows the file extension: `.parquet`/`.pq` is Parquet,
+`.feather`/`.arrow`/`.ipc` is the Arrow IPC file format, anything else is
+CSV. Tables are written typed (`typed`): categoricals become
+dictionary-encoded columns and integers are downcast to the narrowest type
+that holds the column, so a Parquet copy of the cleaned dataset loads in a
+fraction of the CSV's time and memory.
+
+Reads take `columns` (projection: only those columns are decoded) and
+`filters` in pyarrow's form, e.g. `[("loan_intent", "==", "EDUCATION"),
+("loan_amnt($)", ">", 10000)]`. For Parquet the filters are pushed down to
+skip row groups using their statistics; for CSV they are applied after
+parsing, with the same results.
+
+pyarrow ships with streamlit; CSV works without it.
+"""
+import argparse
+import operator
+import os
+
+import numpy as np
+
+from .scoring import COLUMN_ALIASES, MODEL_KEYS
+
+PARQUET = (".parquet", ".pq")
+ARROW   = (".feather", ".arrow", ".ipc")
+COMPRESSED = (".gz", ".bz2", ".zip", ".xz", ".zst")
+
+# Storage types of the cleaned dataset's columns (raw-dataset names share them).
+# Integer widths cover the raw data too: ages up to 144, incomes up to 6M.
+SCHEMA = {
+    "person_age":                 "int16",
+    "person_income($)":           "int32",
+    "person_home_ownership":      "category",
+    "person_emp_length":          "float64",
+    "loan_intent":                "category",
+    "loan_grade":                 "category",
+    "loan_amnt($)":               "int32",
+    "loan_int_rate":              "float64",
+    "loan_status":                "int8",
+    "loan_percent_income":        "float64",
+    "cb_person_default_on_file":  "category",
+    "cb_person_cred_hist_length": "int16",
+}
+SCHEMA.update({raw: SCHEMA[clean] for raw, clean in COLUMN_ALIASES.items()})
+# ...and of the columns `CreditScorer.score` adds.
+SCHEMA.update({"derived_grade": "category", "model_version": "category"})
+for _key in MODEL_KEYS:
+    SCHEMA.update({f"{_key}_default_prob": "float64", f"{_key}_pred": "int8",
+                   f"{_key}_risk_level": "category"})
+# Score columns that hold None for unscored rows, and their nullable types.
+NULLABLE = {f"{_key}_pred": "Int8" for _key in MODEL_KEYS}
+# String columns with at most this many distinct values (and fewer than half
+# the rows) are dictionary-encoded when no type is known for them.
+MAX_CATEGORIES = 1024
+
+_OPS = {"==": operator.eq, "=": operator.eq, "!=": operator.ne, "<": operator.lt,
+        "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def file_format(path):
+    """"parquet", "arrow" or "csv" from the file name."""
+    name = str(path).lower()
+    if name.endswith(PARQUET):
+        return "parquet"
+    if name.endswith(ARROW):
+        return "arrow"
+    return "csv"
+
+
+# ── Typing ────────────────────────────────────────────────────────────────────
+def typed(df, infer=True):
+    """Copy of `df` with compact storage types.
+
+    Known columns get their `SCHEMA` type when their values fit it. With
+    `infer`, other integer columns are downcast and low-cardinality string
+    columns become categoricals; streaming writers pass `infer=False` so
+    every chunk gets the same types. Floats are never narrowed: the models
+    score float64 inputs.
+    """
+    import pandas as pd
+
+    out = {}
+    for col in df.columns:
+        s, want = df[col], SCHEMA.get(col)
+        if want == "category" or (want is None and infer and _is_string(s) and _few_levels(s)):
+            s = s.astype("category")
+        elif want is not None and want.startswith("int") and pd.api.types.is_integer_dtype(s) \
+                and len(s) and _fits(s, np.dtype(want)):
+            s = s.astype(want)
+        elif col in NULLABLE and s.dtype == object:
+            # Decisions of unscored rows are None: same storage type, with nulls.
+            s = s.astype(NULLABLE[col])
+        elif want is None and infer and pd.api.types.is_integer_dtype(s) and not _is_bool(s):
+            s = pd.to_numeric(s, downcast="integer")
+        out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def _is_string(s):
+    import pandas as pd
+    return pd.api.types.is_string_dtype(s) or s.dtype == object
+
+
+def _is_bool(s):
+    import pandas as pd
+    return pd.api.types.is_bool_dtype(s)
+
+
+def _few_levels(s):
+    n = s.nunique(dropna=True)
+    return n <= MAX_CATEGORIES and n < max(len(s) // 2, 2)
+
+
+def _fits(s, dtype):
+    info = np.iinfo(dtype)
+    return info.min <= s.min() and s.max() <= info.max
+
+
+# ── Projection and filters ────────────────────────────────────────────────────
+def scoring_columns(scorer, available):
+    """Columns of a file with `available` columns that `scorer` needs.
+
+    Uses the raw-dataset names where the file has those, and reads income and
+    amount instead of `loan_percent_income` when only they are present.
+    """
+    raw = {clean: raw for raw, clean in COLUMN_ALIASES.items()}
+    available, wanted = list(available), list(scorer.input_columns)
+    if "loan_percent_income" not in available:
+        wanted = [c for c in wanted if c != "loan_percent_income"] + ["person_income($)", "loan_amnt($)"]
+    cols = []
+    for col in dict.fromkeys(wanted):
+        col = col if col in available else raw.get(col, col)
+        if col not in available:
+            raise ValueError(f"Missing required columns: {col}")
+        cols.append(col)
+    return cols
+
+
+def parse_filter(expr):
+    """`"loan_intent == EDUCATION"` / `"loan_amnt($) > 10000"` / `"loan_grade in A,B"`
+    to a `(column, op, value)` filter tuple."""
+    for op in (" not in ", " in ", "<=", ">=", "!=", "==", "<", ">", "="):
+        col, sep, value = expr.partition(op)
+        if sep and col.strip():
+            op, value = op.strip(), value.strip()
+            if op in ("in", "not in"):
+                return col.strip(), op, [_literal(v.strip()) for v in value.split(",")]
+            return col.strip(), op, _literal(value)
+    raise ValueError(f"Cannot parse filter {expr!r}; expected `column op value`")
+
+
+def _literal(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text.strip("'\"")
+
+
+def filter_mask(df, filters):
+    """Boolean mask of the rows of `df` passing every `(column, op, value)` filter."""
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in filters or ():
+        s = df[col]
+        if op == "in":
+            mask &= s.isin(value).to_numpy()
+        elif op == "not in":
+            mask &= ~s.isin(value).to_numpy()
+        elif op in _OPS:
+            mask &= _OPS[op](s, value).fillna(False).to_numpy(dtype=bool)
+        else:
+            raise ValueError(f"Unsupported filter operator {op!r}")
+    return mask
+
+
+def _expression(filters):
+    import pyarrow.parquet as pq
+    return pq.filters_to_expression([(c, "==" if op == "=" else op, v) for c, op, v in filters])
+
+
+def _needed(columns, filters):
+    """Columns to read: the projection plus anything only the filters use."""
+    if columns is None:
+        return None
+    return list(dict.fromkeys(list(columns) + [c for c, _, _ in filters or ()]))
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+def read_table(path, columns=None, filters=None, fmt=None):
+    """Read a whole table as a DataFrame, reading only `columns` and rows passing `filters`.
+
+    `path` may also be a file-like object when `fmt` is given. Parquet and
+    Arrow columns come back with their stored types; CSV is parsed with
+    pandas and then `typed`.
+    """
+    import pandas as pd
+
+    fmt = fmt or file_format(path)
+    needed = _needed(columns, filters)
+    if fmt == "csv":
+        df = pd.read_csv(path, usecols=needed)
+        if filters:
+            df = df[filter_mask(df, filters)].reset_index(drop=True)
+        df = typed(df)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        df = _to_pandas(pq.read_table(path, columns=needed, filters=filters or None))
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=needed, memory_map=isinstance(path, str))
+        df = _to_pandas(table.filter(_expression(filters)) if filters else table)
+    return df if columns is None else df[list(columns)]
+
+
+def _to_pandas(table):
+    # Frees each Arrow column as it is converted instead of holding both copies.
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def table_columns(path):
+    """Column names of a table file, without reading its rows."""
+    fmt = file_format(path)
+    if fmt == "csv":
+        import pandas as pd
+        return list(pd.read_csv(path, nrows=0).columns)
+    import pyarrow.dataset as ds
+    return ds.dataset(str(path), format="parquet" if fmt == "parquet" else "ipc").schema.names
+
+
+def iter_frames(path, chunk_rows, columns=None, filters=None):
+    """Yield `(DataFrame, fraction_read)` chunks of at most `chunk_rows` rows.
+
+    Memory follows `chunk_rows`. `fraction_read` is the share of the input
+    consumed so far, by bytes for CSV and by rows for Parquet/Arrow; it is
+    None where that is unknown: compressed CSV, and filtered Parquet/Arrow,
+    whose skipped row groups are never seen.
+    """
+    import pandas as pd
+
+    fmt = file_format(path)
+    if fmt == "csv":
+        compressed = str(path).lower().endswith(COMPRESSED)
+        total  = None if compressed else os.path.getsize(path)
+        handle = None if compressed else open(path, "rb")
+        try:
+            reader = pd.read_csv(handle if handle is not None else path, chunksize=chunk_rows,
+                                 usecols=_needed(columns, filters))
+            for chunk in reader:
+                if filters:
+                    chunk = chunk[filter_mask(chunk, filters)].reset_index(drop=True)
+                if columns is not None:
+                    chunk = chunk[list(columns)]
+                yield chunk, (min(handle.tell() / total, 1.0) if total else None)
+        finally:
+            if handle is not None:
+                handle.close()
+        return
+
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(str(path), format="parquet" if fmt == "parquet" else "ipc")
+    total   = None if filters else dataset.count_rows()
+    scanner = dataset.scanner(columns=_needed(columns, filters), batch_size=chunk_rows,
+                              filter=_expression(filters) if filters else None)
+    done = 0
+    for batch in scanner.to_batches():
+        if not batch.num_rows:
+            continue
+        done += batch.num_rows
+        df = batch.to_pandas()
+        yield (df if columns is None else df[list(columns)]), (min(done / total, 1.0) if total else None)
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+def write_table(df, path, fmt=None):
+    """Write `df` in the format of `path` (typed for Parquet / Arrow).
+
+    `path` may also be a binary file object, with `fmt` given.
+    """
+    fmt = fmt or file_format(path)
+    if fmt == "csv":
+        with FrameWriter(path, "csv") as out:
+            out.write(df)
+        return path
+    import pyarrow as pa
+    table = pa.Table.from_pandas(typed(df), preserve_index=False)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, compression="zstd")
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression="zstd")
+    return path
+
+
+class FrameWriter:
+    """Append DataFrame chunks to one CSV, Parquet or Arrow file.
+
+    The first chunk fixes the schema; later chunks are cast to it. CSV goes
+    through pyarrow's writer when available — several times faster than
+    `DataFrame.to_csv`, which remains the fallback. `path` may be a binary
+    file object instead, which is left open.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path   = path
+        self.fmt    = fmt or file_format(path)
+        self.rows    = 0
+        self._owned  = isinstance(path, (str, os.PathLike))
+        self._file   = open(path, "wb") if self._owned else path
+        self._writer = self._schema = None
+        self._header = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, df):
+        if self.fmt == "csv":
+            self._write_csv(df)
+        else:
+            self._write_arrow(df)
+        self.rows += len(df)
+
+    def _write_csv(self, df):
+        header, self._header = self._header, False
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+        except ImportError:
+            df.to_csv(self._file, header=header, index=False)
+            return
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pacsv.write_csv(table, self._file, pacsv.WriteOptions(include_header=header,
+                                                              quoting_style="needed"))
+
+    def _write_arrow(self, df):
+        import pyarrow as pa
+        df = typed(df, infer=False)
+        if self._schema is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            if self.fmt == "arrow":
+                # The IPC file format cannot change dictionaries between batches.
+                schema = pa.schema([f.with_type(f.type.value_type) if pa.types.is_dictionary(f.type)
+                                    else f for f in schema]).remove_metadata()
+            self._schema = schema
+            if self.fmt == "parquet":
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self._file, schema, compression="zstd")
+            else:
+                self._writer = pa.ipc.new_file(self._file, schema)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._owned:
+            self._file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert tables between CSV, Parquet and Arrow.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="rewrite a table in the format of the output's extension")
+    conv.add_argument("input")
+    conv.add_argument("output")
+    conv.add_argument("--columns", nargs="+", default=None, help="only these columns")
+    conv.add_argument("--filter", action="append", default=[], metavar="EXPR",
+                      help="keep rows matching `column op value`; repeatable")
+    args = parser.parse_args(argv)
+
+    df = read_table(args.input, args.columns, [parse_filter(f) for f in args.filter] or None)
+    write_table(df, args.output)
+    print(f"Wrote {len(df):,} rows x {df.shape[1]} columns to {args.output} "
+          f"({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
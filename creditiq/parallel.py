@@ -0,0 +1,231 @@
+"""Multi-core batch scoring over shared memory.
+
+    with ParallelScorer(CreditScorer.from_path(), workers=4) as pool:
+        out = pool.score(df)          # same dict as CreditScorer.score(df)
+
+The parent only stages the batch (`CreditScorer.stage`): it copies the
+numeric inputs and each categorical's level codes into `SharedMemory`
+blocks, the one pass that has to touch the caller's columns. Each worker
+process opened the model artifact at startup with `mmap_mode="r"`, so every
+process maps the same page-cached model arrays. A task is just `(start,
+stop)` plus the names of the shared blocks: workers attach, encode their row
+range into the shared Fortran-ordered feature matrix
+(`CreditScorer.encode_staged`), score it with the fused models and write
+grades, probabilities and risk bands into shared output blocks. Neither
+inputs nor models are ever pickled per task. The blocks are kept and reused
+by later calls (growing when a batch does not fit), and workers keep them
+attached: first-touch page faults on a fresh 1 GB block cost as much as
+encoding it. The label columns are gathered in the parent by
+`CreditScorer.results`, so the output is identical to single-process
+scoring. So are `contributions=True` columns, which the parent computes
+from the shared matrix after the workers finish. Shapley values
+(`shap=True`, `shap_values`) cost several times more than scoring, so those
+are computed by the workers: each builds its own
+`creditiq.treeshap.TreeShap` explainer on first use, writes its rows'
+values into a shared block and returns the explainer's base value.
+
+Packages loaded from a pickle are written to a temporary artifact directory
+first, which is what the workers then load.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .artifact import convert, load_artifact
+from .scoring import MODEL_KEYS, CreditScorer, risk_bands
+
+# Rows per task: at least this many, and at least four tasks per worker so a
+# slow worker does not hold up the batch.
+MIN_TASK_ROWS = 16_384
+TASKS_PER_WORKER = 4
+
+_scorer   = None   # worker-side CreditScorer of the artifact, set by _init_worker
+_attached = {}     # worker-side: block name -> SharedMemory
+
+
+def default_workers():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_worker(model_path):
+    global _scorer
+    _scorer = CreditScorer(load_artifact(model_path, mmap=True))
+
+
+def _attach(*names):
+    """Worker-side blocks by name; blocks the parent has replaced are closed."""
+    for name in [n for n in _attached if n not in names]:
+        _attached.pop(name).close()
+    for name in names:
+        if name not in _attached:
+            _attached[name] = shared_memory.SharedMemory(name=name)
+    return [_attached[name] for name in names]
+
+
+def _predict_range(names, n_rows, n_features, models, start, stop):
+    """Encode, score and (with a "shap" block) explain rows `start:stop`.
+
+    Returns the explainer's base value when explaining, else None.
+    """
+    keys   = list(names)
+    blocks = dict(zip(keys, _attach(*(names[k] for k in keys))))
+    _predict_into(blocks, n_rows, n_features, models, start, stop)
+    if "shap" in blocks:
+        return _shap_into(blocks["in"], blocks["shap"], n_rows, n_features, start, stop)
+    return None
+
+
+def _predict_into(blocks, n_rows, n_features, models, start, stop):
+    # Views live only in this frame, so `_attach` can close replaced blocks.
+    rows    = slice(start, stop)
+    numeric = np.ndarray((n_rows, len(_scorer.staged_columns)), np.float64, blocks["cols"].buf, order="F")
+    codes   = np.ndarray((n_rows, len(_scorer.category_tables)), np.int32, blocks["codes"].buf, order="F")
+    X = np.ndarray((n_rows, n_features), np.float64, blocks["in"].buf, order="F")[rows]
+    G = np.ndarray(n_rows, np.intp, blocks["grade"].buf)
+    P = np.ndarray((len(models), n_rows), np.float64, blocks["out"].buf)
+    B = np.ndarray((len(models), n_rows), np.int8, blocks["bands"].buf)
+    G[rows] = _scorer.encode_staged(numeric[rows], codes[rows], X)
+    for k, key in enumerate(models):
+        P[k, rows] = _scorer.fused[key].predict_proba(X)[:, 1]
+        B[k, rows] = risk_bands(P[k, rows])
+
+
+def _shap_into(shm_in, shm_shap, n_rows, n_features, start, stop):
+    X   = np.ndarray((n_rows, n_features), np.float64, shm_in.buf, order="F")[start:stop]
+    Phi = np.ndarray((n_rows, n_features), np.float64, shm_shap.buf)
+    base, phi = _scorer.tree_shap.shap_values(X)
+    Phi[start:stop] = phi
+    return base
+
+
+class ParallelScorer:
+    """Process pool scoring batches for one `CreditScorer`.
+
+    The pool starts once and is reused by every `score` call; use it as a
+    context manager or call `close()`.
+    """
+
+    def __init__(self, scorer, workers=None, start_method=None):
+        if scorer.encoders:
+            # Workers encode with the tables of the artifact they load.
+            raise ValueError("ParallelScorer needs a one-hot package; artifacts do not carry LabelEncoders")
+        self.scorer  = scorer
+        self.workers = workers or default_workers()
+        self._tmpdir = None
+        self._blocks = {}       # "in", "cols", "out", ... -> SharedMemory, reused across calls
+        self._lock   = threading.Lock()
+        model_path   = getattr(scorer.package, "path", None)
+        if model_path is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="creditiq-parallel-")
+            model_path   = convert(scorer.package, os.path.join(self._tmpdir, "model"))
+        self.model_path = model_path
+        # Workers must share the parent's resource tracker; one they started
+        # themselves would report the blocks they attach to as leaked.
+        resource_tracker.ensure_running()
+        ctx = multiprocessing.get_context(start_method)
+        self._pool = ctx.Pool(self.workers, initializer=_init_worker, initargs=(model_path,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        for shm in self._blocks.values():
+            shm.close()
+            shm.unlink()
+        self._blocks.clear()
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def _block(self, key, size):
+        shm = self._blocks.get(key)
+        if shm is None or shm.size < size:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = self._blocks[key] = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        return shm
+
+    def _ranges(self, n_rows):
+        step = max(MIN_TASK_ROWS, -(-n_rows // (self.workers * TASKS_PER_WORKER)))
+        return [(start, min(start + step, n_rows)) for start in range(0, n_rows, step)]
+
+    def predict_proba(self, columns, models=MODEL_KEYS):
+        """`(grade_idx, {model: default probabilities})` for every applicant."""
+        grade_idx, probs = self._predict(columns, models)[:2]
+        return grade_idx, probs
+
+    def shap_values(self, columns):
+        """Same as `CreditScorer.shap_values` on the encoded batch, computed across the pool."""
+        return self._predict(columns, (), shap=True)[4]
+
+    def _predict(self, columns, models, contributions=False, shap=False):
+        models = tuple(models)
+        scorer = self.scorer
+        cols   = scorer.prepare(columns)
+        n_rows, n_features = int(np.size(cols["loan_int_rate"])), len(scorer.feature_columns)
+        n_staged, n_tables = len(scorer.staged_columns), len(scorer.category_tables)
+
+        with self._lock:
+            if self._pool is None:
+                raise ValueError("ParallelScorer is closed")
+            blocks = {"in":    self._block("in", n_rows * n_features * 8),
+                      "cols":  self._block("cols", n_rows * n_staged * 8),
+                      "codes": self._block("codes", n_rows * n_tables * 4),
+                      "grade": self._block("grade", n_rows * 8),
+                      "out":   self._block("out", len(models) * n_rows * 8),
+                      "bands": self._block("bands", len(models) * n_rows)}
+            if shap:
+                blocks["shap"] = self._block("shap", n_rows * n_features * 8)
+            names = {key: shm.name for key, shm in blocks.items()}
+            X = P = B = Phi = None
+            try:
+                unknown = scorer.stage(
+                    cols,
+                    np.ndarray((n_rows, n_staged), np.float64, blocks["cols"].buf, order="F"),
+                    np.ndarray((n_rows, n_tables), np.int32, blocks["codes"].buf, order="F"))
+                bases = self._pool.starmap(_predict_range,
+                                           [(names, n_rows, n_features, models, start, stop)
+                                            for start, stop in self._ranges(n_rows)], chunksize=1)
+                grade_idx = np.ndarray(n_rows, np.intp, blocks["grade"].buf).copy()
+                P = np.ndarray((len(models), n_rows), np.float64, blocks["out"].buf)
+                probs = {key: P[k].copy() for k, key in enumerate(models)}
+                B = np.ndarray((len(models), n_rows), np.int8, blocks["bands"].buf)
+                bands = {key: B[k].copy() for k, key in enumerate(models)}
+                # Contributions cost about as much as the scoring itself and are
+                # computed here, in the parent, from the same shared matrix.
+                X = np.ndarray((n_rows, n_features), np.float64, blocks["in"].buf, order="F")
+                extra = scorer.explain(X, models) if contributions else {}
+                shap_values = None
+                if shap:
+                    Phi = np.ndarray((n_rows, n_features), np.float64, blocks["shap"].buf)
+                    base = bases[0] if bases else scorer.tree_shap.base
+                    shap_values = (base, scorer.group_inputs(Phi))
+            finally:
+                X = P = B = Phi = None
+        return grade_idx, probs, bands, extra, shap_values, unknown
+
+    def score(self, columns, models=MODEL_KEYS, contributions=False, shap=False, return_unknown=False):
+        """Same output as `CreditScorer.score`, computed across the pool."""
+        grade_idx, probs, bands, extra, shap_values, unknown = self._predict(columns, models,
+                                                                             contributions, shap)
+        out = self.scorer.results(grade_idx, probs, bands)
+        out.update(extra)
+        if shap:
+            out.update(self.scorer.shap_columns(*shap_values))
+        return (out, unknown) if return_unknown else out
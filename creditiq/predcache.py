@@ -0,0 +1,95 @@
+"""Prediction cache shared by every session of one app process.
+
+    cache  = PredictionCache(max_entries=50_000, ttl=3600)
+    result = cache.score_one(scorer, applicant, "dt")   # same dict as scorer.score_one
+
+Predict-page inputs come from sliders and select boxes, so the same
+applicants recur constantly. The key is the applicant's encoded feature
+row, after aliasing, derived columns, grade inputs and one-hot encoding,
+together with the model, the model version and the scorer's `load_id`.
+Inputs that differ only in ways the model cannot see share one entry, and
+every field of a result is a function of that row.
+
+Entries are evicted least recently used first once either bound is passed,
+and expire `ttl` seconds after they were computed. Every load of a package
+gets a new `load_id`, so once the registry reloads a version, results of
+the previous load are never served again; they simply age out. The registry
+reloads a version when its manifest changes, and for `model_artifact/` also
+when the `dt_model.pkl` it was converted from is retrained.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def _entry_bytes(key, result):
+    """Approximate memory held by one entry: the key tuple, row bytes and result dict."""
+    size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+    return size + sys.getsizeof(result) + sum(sys.getsizeof(v) for v in result.values())
+
+
+class PredictionCache:
+    """LRU of single-applicant results with a TTL, bounded by entry count and size."""
+
+    def __init__(self, max_entries=50_000, max_bytes=32 << 20, ttl=3600.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self.ttl         = ttl
+        self.clock       = clock
+        self._entries    = OrderedDict()     # key -> (computed_at, result, nbytes), LRU first
+        self._bytes      = 0
+        self._lock       = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    @staticmethod
+    def key(scorer, X, model):
+        # `+ 0.0` turns -0.0 into 0.0 so both hash alike.
+        return (scorer.version, scorer.load_id, model, (X[0] + 0.0).tobytes())
+
+    def score_one(self, scorer, applicant, model="dt"):
+        """`scorer.score_one(applicant, model)`, served from the cache when possible."""
+        cols = scorer.prepare(applicant)
+        X, grade_idx = scorer.encode(cols)
+        key = self.key(scorer, X, model)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+
+        result = scorer.records(X, grade_idx, cols["loan_percent_income"], model)[0]
+        nbytes = _entry_bytes(key, result)
+        with self._lock:
+            if key in self._entries:         # computed concurrently by another session
+                self._remove(key)
+            self._entries[key] = (now, result, nbytes)
+            self._bytes += nbytes
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return dict(result)
+
+    def _remove(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "expirations": self.expirations,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "entries": len(self._entries), "bytes": self._bytes}
@@ -0,0 +1,342 @@
+"""Hot-reloading model registry.
+
+Model versions are artifact directories (see `creditiq.artifact`) under one
+root, named by version:
+
+    models/
+        2026-10-01/      manifest.json, *.npy, metrics.json
+        2026-10-18/
+        ACTIVE           optional pin: the version to serve instead of the newest
+
+A background thread polls the root. New versions are loaded off the request
+path and validated: the manifest and checksums must be intact, feature
+columns must match the serving model's, and a smoke test must produce sane
+predictions. Only then is the version swapped in, by replacing a single
+reference. Callers take `registry.current` once per request and keep that
+`CreditScorer`, so in-flight work finishes on the version it started with.
+
+A version whose manifest (or pickle) is rewritten in place is reloaded and
+validated the same way and replaces its previous load, also when it is the
+one being served. So is an artifact whose source pickle, next to it, changes:
+retraining `dt_model.pkl` reloads the `model_artifact/` fallback. Until the
+artifact is regenerated from it, the retrained pickle is served and the
+version is listed in `stale`.
+
+Every validated version stays loaded, so `rollback()` and `activate()` are a
+pointer swap. With `persist=True` they also write `ACTIVE`, and the other
+processes watching the same root follow on their next poll.
+
+    python -m creditiq.registry status models/
+    python -m creditiq.registry rollback models/
+    python -m creditiq.registry unpin models/
+"""
+import argparse
+import collections
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from .artifact import ArtifactError, StaleArtifactError, check_source, is_artifact, load_artifact, source_path
+from .scoring import MODEL_KEYS, CreditScorer, load_package
+
+PIN_FILE = "ACTIVE"
+
+# Low-, mid- and high-risk applicants used to smoke-test every new version.
+SMOKE_APPLICANTS = [
+    {"person_age": 35, "person_income($)": 120000, "person_home_ownership": "MORTGAGE",
+     "person_emp_length": 10, "loan_intent": "HOMEIMPROVEMENT", "loan_amnt($)": 5000,
+     "loan_int_rate": 6.5, "cb_person_default_on_file": "N", "cb_person_cred_hist_length": 12},
+    {"person_age": 27, "person_income($)": 48000, "person_home_ownership": "RENT",
+     "person_emp_length": 3, "loan_intent": "EDUCATION", "loan_amnt($)": 9000,
+     "loan_int_rate": 11.0, "cb_person_default_on_file": "N", "cb_person_cred_hist_length": 4},
+    {"person_age": 22, "person_income($)": 18000, "person_home_ownership": "RENT",
+     "person_emp_length": 0, "loan_intent": "MEDICAL", "loan_amnt($)": 12000,
+     "loan_int_rate": 19.5, "cb_person_default_on_file": "Y", "cb_person_cred_hist_length": 2},
+]
+
+
+def _version_key(name):
+    """Natural sort: v2 < v10, 2026-9-1 < 2026-10-1."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def smoke_test(scorer, applicants=SMOKE_APPLICANTS):
+    """Raise ValueError unless both models give finite probabilities in [0, 1]."""
+    out = scorer.score({k: [a[k] for a in applicants] for k in applicants[0]})
+    for key in MODEL_KEYS:
+        prob = np.asarray(out[f"{key}_default_prob"], dtype=float)
+        if prob.shape != (len(applicants),) or not np.all((prob >= 0) & (prob <= 1)):
+            raise ValueError(f"smoke test failed: {key} probabilities {prob.tolist()}")
+
+
+class ModelRegistry:
+    """Serves the active `CreditScorer` of a directory of model versions.
+
+    `fallback` is an optional single package path (artifact or pickle) that
+    acts as the oldest version, so a deployment without a `models/` tree keeps
+    working and a first rollback can return to it.
+    """
+
+    def __init__(self, root="models", fallback=None, poll_interval=2.0, history=100):
+        self.root          = root
+        self.fallback      = fallback
+        self.poll_interval = poll_interval
+        self.history       = collections.deque(maxlen=history)
+        self._scorers      = {}     # version -> validated CreditScorer
+        self._order        = []     # validated versions, oldest first
+        self._attempted    = {}     # version -> `_stamp` of the last load attempt
+        self._active       = None   # (version, scorer); replaced, never mutated
+        self._lock         = threading.Lock()
+        self._stop         = threading.Event()
+        self._thread       = None
+        self._fallback_name = None
+        self._ignored_pin  = None
+        self.stale         = {}     # version -> why its artifact was passed over for its pickle
+        self.refresh()
+
+    # ── Serving ───────────────────────────────────────────────────────────────
+    @property
+    def current(self):
+        """The active scorer; None until some version has loaded."""
+        active = self._active
+        return active[1] if active else None
+
+    @property
+    def version(self):
+        active = self._active
+        return active[0] if active else None
+
+    def versions(self):
+        return list(self._order)
+
+    # ── Discovery ─────────────────────────────────────────────────────────────
+    def _candidates(self):
+        """`{version: path}` of every version directory currently on disk."""
+        found = {}
+        if self.fallback and os.path.exists(self.fallback):
+            self._fallback_name = os.path.basename(os.path.normpath(self.fallback))
+            found[self._fallback_name] = self.fallback
+        if self.root and os.path.isdir(self.root):
+            for entry in os.scandir(self.root):
+                if entry.is_dir() and not entry.name.startswith(".") and ".tmp-" not in entry.name:
+                    found[entry.name] = entry.path
+        return found
+
+    def _sorted(self, versions):
+        # The fallback package always counts as the oldest version.
+        return sorted(versions, key=lambda v: (v != self._fallback_name, _version_key(v)))
+
+    def _log(self, event, version, detail=""):
+        self.history.append({"time": time.time(), "event": event, "version": version,
+                             "detail": detail})
+
+    def _load(self, version, path):
+        package = self._read(version, path)
+        if package is None:
+            raise FileNotFoundError(path)
+        scorer = CreditScorer(package, version=version)
+        serving = self.current
+        if serving is not None and scorer.feature_columns != serving.feature_columns:
+            raise ValueError(f"feature columns differ from serving version {serving.version}")
+        smoke_test(scorer)
+        return scorer
+
+    @staticmethod
+    def _stamp(path):
+        """Modification times whose change triggers a reload: the manifest (or
+        the pickle), plus an artifact's source pickle when it sits next to it,
+        so retraining `dt_model.pkl` reloads `model_artifact/`. `_read` then
+        compares the pickle's SHA-256 to tell a retrain from a touch."""
+        if not os.path.isdir(path):
+            return (os.path.getmtime(path),)
+        stamp = os.path.getmtime(os.path.join(path, "manifest.json"))
+        try:
+            source = source_path(path)
+        except ArtifactError:
+            source = None   # unreadable manifest: rejected by `_load`
+        return (stamp, os.path.getmtime(source) if source else None)
+
+    def _read(self, version, path):
+        if not is_artifact(path):
+            return load_package(path)
+        try:
+            check_source(path)
+        except StaleArtifactError as e:
+            # Serve the retrained pickle rather than the old model, or nothing.
+            source = source_path(path)
+            self.stale[version] = f"{e}; serving {os.path.basename(source)} instead"
+            self._log("stale", version, self.stale[version])
+            return load_package(source)
+        self.stale.pop(version, None)
+        return load_artifact(path, verify=True)
+
+    def refresh(self):
+        """Scan once: load and validate new versions, drop removed ones, apply the pin.
+
+        Returns True if the active version changed.
+        """
+        found = self._candidates()
+        for version, path in found.items():
+            try:
+                stamp = self._stamp(path)
+            except OSError:
+                continue  # no manifest yet: still being copied in, or not a version
+            if self._attempted.get(version) == stamp:
+                continue  # loaded or rejected in this state; retry once it changes
+            self._attempted[version] = stamp
+            reload = version in self._scorers
+            try:
+                scorer = self._load(version, path)
+            except Exception as e:
+                # A rewritten version that fails validation keeps serving its last good load.
+                self._log("rejected", version, f"{type(e).__name__}: {e}")
+                continue
+            with self._lock:
+                self._scorers[version] = scorer
+                self._order = self._sorted(self._scorers)
+                if reload and self.version == version:
+                    self._active = (version, scorer)
+            self._log("reloaded" if reload else "loaded", version)
+
+        with self._lock:
+            for version in [v for v in self._scorers if v not in found]:
+                if self.version == version:
+                    continue  # keep serving it until something replaces it
+                del self._scorers[version]
+                self._attempted.pop(version, None)
+                self._log("removed", version)
+            self._order = self._sorted(self._scorers)
+        return self._select()
+
+    def _select(self):
+        pin = self.pinned()
+        if pin is not None and pin not in self._scorers:
+            if self._ignored_pin != pin:
+                self._ignored_pin = pin
+                self._log("pin-ignored", pin, "pinned version is not loaded")
+            pin = None
+        target = pin or (self._order[-1] if self._order else None)
+        if target is None or target == self.version:
+            return False
+        self._swap(target, "activated")
+        return True
+
+    def _swap(self, version, event):
+        with self._lock:
+            previous = self.version
+            self._active = (version, self._scorers[version])
+        self._log(event, version, f"from {previous}" if previous else "")
+
+    # ── Control ───────────────────────────────────────────────────────────────
+    def pinned(self):
+        try:
+            with open(os.path.join(self.root, PIN_FILE)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _write_pin(self, version):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, PIN_FILE)
+        tmp  = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "w") as f:
+            f.write(f"{version}\n")
+        os.replace(tmp, path)
+
+    def activate(self, version, persist=False):
+        """Serve an already-validated version immediately."""
+        if version not in self._scorers:
+            raise ValueError(f"Unknown model version {version!r}; loaded: {', '.join(self._order)}")
+        if persist:
+            self._write_pin(version)
+        if version != self.version:
+            self._swap(version, "activated")
+        return version
+
+    def rollback(self, persist=True):
+        """Switch to the newest validated version older than the active one.
+
+        Persisting pins it, so the rolled-back version is not re-promoted by
+        the next poll; `unpin()` returns to serving the newest version.
+        """
+        order = self._order
+        idx = order.index(self.version) if self.version in order else len(order)
+        if idx == 0:
+            raise ValueError("No earlier model version to roll back to")
+        target = order[idx - 1]
+        if persist:
+            self._write_pin(target)
+        self._swap(target, "rolled-back")
+        return target
+
+    def unpin(self):
+        try:
+            os.remove(os.path.join(self.root, PIN_FILE))
+        except FileNotFoundError:
+            pass
+        return self._select()
+
+    def status(self):
+        return {
+            "active":   self.version,
+            "pinned":   self.pinned(),
+            "stale":    dict(self.stale),
+            "versions": self.versions(),
+            "root":     self.root,
+            "history":  list(self.history)[-20:],
+        }
+
+    # ── Watching ──────────────────────────────────────────────────────────────
+    def start(self):
+        """Poll `root` in a daemon thread every `poll_interval` seconds."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self._log("error", None, f"{type(e).__name__}: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and control a model registry directory.")
+    parser.add_argument("command", choices=["status", "rollback", "activate", "unpin"])
+    parser.add_argument("root", nargs="?", default="models")
+    parser.add_argument("version", nargs="?", help="version for `activate`")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    try:
+        if args.command == "rollback":
+            print(f"Pinned {registry.rollback(persist=True)}")
+        elif args.command == "activate":
+            if not args.version:
+                parser.error("activate needs a version")
+            print(f"Pinned {registry.activate(args.version, persist=True)}")
+        elif args.command == "unpin":
+            registry.unpin()
+            print(f"Unpinned; newest version {registry.version} will be served")
+    except ValueError as e:
+        raise SystemExit(str(e))
+    status = registry.status()
+    print(f"active {status['active']}  pinned {status['pinned']}  versions {', '.join(status['versions'])}")
+    for event in status["history"]:
+        if event["event"] in ("rejected", "stale"):
+            print(f"{event['event']} {event['version']}: {event['detail']}")
+
+
+if __name__ == "__main__":
+    main()
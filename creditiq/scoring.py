@@ -0,0 +1,513 @@
+"""Headless credit-risk scoring.
+
+Everything the Predict page does to turn applicant inputs into a decision —
+grade derivation, categorical encoding, scaling, `predict_proba`, thresholding
+and risk banding — lives here so the Streamlit app, batch jobs and API workers
+share the exact same semantics. Scoring uses the fused models from
+`creditiq.fused`, which have the scaler folded in and take raw features.
+
+`contributions` explains individual scores: the decision tree's prediction
+decomposed along each row's decision path, the logistic regression's
+log-odds split into `coef × scaled value` terms, both per input column.
+`shap_values` gives the tree's exact Shapley values instead (path-dependent
+TreeSHAP, `creditiq.treeshap`), for adverse-action reasons.
+
+Each stage (`collect`, `prepare`, `grades`, `encode`, `predict_proba`,
+`contributions`, `shap`, `results`) is timed by `creditiq.trace.TRACER` when
+tracing is enabled.
+
+Only numpy is imported at module level. sklearn is only loaded when a pickled
+package is read; artifact directories (`creditiq.artifact`) need none of it.
+"""
+import itertools
+import os
+import pickle
+import threading
+import warnings
+from functools import cached_property
+from time import perf_counter_ns
+
+import numpy as np
+
+from .artifact import ArtifactError, check_source, is_artifact, load_artifact, package_fingerprint
+from .encoding import compile_tables
+from .fused import FusedLinear, fuse_package, scaler_stats
+from .trace import TRACER
+
+MODEL_PATHS     = ("model_artifact", "dt_model.pkl", "model/dt_model.pkl")
+MODEL_KEYS      = ("dt", "lr")
+
+GRADES          = np.array(list("ABCDEFG"))
+# Upper (inclusive) risk-score bound of every grade but the last; packages may
+# override them with "grade_breakpoints" / "grade_labels".
+GRADE_BREAKPOINTS = (25.0, 35.0, 45.0, 55.0, 65.0, 75.0)
+RISK_LEVELS     = np.array(["LOW RISK", "MEDIUM RISK", "HIGH RISK"])
+RISK_CLASSES    = np.array(["risk-low", "risk-med", "risk-high"])
+RISK_CUTOFFS    = (0.30, 0.60)
+COLUMN_ALIASES  = {"person_income": "person_income($)", "loan_amnt": "loan_amnt($)"}
+GRADE_INPUTS    = ("loan_int_rate", "loan_percent_income", "cb_person_cred_hist_length")
+
+_load_ids = itertools.count(1)
+
+
+def find_package(paths=MODEL_PATHS, skip_stale=True):
+    """First existing model package path, or None.
+
+    With `skip_stale`, an artifact directory whose source pickle has been
+    retrained since it was converted, or whose manifest cannot be read, is
+    passed over with a warning; the next path is usually that pickle. A
+    `ModelRegistry` does this check itself and records it, so callers
+    building one pass `skip_stale=False`.
+    """
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        if skip_stale and is_artifact(path):
+            try:
+                check_source(path)
+            except ArtifactError as e:
+                warnings.warn(f"{e}; skipping it", stacklevel=2)
+                continue
+        return path
+    return None
+
+
+def load_package(path=None):
+    """Load a model package: an artifact directory, or the pickle written by
+    `model_training.ipynb`.
+
+    Probes `MODEL_PATHS` when no path is given and returns None if nothing is found.
+    """
+    path = path or find_package()
+    if path is None or not os.path.exists(path):
+        return None
+    if is_artifact(path):
+        return load_artifact(path)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def risk_scores(loan_int_rate, loan_percent_income, cred_hist):
+    """Composite risk score `int_rate*2 + pct_income*100 - cred_hist` the grades are cut from."""
+    return (np.asarray(loan_int_rate, dtype=float) * 2
+            + np.asarray(loan_percent_income, dtype=float) * 100
+            - np.asarray(cred_hist, dtype=float))
+
+
+def derive_grades(loan_int_rate, loan_percent_income, cred_hist, breakpoints=GRADE_BREAKPOINTS):
+    """Grade index (0=A … 6=G) from the composite risk score, for any number of rows.
+
+    Grade `i` covers `breakpoints[i-1] < score <= breakpoints[i]`, which is exactly
+    what `np.searchsorted(..., side="left")` returns; NaN scores land past the end.
+    """
+    return np.searchsorted(breakpoints, risk_scores(loan_int_rate, loan_percent_income, cred_hist),
+                           side="left")
+
+
+def grade_table(package):
+    """`(breakpoints, labels)` from the package, defaulting to the A–G ladder."""
+    breakpoints = np.asarray(package.get("grade_breakpoints") or GRADE_BREAKPOINTS, dtype=float)
+    labels      = np.asarray(package.get("grade_labels") or GRADES.tolist())
+    if breakpoints.ndim != 1 or np.any(np.diff(breakpoints) <= 0) or np.isnan(breakpoints).any():
+        raise ValueError(f"grade_breakpoints must be strictly increasing, got {breakpoints.tolist()}")
+    if len(labels) != len(breakpoints) + 1:
+        raise ValueError(f"need {len(breakpoints) + 1} grade_labels for {len(breakpoints)} "
+                         f"breakpoints, got {len(labels)}")
+    return breakpoints, labels
+
+
+def risk_bands(default_prob):
+    """Risk band index: 0 below 30%, 1 below 60%, 2 otherwise.
+
+    NaN probabilities (rows with missing inputs) land in the last band; callers
+    mask them with `np.isnan` first, as `risk_levels` and `predictions` do.
+    """
+    return np.searchsorted(RISK_CUTOFFS, default_prob, side="right")
+
+
+def _unscored(values, prob):
+    """`values` as an object array with None wherever `prob` is NaN."""
+    missing = np.isnan(prob)
+    if not missing.any():
+        return values
+    values = values.astype(object)
+    values[missing] = None
+    return values
+
+
+def risk_levels(default_prob, bands=None):
+    """Risk level per row; None where the probability is NaN (unscored).
+
+    `bands` are the rows' `risk_bands`, when already computed.
+    """
+    prob = np.asarray(default_prob, dtype=float)
+    return _unscored(RISK_LEVELS.take(risk_bands(prob) if bands is None else bands), prob)
+
+
+def predictions(default_prob, threshold):
+    """1 (default) at or above `threshold`, else 0; None where the probability is
+    NaN, so a row that could not be scored is never an approval."""
+    prob = np.asarray(default_prob, dtype=float)
+    return _unscored((prob >= threshold).astype(int), prob)
+
+
+class CreditScorer:
+    """Scores applicants with the models, scaler and encoders of one model package.
+
+    `columns` arguments accept any mapping of column name to array-like — a
+    pandas DataFrame, a dict of lists, or a dict of scalars for a single
+    applicant — using the cleaned-dataset column names (the raw
+    `person_income` / `loan_amnt` names are accepted too).
+    """
+
+    def __init__(self, package, version=None):
+        self.package         = package
+        self.version         = version or package.get("version") or "unversioned"
+        # Unique per scorer in this process: tells two loads of one version apart.
+        self.load_id         = next(_load_ids)
+        # sklearn estimators only exist in pickled packages; artifacts ship the
+        # fused models and scaler statistics as arrays instead.
+        self.models          = {k: package[name] for k, name in (("dt", "model"), ("lr", "lr_model"))
+                                if name in package}
+        self.fused           = package.get("fused") or fuse_package(package)
+        self.thresholds      = {"dt": package.get("dt_threshold", 0.35),
+                                "lr": package.get("lr_threshold", 0.35)}
+        self.scaler          = package.get("scaler")
+        self.encoders        = package.get("encoders", {})
+        self.cat_cols        = package.get("cat_cols", [])
+        self.feature_columns = list(package["feature_columns"])
+        self.grade_breakpoints, self.grade_labels = grade_table(package)
+
+        # Categoricals go through lookup tables compiled once here; everything
+        # else is a numeric column copied as-is or the derived grade.
+        self.category_tables, covered = compile_tables(
+            self.feature_columns, self.cat_cols, self.encoders, package.get("categories"))
+        # Running totals for monitoring (`/stats`); shared by every caller of
+        # this scorer, so per-batch counts come from `encode(return_unknown=True)`.
+        self.unknown_categories = {t.column: 0 for t in self.category_tables}
+        self._unknown_lock      = threading.Lock()
+        self._numeric = [(j, col) for j, col in enumerate(self.feature_columns)
+                         if j not in covered and col != "loan_grade"]
+        self._grade   = [j for j, col in enumerate(self.feature_columns) if col == "loan_grade"]
+        self.input_columns = list(dict.fromkeys(
+            [col for _, col in self._numeric] + [t.column for t in self.category_tables]
+            + list(GRADE_INPUTS)
+        ))
+        # Numeric inputs in the order `stage` lays them out.
+        self.staged_columns = list(dict.fromkeys([col for _, col in self._numeric] + list(GRADE_INPUTS)))
+
+        # Contributions are reported per input column: a categorical's one-hot
+        # features are summed back into it.
+        source = dict(enumerate(self.feature_columns))
+        for table in self.category_tables:
+            source.update(dict.fromkeys(table.targets, table.column))
+        self.contribution_inputs = list(dict.fromkeys(source[j] for j in sorted(source)))
+        self._contrib_index = [self.contribution_inputs.index(source[j]) for j in sorted(source)]
+
+        if self.scaler is not None:
+            self._mean, self._scale = scaler_stats(self.scaler)
+        else:
+            self._mean, self._scale = package["scaler_mean"], package["scaler_scale"]
+
+    @cached_property
+    def fingerprint(self):
+        """Content hash of the package (`creditiq.artifact.package_fingerprint`)."""
+        return package_fingerprint(self.package)
+
+    @classmethod
+    def from_path(cls, path=None):
+        path = path or find_package()
+        package = load_package(path)
+        if package is None:
+            raise FileNotFoundError(f"Model package not found: {path or ', '.join(MODEL_PATHS)}")
+        return cls(package, version=os.path.basename(os.path.normpath(path)))
+
+    # ── Encoding ──────────────────────────────────────────────────────────────
+    def prepare(self, columns):
+        """Normalize column names, fill in `loan_percent_income` when absent and
+        check that every input the models need is present."""
+        cols = {COLUMN_ALIASES.get(k, k): columns[k] for k in columns.keys()}
+        if "loan_percent_income" not in cols and {"person_income($)", "loan_amnt($)"} <= cols.keys():
+            income = np.asarray(cols["person_income($)"], dtype=float)
+            amount = np.asarray(cols["loan_amnt($)"], dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                lpi = np.where(income > 0, amount / income, 0.0)
+            cols["loan_percent_income"] = np.round(lpi, 4)
+        missing = [c for c in self.input_columns if c not in cols]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        return cols
+
+    def encode(self, columns, out=None, return_unknown=False):
+        """Encode applicants into the unscaled feature matrix in one vectorized pass.
+
+        Categoricals are one-hot encoded against `feature_columns` exactly like the
+        `get_dummies(drop_first=True)` used at training time; LabelEncoders are
+        applied instead when the package ships them. Unknown categories encode as
+        the reference level (or the encoder's default code) and are added to the
+        running `unknown_categories`. Returns `(X, grade_idx)`, and with
+        `return_unknown` also `{column: count}` of this call's unknown values.
+
+        `out`, an `(n_rows, n_features)` float64 array, receives the features
+        instead of a new matrix; every column is overwritten.
+        """
+        t = perf_counter_ns() if TRACER.enabled else 0
+        cols = self.prepare(columns)
+        if t:
+            t = TRACER.lap("prepare", t)
+        grade_idx = np.atleast_1d(derive_grades(*(cols[c] for c in GRADE_INPUTS), self.grade_breakpoints))
+        if t:
+            t = TRACER.lap("grades", t)
+
+        shape = (len(grade_idx), len(self.feature_columns))
+        if out is None:
+            X = np.zeros(shape, order="F")
+        elif out.shape != shape or out.dtype != np.float64:
+            raise ValueError(f"out must be a float64 array of shape {shape}, "
+                             f"got {out.dtype}{list(out.shape)}")
+        else:
+            X = out
+        for j, col in self._numeric:
+            X[:, j] = np.asarray(cols[col], dtype=float)
+        for j in self._grade:
+            X[:, j] = grade_idx
+        unknown = {}
+        for table in self.category_tables:
+            n = table.encode(cols[table.column], X)
+            if n:
+                unknown[table.column] = n
+        if unknown:
+            with self._unknown_lock:
+                for col, n in unknown.items():
+                    self.unknown_categories[col] += n
+        if t:
+            TRACER.lap("encode", t)
+        return (X, grade_idx, unknown) if return_unknown else (X, grade_idx)
+
+    def stage(self, columns, numeric, codes):
+        """First half of `encode` split in two, for `creditiq.parallel`.
+
+        Copies the `staged_columns` into the columns of `numeric`, a float64
+        `(n_rows, len(staged_columns))` array, and each categorical's level
+        codes into the columns of `codes`, an int32 `(n_rows,
+        len(category_tables))` array. `encode_staged` then encodes any row
+        range of the two. Returns `{column: count}` of unknown values, which
+        are also added to `unknown_categories`.
+        """
+        cols = self.prepare(columns)
+        for i, col in enumerate(self.staged_columns):
+            numeric[:, i] = np.asarray(cols[col], dtype=float)
+        unknown = {}
+        for i, table in enumerate(self.category_tables):
+            codes[:, i] = table.codes(cols[table.column])
+            n = int(np.count_nonzero(codes[:, i] < 0))
+            if n:
+                unknown[table.column] = n
+        if unknown:
+            with self._unknown_lock:
+                for col, n in unknown.items():
+                    self.unknown_categories[col] += n
+        return unknown
+
+    def encode_staged(self, numeric, codes, out):
+        """Second half of the split `encode`: rows staged by `stage` into `out`.
+
+        Returns `grade_idx`; the features are the ones `encode` gives the same rows.
+        """
+        staged = dict(zip(self.staged_columns, numeric.T))
+        grade_idx = derive_grades(*(staged[c] for c in GRADE_INPUTS), self.grade_breakpoints)
+        for j, col in self._numeric:
+            out[:, j] = staged[col]
+        for j in self._grade:
+            out[:, j] = grade_idx
+        for i, table in enumerate(self.category_tables):
+            table.fill(codes[:, i], out)
+        return grade_idx
+
+    def transform(self, X):
+        """Standardize features — same arithmetic as `StandardScaler.transform`.
+
+        Only needed to feed the original sklearn models; `predict_proba` takes
+        the unscaled matrix.
+        """
+        return (X - self._mean) / self._scale
+
+    # ── Scoring ───────────────────────────────────────────────────────────────
+    def predict_proba(self, X, model="dt"):
+        """Default probability for each row of the unscaled matrix from `encode`.
+
+        The fused models fold the scaler into their parameters, so there is no
+        scaling pass; the tree's output is bit-identical to the sklearn pipeline.
+        """
+        t = perf_counter_ns() if TRACER.enabled else 0
+        prob = self.fused[model].predict_proba(X)[:, 1]
+        if t:
+            TRACER.lap("predict_proba", t)
+        return prob
+
+    def score(self, columns, models=MODEL_KEYS, contributions=False, shap=False, return_unknown=False):
+        """Score every applicant with each requested model.
+
+        Returns a dict of equal-length arrays: `derived_grade` and `model_version`
+        plus `<model>_default_prob`, `<model>_pred` and `<model>_risk_level` per model
+        (None in `pred` and `risk_level` where a row's probability is NaN),
+        with `contributions` the `explain` columns and with `shap` the
+        `shap_columns` as well. `return_unknown` also returns this batch's
+        unknown-category counts, as `encode` does.
+        """
+        X, grade_idx, unknown = self.encode(columns, return_unknown=True)
+        out = self.results(grade_idx, {key: self.predict_proba(X, key) for key in models})
+        if contributions:
+            out.update(self.explain(X, models))
+        if shap:
+            out.update(self.shap_columns(*self.shap_values(X)))
+        return (out, unknown) if return_unknown else out
+
+    def contributions(self, X, model="dt"):
+        """Per-input contributions to each row's score, for rows encoded by `encode`.
+
+        Returns `(base, C)`, with `C` of shape `(n_rows, len(contribution_inputs))`:
+
+        * `dt`: each split on the row's decision path changes the default
+          probability from the node's value to the child's, and the change is
+          credited to the split's input; `base` is the root's default rate, and
+          `base + C.sum(axis=1)` is the row's default probability;
+        * `lr`: `coef × scaled value` per input, in log-odds; `base` is the
+          intercept, and `base + C.sum(axis=1)` is the row's log-odds.
+
+        Either way it is one vectorized pass over the batch, about the cost of
+        `predict_proba`.
+        """
+        t = perf_counter_ns() if TRACER.enabled else 0
+        fused = self.fused[model]
+        if isinstance(fused, FusedLinear):
+            base, C = fused.contributions(X, self._mean)
+        else:
+            base, C = fused.contributions(X)
+        C = self.group_inputs(C)
+        if t:
+            TRACER.lap("contributions", t)
+        return base, C
+
+    def group_inputs(self, C):
+        """Sum `(n_rows, n_features)` feature-level values into `contribution_inputs`.
+
+        Columns are added one at a time in feature order, not by a matrix
+        product, whose rounding depends on the batch's shape: a row gets the
+        same values however the rows were chunked.
+        """
+        out = np.zeros((len(C), len(self.contribution_inputs)), order="F")
+        for j, k in enumerate(self._contrib_index):
+            out[:, k] += C[:, j]
+        return out
+
+    @cached_property
+    def tree_shap(self):
+        """`creditiq.treeshap.TreeShap` explainer of the fused decision tree."""
+        from .treeshap import TreeShap
+        return TreeShap(self.fused["dt"])
+
+    def shap_values(self, X):
+        """Shapley values of the decision tree's default probability, per input.
+
+        Returns `(base, S)` for rows encoded by `encode`, with `S` of shape
+        `(n_rows, len(contribution_inputs))`: `base` is the training default
+        rate and `base + S.sum(axis=1)` the row's default probability. Unlike
+        the path decomposition of `contributions`, an input's value does not
+        depend on where in the tree it is split. The explainer is built on first
+        use (about 40 ms).
+        """
+        explainer = self.tree_shap
+        t = perf_counter_ns() if TRACER.enabled else 0
+        base, phi = explainer.shap_values(X)
+        S = self.group_inputs(phi)
+        if t:
+            TRACER.lap("shap", t)
+        return base, S
+
+    def shap_columns(self, base, S):
+        """`shap_values` as batch-output columns: `dt_shap_base` plus
+        `dt_shap_<input>` for every input in `contribution_inputs`."""
+        out = {"dt_shap_base": np.full(len(S), base)}
+        for k, col in enumerate(self.contribution_inputs):
+            out[f"dt_shap_{col}"] = S[:, k]
+        return out
+
+    def explain(self, X, models=MODEL_KEYS):
+        """`contributions` as batch-output columns: `<model>_contrib_base` plus
+        `<model>_contrib_<input>` for every input in `contribution_inputs`."""
+        out = {}
+        for key in models:
+            base, C = self.contributions(X, key)
+            out[f"{key}_contrib_base"] = np.full(len(C), base)
+            for k, col in enumerate(self.contribution_inputs):
+                out[f"{key}_contrib_{col}"] = C[:, k]
+        return out
+
+    def results(self, grade_idx, probs, bands=None):
+        """`score()` output from grade indices and `{model: default probabilities}`.
+
+        `bands`, `{model: risk_bands(probabilities)}`, skips recomputing them.
+        """
+        t = perf_counter_ns() if TRACER.enabled else 0
+        # empty + fill: np.full fills object arrays one Python object at a time.
+        version = np.empty(len(grade_idx), dtype=object)
+        version.fill(self.version)
+        out = {"derived_grade": self.grade_labels[grade_idx], "model_version": version}
+        for key, prob in probs.items():
+            out[f"{key}_default_prob"] = prob
+            out[f"{key}_pred"]         = predictions(prob, self.thresholds[key])
+            out[f"{key}_risk_level"]   = risk_levels(prob, None if bands is None else bands[key])
+        if t:
+            TRACER.lap("results", t)
+        return out
+
+    def score_records(self, records, model="dt"):
+        """Score a list of applicant dicts with one `predict_proba` call.
+
+        Returns one result dict per applicant, in order.
+        """
+        t = perf_counter_ns() if TRACER.enabled else 0
+        keys = dict.fromkeys(k for r in records for k in r)
+        cols = self.prepare({k: [r.get(k) for r in records] for k in keys})
+        if t:
+            TRACER.lap("collect", t)
+        X, grade_idx = self.encode(cols)
+        return self.records(X, grade_idx, cols["loan_percent_income"], model)
+
+    def records(self, X, grade_idx, loan_percent_income, model="dt"):
+        """`score_records` output for rows already encoded by `encode`.
+
+        Rows whose probability is NaN (missing inputs) are unscored: their
+        `default_prob`, `pred`, `confidence`, `risk_level` and `risk_class` are None.
+        """
+        prob  = self.predict_proba(X, model)
+        t = perf_counter_ns() if TRACER.enabled else 0
+        bands = risk_bands(prob)
+        thr   = self.thresholds[model]
+        lpi   = np.atleast_1d(np.asarray(loan_percent_income, dtype=float))
+        results = [
+            {
+                "model":               model,
+                "model_version":       self.version,
+                "threshold":           thr,
+                "default_prob":        float(p),
+                "pred":                int(p >= thr),
+                "confidence":          float(max(p, 1 - p)),
+                "risk_level":          str(RISK_LEVELS[b]),
+                "risk_class":          str(RISK_CLASSES[b]),
+                "derived_grade":       str(self.grade_labels[g]),
+                "loan_percent_income": float(l),
+            }
+            for p, b, g, l in zip(prob, bands, grade_idx, lpi)
+        ]
+        for i in np.flatnonzero(np.isnan(prob)):
+            results[i].update(default_prob=None, pred=None, confidence=None, risk_level=None,
+                              risk_class=None)
+        if t:
+            TRACER.lap("results", t)
+        return results
+
+    def score_one(self, applicant, model="dt"):
+        """Score a single applicant given as a dict of scalars."""
+        return self.score_records([applicant], model)[0]
@@ -0,0 +1,303 @@
+"""Cross-validated hyperparameter and decision-threshold search.
+
+    python -m creditiq.search --fn-cost 5 --fp-cost 1 --out dt_model.pkl
+    python -m creditiq.search --method grid --dt-depth 6 8 10 --lr-c 0.1 1 10
+
+Searches tree depth and `min_samples_leaf` for the decision tree, and the
+regularization strength `C` for the logistic regression. Candidates are
+scored by stratified k-fold cross-validation on the training split only;
+the test split is left for the final `creditiq.train` evaluation.
+
+The objective is the expected misclassification cost per applicant,
+
+    (fn_cost * false negatives + fp_cost * false positives) / applicants
+
+A threshold does not change the model, so it costs no extra fits. Each
+candidate's out-of-fold probabilities are scored at every threshold in
+`THRESHOLDS` in one sorted pass. Its cost is the minimum over thresholds,
+and that threshold is the one written to the package's `dt_threshold` /
+`lr_threshold`.
+
+Folds are encoded and scaled once, with each fold's scaler fit on its own
+training rows. They are written as `.npy` files that every worker
+memory-maps, so a task is just `(model, params, fold)`. Tasks for both
+models share one process pool sized to the available cores.
+
+`--method halving` (the default) is successive halving over folds.
+Every candidate is scored on one fold, the best `1/eta` are scored on
+`eta` times as many folds, and so on until the survivors have seen every
+fold. `--method grid` scores every candidate on every fold.
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .artifact import convert, derived_artifact
+from .parallel import default_workers
+from .train import CACHE_DIR, DATA, StageCache, _report, fit_dt, fit_lr, prepare, resolve, save_package, train
+
+GRIDS = {
+    "dt": {"max_depth": [4, 6, 8, 10, 12, 16, None], "min_samples_leaf": [1, 5, 20, 50, 100]},
+    "lr": {"C": [0.001, 0.01, 0.1, 1.0, 10.0, 100.0]},
+}
+THRESHOLDS = np.round(np.arange(0.05, 0.951, 0.01), 2)
+# A missed default costs about twice a wrongly declined good loan by default;
+# for calibrated probabilities that puts the optimum near the notebook's 0.35.
+FN_COST, FP_COST = 2.0, 1.0
+
+_folds = None   # worker-side: fold index -> dict of memory-mapped arrays
+FOLD_ARRAYS = ("X_train", "X_train32", "y_train", "X_val", "X_val32", "y_val")
+
+
+# ── Folds ───────────────────────────────────────────────────────────────────
+
+def make_folds(X_train, y_train, n_splits, random_state):
+    """Scaled CV folds of the training split, one dict of arrays per fold.
+
+    Each fold's StandardScaler is fit on that fold's training rows only. The
+    float32 copies are what the tree casts its input to anyway; storing them
+    saves every tree fit the conversion.
+    """
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.preprocessing import StandardScaler
+    X, y = X_train.to_numpy(dtype=np.float64), y_train.to_numpy()
+    folds = []
+    for train_idx, val_idx in StratifiedKFold(n_splits, shuffle=True,
+                                              random_state=random_state).split(X, y):
+        scaler = StandardScaler().fit(X[train_idx])
+        Xt, Xv = scaler.transform(X[train_idx]), scaler.transform(X[val_idx])
+        folds.append({"X_train": Xt, "X_train32": Xt.astype(np.float32), "y_train": y[train_idx],
+                      "X_val": Xv, "X_val32": Xv.astype(np.float32), "y_val": y[val_idx]})
+    return folds
+
+
+def _write_folds(folds, out_dir):
+    for k, fold in enumerate(folds):
+        for name in FOLD_ARRAYS:
+            np.save(os.path.join(out_dir, f"fold{k}_{name}.npy"), fold[name], allow_pickle=False)
+
+
+def _init_worker(fold_dir, n_folds):
+    global _folds
+    _folds = [{name: np.load(os.path.join(fold_dir, f"fold{k}_{name}.npy"), mmap_mode="r")
+               for name in FOLD_ARRAYS} for k in range(n_folds)]
+
+
+def _fit_fold(model, params, fold, lr_max_iter, random_state):
+    """Validation-fold default probabilities of one candidate."""
+    f = _folds[fold]
+    if model == "dt":
+        clf = fit_dt(f["X_train32"], f["y_train"], params["max_depth"], params["min_samples_leaf"],
+                     random_state)
+        prob = clf.predict_proba(f["X_val32"])[:, 1]
+    else:
+        clf = fit_lr(f["X_train"], f["y_train"], params["C"], lr_max_iter, random_state)
+        prob = clf.predict_proba(f["X_val"])[:, 1]
+    return model, params, fold, prob
+
+
+# ── Objective ───────────────────────────────────────────────────────────────
+
+def threshold_costs(y, prob, thresholds=THRESHOLDS, fn_cost=FN_COST, fp_cost=FP_COST):
+    """Cost per applicant of predicting default at `prob >= t`, for every `t`."""
+    y, prob = np.asarray(y), np.asarray(prob)
+    pos, neg = np.sort(prob[y == 1]), np.sort(prob[y == 0])
+    fn = np.searchsorted(pos, thresholds, side="left")
+    fp = len(neg) - np.searchsorted(neg, thresholds, side="left")
+    return (fn_cost * fn + fp_cost * fp) / len(y)
+
+
+def candidates(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def _key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+class _ModelSearch:
+    """Out-of-fold probabilities and halving state for one model's candidates."""
+
+    def __init__(self, model, grid):
+        self.model = model
+        self.alive = candidates(grid)
+        self.probs = {}     # candidate key -> {fold: probabilities}
+        self.done  = False
+
+    def score(self, params, y_val, thresholds, fn_cost, fp_cost):
+        """`(cost, threshold)` of `params` over the folds it has been fit on."""
+        seen  = sorted(self.probs[_key(params)])
+        costs = threshold_costs(np.concatenate([y_val[k] for k in seen]),
+                                np.concatenate([self.probs[_key(params)][k] for k in seen]),
+                                thresholds, fn_cost, fp_cost)
+        best = int(np.argmin(costs))
+        return float(costs[best]), float(thresholds[best])
+
+
+def search(data_path=DATA, grids=None, method="halving", n_folds=5, eta=3, fn_cost=FN_COST,
+           fp_cost=FP_COST, thresholds=THRESHOLDS, workers=None, params=None, cache_dir=CACHE_DIR,
+           progress=None):
+    """Search both models; returns a summary dict with each model's best candidate.
+
+    `grids` overrides entries of `GRIDS`; `params` are base training
+    parameters as in `creditiq.train.PARAMS`. `progress`, if given, is
+    called with a one-line message after each halving round.
+    """
+    if method not in ("grid", "halving"):
+        raise ValueError(f"unknown search method {method!r}")
+    if n_folds < 2:
+        raise ValueError("need at least 2 folds")
+    grids = {m: {**GRIDS[m], **(grids or {}).get(m, {})} for m in GRIDS}
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    p = resolve(params)
+    t0 = time.perf_counter()
+
+    cache = StageCache(cache_dir)
+    k_split, _, _, (X_train, _, y_train, _) = prepare(data_path, p, cache)
+    _, folds = cache.run("folds", {"n_folds": n_folds, "random_state": p["random_state"]}, [k_split],
+                         make_folds, X_train, y_train, n_folds, p["random_state"])
+    y_val = [f["y_val"] for f in folds]
+
+    states = {m: _ModelSearch(m, grids[m]) for m in grids}
+    n_fits, rounds = 0, []
+    fold_dir = tempfile.mkdtemp(prefix="creditiq-search-")
+    try:
+        _write_folds(folds, fold_dir)
+        del folds
+        workers = workers or default_workers()
+        with multiprocessing.get_context().Pool(workers, initializer=_init_worker,
+                                                initargs=(fold_dir, n_folds)) as pool:
+            used = n_folds if method == "grid" else 1
+            while not all(s.done for s in states.values()):
+                tasks = [(m, c, k, p["lr_max_iter"], p["random_state"])
+                         for m, s in states.items() if not s.done
+                         for c in s.alive for k in range(used) if k not in s.probs.get(_key(c), {})]
+                for model, cand, fold, prob in pool.starmap(_fit_fold, tasks, chunksize=1):
+                    states[model].probs.setdefault(_key(cand), {})[fold] = prob
+                n_fits += len(tasks)
+                rounds.append({"folds": used, "fits": len(tasks),
+                               "candidates": {m: len(s.alive) for m, s in states.items() if not s.done}})
+                if progress is not None:
+                    progress(f"round {len(rounds)}: {len(tasks)} fits on {used} fold(s), "
+                             f"{time.perf_counter() - t0:.1f}s")
+                for s in states.values():
+                    if s.done:
+                        continue
+                    s.alive.sort(key=lambda c: s.score(c, y_val, thresholds, fn_cost, fp_cost)[0])
+                    if used == n_folds:
+                        s.done = True
+                    else:
+                        s.alive = s.alive[:max(1, math.ceil(len(s.alive) / eta))]
+                used = min(n_folds, used * eta)
+    finally:
+        shutil.rmtree(fold_dir, ignore_errors=True)
+
+    result = {"method": method, "n_folds": n_folds, "fn_cost": fn_cost, "fp_cost": fp_cost,
+              "fits": n_fits, "workers": workers, "rounds": rounds,
+              "elapsed_s": time.perf_counter() - t0}
+    for m, s in states.items():
+        board = []
+        for key, probs in s.probs.items():
+            cand = json.loads(key)
+            cost, threshold = s.score(cand, y_val, thresholds, fn_cost, fp_cost)
+            board.append({"params": cand, "folds": len(probs), "cost": cost, "threshold": threshold})
+        # Candidates seen on more folds rank first: a one-fold cost is a noisier estimate.
+        board.sort(key=lambda r: (-r["folds"], r["cost"]))
+        result[m] = {"best": board[0], "leaderboard": board}
+    return result
+
+
+def best_params(result, params=None):
+    """Training parameters with the search's winners and thresholds applied."""
+    dt, lr = result["dt"]["best"], result["lr"]["best"]
+    return {**(params or {}),
+            "dt_max_depth":        dt["params"]["max_depth"],
+            "dt_min_samples_leaf": dt["params"]["min_samples_leaf"],
+            "dt_threshold":        dt["threshold"],
+            "lr_C":                lr["params"]["C"],
+            "lr_threshold":        lr["threshold"]}
+
+
+def _depth(value):
+    return None if value.lower() == "none" else int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validated search over model "
+                                                 "hyperparameters and decision thresholds.")
+    parser.add_argument("--data", default=DATA, help="cleaned dataset (.csv or .parquet)")
+    parser.add_argument("--out", default=None, help="train the winners and write this package")
+    parser.add_argument("--artifact", default=None, metavar="DIR",
+                        help="also write the package as an artifact directory (needs --out; default: "
+                             "model_artifact/ next to --out, if it was converted from it)")
+    parser.add_argument("--report", default=None, help="write the full search summary as JSON")
+    parser.add_argument("--method", choices=("halving", "grid"), default="halving")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--eta", type=int, default=3, help="halving: keep 1/eta of candidates per round")
+    parser.add_argument("--fn-cost", type=float, default=FN_COST, help="cost of a missed default")
+    parser.add_argument("--fp-cost", type=float, default=FP_COST, help="cost of declining a good loan")
+    parser.add_argument("--dt-depth", type=_depth, nargs="+", default=None, help="max_depth values ('none' = unlimited)")
+    parser.add_argument("--dt-min-leaf", type=int, nargs="+", default=None, help="min_samples_leaf values")
+    parser.add_argument("--lr-c", type=float, nargs="+", default=None, help="LogisticRegression C values")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all available cores)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args(argv)
+    if args.artifact and not args.out:
+        parser.error("--artifact needs --out")
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+
+    grids = {"dt": {}, "lr": {}}
+    if args.dt_depth:
+        grids["dt"]["max_depth"] = args.dt_depth
+    if args.dt_min_leaf:
+        grids["dt"]["min_samples_leaf"] = args.dt_min_leaf
+    if args.lr_c:
+        grids["lr"]["C"] = args.lr_c
+    try:
+        result = search(args.data, grids, args.method, args.folds, args.eta, args.fn_cost, args.fp_cost,
+                        workers=args.workers, cache_dir=args.cache_dir,
+                        progress=lambda msg: print(msg, file=sys.stderr))
+    except ValueError as e:
+        raise SystemExit(f"search failed: {e}")
+
+    print(f"{result['fits']} fits on {result['workers']} worker(s) in {result['elapsed_s']:.1f}s "
+          f"({args.method}, {args.folds} folds, cost = {args.fn_cost:g}*FN + {args.fp_cost:g}*FP)")
+    for m in ("dt", "lr"):
+        print(f"{m.upper()}  {'params':<40} {'folds':>5} {'cost':>8} {'threshold':>9}")
+        for row in result[m]["leaderboard"][:5]:
+            print(f"    {json.dumps(row['params']):<40} {row['folds']:>5} {row['cost']:>8.4f} "
+                  f"{row['threshold']:>9.2f}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.out:
+        package, timings = train(args.data, best_params(result), args.cache_dir)
+        _report(timings)
+        # An artifact converted from the pickle being replaced is regenerated with
+        # it; left alone it would keep serving the old model.
+        artifact = args.artifact or derived_artifact(args.out)
+        save_package(package, args.out)
+        if artifact:
+            convert(package, artifact, source=args.out, overwrite=True)
+        dtm, lrm = package["dt_metrics"], package["lr_metrics"]
+        print(f"DT  threshold {package['dt_threshold']:.2f}  test accuracy {dtm['test_accuracy']:.4f}  "
+              f"ROC-AUC {dtm['roc_auc']:.4f}")
+        print(f"LR  threshold {package['lr_threshold']:.2f}  test accuracy {lrm['test_accuracy']:.4f}  "
+              f"ROC-AUC {lrm['roc_auc']:.4f}")
+        print(f"-> {args.out}" + (f", {os.path.relpath(artifact)}/" if artifact else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Local HTTP scoring service.
+
+    python -m creditiq.server --port 8600
+
+Endpoints (JSON in, JSON out):
+
+    GET  /health           model info and micro-batching counters
+    GET  /metrics          scoring-stage latencies, Prometheus text format (see --trace)
+    POST /score            one applicant  {"model": "dt", ...applicant fields}
+    POST /score/batch      {"model": "lr", "applicants": [{...}, {...}]}
+    GET  /models           registry status: active and loaded versions, recent events
+    POST /models/rollback  serve the previous version (pinned in models/ACTIVE)
+    POST /models/activate  {"version": "..."}, pinned likewise
+
+Single-row requests are coalesced into one `CreditScorer.score_records` call
+— one `predict_proba` per model — which amortizes the fixed per-call overhead
+across the whole batch. By default a batch is flushed at the end of the event
+loop iteration that received its first request: everything read in the same
+wake-up is scored together, and batches grow with load without any request
+waiting on a timer. A positive `window` instead holds a batch open that long
+(asyncio timers have about 1 ms resolution).
+
+Models come from a `ModelRegistry` that hot-reloads new versions. Each batch
+is scored by the version that was active when it was flushed, and every
+result carries its `model_version`.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+from .registry import ModelRegistry
+from .scoring import MODEL_KEYS, find_package
+from .trace import TRACER
+
+MAX_BODY = 64 * 1024 * 1024
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-applicant requests into batched model calls."""
+
+    def __init__(self, registry, window=0.0, max_batch=512):
+        self.registry  = registry
+        self.window    = window
+        self.max_batch = max_batch
+        self._pending  = {key: [] for key in MODEL_KEYS}
+        self._timers   = {}
+        self.stats     = {"requests": 0, "batches": 0, "max_batch": 0}
+
+    async def score(self, applicant, model="dt"):
+        if model not in self._pending:
+            raise ValueError(f"Unknown model {model!r}; expected one of {', '.join(MODEL_KEYS)}")
+        loop = asyncio.get_running_loop()
+        fut  = loop.create_future()
+        pending = self._pending[model]
+        pending.append((applicant, fut))
+        self.stats["requests"] += 1
+
+        if len(pending) >= self.max_batch:
+            self._flush(model)
+        elif model not in self._timers:
+            self._timers[model] = (loop.call_later(self.window, self._flush, model) if self.window > 0
+                                   else loop.call_soon(self._flush, model))
+        return await fut
+
+    def _flush(self, model):
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        batch, self._pending[model] = self._pending[model], []
+        if not batch:
+            return
+
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        scorer = self.registry.current
+        try:
+            results = scorer.score_records([a for a, _ in batch], model)
+        except Exception:
+            # One malformed applicant must not fail its neighbours: retry row by row
+            # so each request gets its own result or its own error.
+            for applicant, fut in batch:
+                if fut.done():
+                    continue
+                try:
+                    fut.set_result(scorer.score_one(applicant, model))
+                except Exception as e:
+                    fut.set_exception(e)
+            return
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+
+class ScoringServer:
+    """Minimal HTTP/1.1 server (keep-alive, JSON bodies) on asyncio streams."""
+
+    def __init__(self, registry, window=0.0, max_batch=512):
+        self.registry = registry
+        self.batcher  = MicroBatcher(registry, window, max_batch)
+        self.started = time.time()
+
+    async def start(self, host="127.0.0.1", port=8600):
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                try:
+                    method, target, version, headers, length = self._parse_head(head)
+                except ValueError as e:
+                    # The body's extent is unknown, so the connection cannot be reused.
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": str(e)}, keep_alive=False)
+                    break
+                if length > MAX_BODY:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {"error": "request body too large"}, keep_alive=False)
+                    break
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                status, payload = await self._dispatch(method, target, body)
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head):
+        """Request line, headers and body length; ValueError if any is malformed."""
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        parts = request_line.split(" ", 2)
+        if len(parts) != 3:
+            raise ValueError(f"malformed request line {request_line[:100]!r}")
+        headers = {}
+        for line in header_lines:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        length = headers.get("content-length", "") or "0"
+        if not length.isdigit():
+            raise ValueError(f"invalid Content-Length {length[:100]!r}")
+        return (*parts, headers, int(length))
+
+    async def _dispatch(self, method, target, body):
+        try:
+            url   = urlsplit(target)
+            query = parse_qs(url.query)
+            if url.path == "/health" and method == "GET":
+                return HTTPStatus.OK, self.health()
+            if url.path == "/metrics" and method == "GET":
+                return HTTPStatus.OK, TRACER.prometheus()
+            if url.path == "/models" and method == "GET":
+                return HTTPStatus.OK, self.registry.status()
+            if method != "POST":
+                return HTTPStatus.NOT_FOUND, {"error": f"no route for {method} {url.path}"}
+
+            data  = json.loads(body or b"{}")
+            model = query.get("model", [None])[0]
+            if url.path == "/score":
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object with applicant fields")
+                model = data.pop("model", None) or model or "dt"
+                return HTTPStatus.OK, await self.batcher.score(data, model)
+            if url.path == "/score/batch":
+                if isinstance(data, list):
+                    data = {"applicants": data}
+                if not isinstance(data, dict):
+                    raise ValueError("expected a list of applicants or {\"applicants\": [...]}")
+                model = data.get("model") or model or "dt"
+                if model not in MODEL_KEYS:
+                    raise ValueError(f"Unknown model {model!r}; expected one of {', '.join(MODEL_KEYS)}")
+                applicants = data.get("applicants") or []
+                scorer  = self.registry.current
+                results = scorer.score_records(applicants, model) if applicants else []
+                return HTTPStatus.OK, {"model": model, "model_version": scorer.version,
+                                       "count": len(results), "results": results}
+            if url.path == "/models/rollback":
+                return HTTPStatus.OK, {"active": self.registry.rollback(persist=True)}
+            if url.path == "/models/activate":
+                version = data.get("version") if isinstance(data, dict) else None
+                if not version:
+                    raise ValueError("expected {\"version\": ...}")
+                return HTTPStatus.OK, {"active": self.registry.activate(version, persist=True)}
+            return HTTPStatus.NOT_FOUND, {"error": f"no route for {method} {url.path}"}
+        except (ValueError, KeyError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e) or type(e).__name__}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+    async def _respond(self, writer, status, payload, keep_alive=True):
+        # Strings are Prometheus exposition text; everything else is JSON.
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+    def health(self):
+        scorer = self.registry.current
+        return {
+            "status":             "ok",
+            "uptime_s":           round(time.time() - self.started, 1),
+            "model_version":      scorer.version,
+            "models":             list(MODEL_KEYS),
+            "thresholds":         scorer.thresholds,
+            "feature_columns":    scorer.feature_columns,
+            "window_ms":          self.batcher.window * 1000,
+            "batching":           self.batcher.stats,
+            "unknown_categories": scorer.unknown_categories,
+        }
+
+
+async def serve(registry, host="127.0.0.1", port=8600, window=0.0, max_batch=512):
+    server = await ScoringServer(registry, window, max_batch).start(host, port)
+    addrs = ", ".join(str(s.getsockname()) for s in server.sockets)
+    print(f"CreditIQ scoring service listening on {addrs}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve CreditIQ scoring over HTTP.")
+    parser.add_argument("--model-path", default=None,
+                        help="fallback artifact directory or pickled package, served as the "
+                             "oldest version (default: model_artifact/, then dt_model.pkl)")
+    parser.add_argument("--models-dir", default="models",
+                        help="registry of versioned artifacts to hot-reload from")
+    parser.add_argument("--poll-s", type=float, default=2.0,
+                        help="how often to check --models-dir for new versions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--window-ms", type=float, default=0.0,
+                        help="micro-batching window for /score requests; 0 batches the requests "
+                             "read in one event-loop iteration")
+    parser.add_argument("--max-batch", type=int, default=512,
+                        help="flush a micro-batch early once it reaches this size")
+    parser.add_argument("--trace", action="store_true",
+                        help="time each scoring stage for GET /metrics (also CREDITIQ_TRACE=1)")
+    args = parser.parse_args(argv)
+    if args.trace:
+        TRACER.enabled = True
+
+    registry = ModelRegistry(args.models_dir, fallback=args.model_path or find_package(skip_stale=False),
+                             poll_interval=args.poll_s)
+    if registry.current is None:
+        parser.error(f"no loadable model in {args.models_dir} or {args.model_path or 'the default paths'}")
+    for version, detail in registry.stale.items():
+        print(f"warning: {version}: {detail}", file=sys.stderr)
+    # The model, sklearn and numpy objects live for the whole process; keeping
+    # them out of the cyclic GC stops full collections from stalling requests.
+    gc.freeze()
+    registry.start()
+    try:
+        asyncio.run(serve(registry, args.host, args.port, args.window_ms / 1000, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
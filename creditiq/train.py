@@ -0,0 +1,344 @@
+"""Training pipeline: cleaned dataset -> model package, without the notebook.
+
+    python -m creditiq.train                          # writes dt_model.pkl and model_artifact/
+    python -m creditiq.train --max-depth 8 --out dt8.pkl --artifact models/dt8
+
+Runs the steps of `notebook/model_training.ipynb` as named stages:
+
+    load      read the cleaned CSV or Parquet file
+    encode    drop loan_status / loan_grade, `get_dummies(drop_first=True)`
+    split     stratified 80/20 train/test split
+    scale     StandardScaler fit on the training split
+    fit_lr    LogisticRegression(max_iter=1000)
+    fit_dt    DecisionTreeClassifier(max_depth=10)
+    evaluate  test-set metrics at the 0.35 thresholds, plus threshold/ROC/PR curves
+
+and assembles the same package the notebook pickles, so `load_package` and
+`CreditScorer` cannot tell the two apart. With the default parameters the
+models are identical to the notebook's.
+
+Every stage's output is cached under `--cache-dir`, keyed by a hash of the
+input file's bytes, the parameters the stage reads and the keys of the
+stages it consumes. Changing `--max-depth` therefore reruns only `fit_dt`
+and `evaluate`; editing the data reruns everything. Per-stage wall time and
+cache hits are printed at the end.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+from .artifact import _sha256, convert, derived_artifact
+from .curves import curve_metrics
+from .io import read_table
+
+DATA          = os.path.join("data", "cleaned", "cleaned_credit_risk.csv")
+CACHE_DIR     = os.path.join(".cache", "train")
+CLASS_LABELS  = ["Good Loan (0)", "Default (1)"]
+
+# Notebook defaults. Each stage hashes only the parameters it lists in STAGE_PARAMS.
+PARAMS = {
+    "target":        "loan_status",
+    "drop":          ["loan_grade"],
+    "cat_cols":      ["person_home_ownership", "loan_intent", "cb_person_default_on_file"],
+    "test_size":     0.2,
+    "random_state":  42,
+    "lr_max_iter":   1000,
+    "lr_C":          1.0,
+    "dt_max_depth":  10,
+    "dt_min_samples_leaf": 1,
+    "dt_threshold":  0.35,
+    "lr_threshold":  0.35,
+}
+STAGE_PARAMS = {
+    "load":     (),
+    "encode":   ("target", "drop", "cat_cols"),
+    "split":    ("test_size", "random_state"),
+    "scale":    (),
+    "fit_lr":   ("lr_C", "lr_max_iter", "random_state"),
+    "fit_dt":   ("dt_max_depth", "dt_min_samples_leaf", "random_state"),
+    "evaluate": ("dt_threshold", "lr_threshold"),
+}
+# Bump when a stage's code changes meaning, to invalidate its cached outputs.
+CACHE_VERSION = 3
+
+
+def _library_versions():
+    import pandas
+    import sklearn
+    return {"numpy": np.__version__, "pandas": pandas.__version__, "sklearn": sklearn.__version__}
+
+
+class StageCache:
+    """Pickled stage outputs in `cache_dir`, one file per (stage, key).
+
+    `cache_dir=None` disables caching; stages still run and are timed.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.salt      = {"version": CACHE_VERSION, **_library_versions()}
+        self.timings   = []
+
+    def key(self, stage, params, upstream):
+        blob = json.dumps([stage, self.salt, params, upstream], sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def run(self, stage, params, upstream, fn, *args):
+        """`(key, output)` of `fn(*args)`, from the cache when this key was run before."""
+        key  = self.key(stage, params, upstream)
+        path = os.path.join(self.cache_dir, f"{stage}-{key[:20]}.pkl") if self.cache_dir else None
+        t0   = time.perf_counter()
+        out, hit = None, False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    out, hit = pickle.load(f), True
+            except (OSError, EOFError, pickle.UnpicklingError):
+                out = None
+        if not hit:
+            out = fn(*args)
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = f"{path}.tmp-{os.getpid()}"
+                with open(tmp, "wb") as f:
+                    pickle.dump(out, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+        self.timings.append({"stage": stage, "seconds": time.perf_counter() - t0,
+                             "cached": hit, "key": key[:12]})
+        return key, out
+
+
+# ── Stages ──────────────────────────────────────────────────────────────────
+
+def load_data(path):
+    return read_table(path)
+
+
+def encode(df, target, drop, cat_cols):
+    """`(X, y)` exactly as the notebook builds them; also the training levels."""
+    import pandas as pd
+    X = df.drop([target, *drop], axis=1)
+    y = df[target]
+    categories = {c: sorted(map(str, X[c].dropna().unique())) for c in cat_cols}
+    X = pd.get_dummies(X, columns=cat_cols, drop_first=True)
+    return X, y, categories
+
+
+def split(X, y, test_size, random_state):
+    from sklearn.model_selection import train_test_split
+    return train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=y)
+
+
+def scale(X_train, X_test):
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    return scaler, scaler.fit_transform(X_train), scaler.transform(X_test)
+
+
+def fit_lr(X_train, y_train, C, max_iter, random_state):
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(C=C, max_iter=max_iter, random_state=random_state).fit(X_train, y_train)
+
+
+def fit_dt(X_train, y_train, max_depth, min_samples_leaf, random_state):
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier(max_depth=max_depth, min_samples_leaf=min_samples_leaf,
+                                  random_state=random_state).fit(X_train, y_train)
+
+
+def _summary(report, label):
+    row = report[label]
+    return {"precision": float(row["precision"]), "recall": float(row["recall"]),
+            "f1_score": float(row["f1-score"])}
+
+
+def model_metrics(name, model, X_test, y_test, threshold):
+    """The notebook's per-model metrics block for one fitted classifier."""
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score
+    prob   = model.predict_proba(X_test)[:, 1]
+    pred   = (prob >= threshold).astype(int)
+    report = classification_report(y_test, pred, target_names=CLASS_LABELS, output_dict=True)
+    return {
+        "model_name":            name,
+        "test_accuracy":         float(accuracy_score(y_test, pred)),
+        "roc_auc":               float(roc_auc_score(y_test, prob)),
+        "threshold":             threshold,
+        "confusion_matrix":      confusion_matrix(y_test, pred).tolist(),
+        "classification_report": report,
+        "class_metrics":         {label: {**_summary(report, label), "support": int(report[label]["support"])}
+                                  for label in CLASS_LABELS},
+        "macro_avg":             _summary(report, "macro avg"),
+        "weighted_avg":          _summary(report, "weighted avg"),
+        **curve_metrics(y_test, prob),
+    }
+
+
+def evaluate(dt_model, lr_model, feature_columns, X_train, y_train, X_test, y_test,
+             dt_threshold, lr_threshold):
+    """`(dt_metrics, lr_metrics)` with the notebook's keys, in the notebook's order."""
+    from sklearn.metrics import accuracy_score
+    dt = model_metrics("Decision Tree", dt_model, X_test, y_test, dt_threshold)
+    # The notebook's training accuracy uses predict(), i.e. the 0.5 cut-off.
+    train_accuracy = float(accuracy_score(y_train, dt_model.predict(X_train)))
+    dt_metrics = {
+        "model_name":         dt["model_name"],
+        "train_accuracy":     train_accuracy,
+        "test_accuracy":      dt["test_accuracy"],
+        "roc_auc":            dt["roc_auc"],
+        "overfit_gap":        float(abs(train_accuracy - dt["test_accuracy"])),
+        "threshold":          dt_threshold,
+        "confusion_matrix":   dt["confusion_matrix"],
+        "feature_importance": dict(zip(feature_columns, dt_model.feature_importances_.tolist())),
+        **{k: dt[k] for k in ("classification_report", "class_metrics", "macro_avg", "weighted_avg",
+                              "threshold_curve", "roc_curve", "pr_curve")},
+    }
+    lr = model_metrics("Logistic Regression", lr_model, X_test, y_test, lr_threshold)
+    lr_metrics = {k: lr[k] for k in ("model_name", "test_accuracy", "roc_auc", "threshold", "confusion_matrix")}
+    lr_metrics["feature_coefficients"] = dict(zip(feature_columns, lr_model.coef_[0].tolist()))
+    lr_metrics.update((k, lr[k]) for k in ("classification_report", "class_metrics", "macro_avg", "weighted_avg",
+                                           "threshold_curve", "roc_curve", "pr_curve"))
+    return dt_metrics, lr_metrics
+
+
+# ── Pipeline ────────────────────────────────────────────────────────────────
+
+def resolve(params=None):
+    """`PARAMS` with `params` applied; unknown names are an error."""
+    p = {**PARAMS, **(params or {})}
+    unknown = set(p) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"unknown training parameters: {sorted(unknown)}")
+    return p
+
+
+def _stage(cache, p, name, upstream, fn, *args):
+    return cache.run(name, {k: p[k] for k in STAGE_PARAMS[name]}, upstream, fn, *args)
+
+
+def prepare(data_path, p, cache):
+    """Run load, encode and split through `cache`.
+
+    Returns `(split_key, X, categories, (X_train, X_test, y_train, y_test))`.
+    """
+    t0 = time.perf_counter()
+    data_hash = _sha256(data_path)
+    hash_s = time.perf_counter() - t0
+    k_load, df = _stage(cache, p, "load", [data_hash], load_data, data_path)
+    cache.timings[-1]["seconds"] += hash_s      # hashing the input is part of loading it
+
+    k_enc, (X, y, categories) = _stage(cache, p, "encode", [k_load], encode,
+                                       df, p["target"], p["drop"], p["cat_cols"])
+    k_split, parts = _stage(cache, p, "split", [k_enc], split, X, y, p["test_size"], p["random_state"])
+    return k_split, X, categories, parts
+
+
+def train(data_path=DATA, params=None, cache_dir=CACHE_DIR):
+    """Run every stage and return `(package, timings)`.
+
+    `params` overrides entries of `PARAMS`; `timings` lists one
+    `{"stage", "seconds", "cached", "key"}` dict per stage.
+    """
+    p = resolve(params)
+    cache = StageCache(cache_dir)
+    stage = lambda name, upstream, fn, *args: _stage(cache, p, name, upstream, fn, *args)  # noqa: E731
+
+    k_split, X, categories, (X_train, X_test, y_train, y_test) = prepare(data_path, p, cache)
+    k_scale, (scaler, X_train_s, X_test_s) = stage("scale", [k_split], scale, X_train, X_test)
+    k_lr, lr_model = stage("fit_lr", [k_scale], fit_lr, X_train_s, y_train,
+                           p["lr_C"], p["lr_max_iter"], p["random_state"])
+    k_dt, dt_model = stage("fit_dt", [k_scale], fit_dt, X_train_s, y_train,
+                           p["dt_max_depth"], p["dt_min_samples_leaf"], p["random_state"])
+    feature_columns = X.columns.tolist()
+    _, (dt_metrics, lr_metrics) = stage("evaluate", [k_dt, k_lr], evaluate, dt_model, lr_model,
+                                        feature_columns, X_train_s, y_train, X_test_s, y_test,
+                                        p["dt_threshold"], p["lr_threshold"])
+
+    package = {
+        "model":           dt_model,
+        "scaler":          scaler,
+        "cat_cols":        list(p["cat_cols"]),
+        "feature_columns": feature_columns,
+        "dt_threshold":    p["dt_threshold"],
+        "lr_model":        lr_model,
+        "lr_threshold":    p["lr_threshold"],
+        "dataset_info": {
+            "total_samples": len(X),
+            "train_samples": len(X_train),
+            "test_samples":  len(X_test),
+            "n_features":    len(feature_columns),
+            "class_labels":  list(CLASS_LABELS),
+        },
+        "dt_metrics":      dt_metrics,
+        "lr_metrics":      lr_metrics,
+        # One-hot columns need no fitted encoders; the training levels (and so
+        # the dropped reference level of each column) are recorded instead.
+        "encoders":        {},
+        "categories":      categories,
+    }
+    return package, cache.timings
+
+
+def save_package(package, path):
+    """Pickle `package` to `path` via a temporary file, like the notebook's dt_model.pkl."""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        pickle.dump(package, f)
+    os.replace(tmp, path)
+    return path
+
+
+def _report(timings, file=sys.stderr):
+    print(f"{'stage':<10} {'time':>9}  cache", file=file)
+    for t in timings:
+        print(f"{t['stage']:<10} {t['seconds'] * 1e3:>7.1f}ms  {'hit ' if t['cached'] else 'miss'} {t['key']}",
+              file=file)
+    print(f"{'total':<10} {sum(t['seconds'] for t in timings) * 1e3:>7.1f}ms", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the credit-risk models into a model package.")
+    parser.add_argument("--data", default=DATA, help="cleaned dataset (.csv or .parquet)")
+    parser.add_argument("--out", default="dt_model.pkl", help="pickled package to write")
+    parser.add_argument("--artifact", default=None, metavar="DIR",
+                        help="also write the package as an artifact directory (replaced if present; default: "
+                             "model_artifact/ next to --out, if it was converted from it)")
+    parser.add_argument("--max-depth", type=int, default=PARAMS["dt_max_depth"])
+    parser.add_argument("--min-samples-leaf", type=int, default=PARAMS["dt_min_samples_leaf"])
+    parser.add_argument("--lr-c", type=float, default=PARAMS["lr_C"],
+                        help="inverse L2 regularization strength of the logistic regression")
+    parser.add_argument("--lr-max-iter", type=int, default=PARAMS["lr_max_iter"])
+    parser.add_argument("--dt-threshold", type=float, default=PARAMS["dt_threshold"])
+    parser.add_argument("--lr-threshold", type=float, default=PARAMS["lr_threshold"])
+    parser.add_argument("--test-size", type=float, default=PARAMS["test_size"])
+    parser.add_argument("--random-state", type=int, default=PARAMS["random_state"])
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="run every stage, store nothing")
+    args = parser.parse_args(argv)
+
+    params = {"dt_max_depth": args.max_depth, "dt_min_samples_leaf": args.min_samples_leaf,
+              "lr_C": args.lr_c, "lr_max_iter": args.lr_max_iter,
+              "dt_threshold": args.dt_threshold, "lr_threshold": args.lr_threshold,
+              "test_size": args.test_size, "random_state": args.random_state}
+    package, timings = train(args.data, params, None if args.no_cache else args.cache_dir)
+    _report(timings)
+    # An artifact converted from the pickle being replaced is regenerated with
+    # it; left alone it would keep serving the old model.
+    artifact = args.artifact or derived_artifact(args.out)
+    save_package(package, args.out)
+    if artifact:
+        convert(package, artifact, source=args.out, overwrite=True)
+    dtm, lrm = package["dt_metrics"], package["lr_metrics"]
+    print(f"DT  test accuracy {dtm['test_accuracy']:.4f}  ROC-AUC {dtm['roc_auc']:.4f}  "
+          f"overfit gap {dtm['overfit_gap']:.4f}")
+    print(f"LR  test accuracy {lrm['test_accuracy']:.4f}  ROC-AUC {lrm['roc_auc']:.4f}")
+    print(f"-> {args.out}" + (f", {os.path.relpath(artifact)}/" if artifact else ""))
+
+
+if __name__ == "__main__":
+    main()
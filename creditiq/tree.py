@@ -0,0 +1,273 @@
+"""Compiled decision-tree inference.
+
+`CompiledTree` flattens a fitted `DecisionTreeClassifier` into a handful of
+compact NumPy arrays and scores with a level-synchronous traversal: every row
+advances one level per step, so a depth-10 tree costs ten vectorized gathers
+whatever the batch size, and sklearn's per-call validation overhead is gone.
+
+Output matches `DecisionTreeClassifier.predict_proba` bit for bit: inputs are
+compared as float32 against float64 thresholds exactly like sklearn's Cython
+traversal, and leaves return the same stored class-probability rows. Trees with
+`input_dtype=float64` compare inputs at full precision instead; the fused
+(scaler-folded) trees in `creditiq.fused` rely on that.
+
+    python -m creditiq.tree dt_model.pkl dt_tree.npz      # export step
+"""
+import argparse
+
+import numpy as np
+
+ARRAY_FIELDS = ("feature", "threshold", "children", "missing_left", "leaf_proba")
+# Training weight reaching each node; only explanations (`creditiq.treeshap`) need it.
+OPTIONAL_FIELDS = ("cover",)
+SCALAR_ROWS  = 16
+CHUNK_ROWS   = 8192
+
+
+class CompiledTree:
+    """Flat-array decision tree.
+
+    Leaves point back at themselves in `children`, so every row can take exactly
+    `depth` steps without checking whether it already reached a leaf.
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, leaf_proba,
+                 input_dtype=np.float32, cover=None):
+        self.feature      = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold    = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.children     = np.ascontiguousarray(children, dtype=np.intp)
+        self.missing_left = np.ascontiguousarray(missing_left, dtype=bool)
+        self.leaf_proba   = np.ascontiguousarray(leaf_proba, dtype=np.float64)
+        self.input_dtype  = np.dtype(input_dtype)
+        self.cover        = None if cover is None else np.ascontiguousarray(cover, dtype=np.float64)
+        self.n_features   = int(self.feature.max()) + 1 if len(self.feature) else 0
+        self.depth        = self._depth()
+
+        if self.input_dtype == np.float32:
+            # For float32 inputs, `x <= t` holds exactly when `x <= t32` with t32 the
+            # largest float32 not above t, so the hot loop can stay in float32.
+            thr = self.threshold.astype(np.float32)
+            above = thr.astype(np.float64) > self.threshold
+            thr[above] = np.nextafter(thr[above], np.float32(-np.inf))
+        else:
+            thr = self.threshold
+
+        # The vectorized loop tracks 2*node so the child slot is just `+ went_right`.
+        self._feature2   = np.repeat(self.feature, 2)
+        self._threshold2 = np.repeat(thr, 2)
+        self._children2  = 2 * self.children.ravel()
+
+        self._lists          = (self.feature.tolist(), self.threshold.tolist())
+        self._children_list  = self.children.ravel().tolist()
+        self._missing_list   = self.missing_left.tolist()
+
+    @classmethod
+    def from_sklearn(cls, clf):
+        """Flatten a fitted single-output `DecisionTreeClassifier`."""
+        t     = clf.tree_
+        left  = t.children_left.astype(np.intp)
+        right = t.children_right.astype(np.intp)
+        nodes = np.arange(t.node_count)
+        leaf  = left == -1
+
+        children = np.stack([np.where(leaf, nodes, left), np.where(leaf, nodes, right)], axis=1)
+        feature   = np.where(leaf, 0, t.feature)
+        threshold = np.where(leaf, np.inf, t.threshold)
+        missing   = getattr(t, "missing_go_to_left", None)
+        missing   = np.zeros(t.node_count, bool) if missing is None else missing.astype(bool)
+
+        proba = t.value[:, 0, :clf.n_classes_]
+        # sklearn >= 1.4 stores class fractions in `value` and returns them as-is;
+        # older trees stored weighted counts and normalized them in predict_proba.
+        totals = proba.sum(axis=1)
+        if not np.allclose(totals, 1.0):
+            totals = totals[:, None].copy()
+            totals[totals == 0.0] = 1.0
+            proba = proba / totals
+        return cls(feature, threshold, children, missing, proba, cover=t.weighted_n_node_samples)
+
+    def _depth(self):
+        depth, frontier = 0, np.array([0])
+        while True:
+            nxt = self.children[frontier].ravel()
+            nxt = nxt[nxt != np.repeat(frontier, 2)]
+            if not len(nxt):
+                return depth
+            depth, frontier = depth + 1, nxt
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in ARRAY_FIELDS + OPTIONAL_FIELDS
+                if getattr(self, name) is not None}
+
+    @classmethod
+    def from_arrays(cls, arrays, input_dtype=np.float32):
+        optional = {name: arrays[name] for name in OPTIONAL_FIELDS if name in arrays}
+        return cls(*(arrays[name] for name in ARRAY_FIELDS), input_dtype=input_dtype, **optional)
+
+    def save(self, path):
+        np.savez(path, input_dtype=self.input_dtype.str, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            dtype = str(data["input_dtype"]) if "input_dtype" in data else np.float32
+            return cls.from_arrays(data, dtype)
+
+    # ── Inference ─────────────────────────────────────────────────────────────
+    def apply(self, X):
+        """Leaf index reached by each row of `X` (n_samples × n_features)."""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X) <= SCALAR_ROWS:
+            return self._apply_scalar(X)
+
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        # NaN compares False against every threshold, so it must be routed even
+        # where `missing_left` is False: the greater-than alone would send it left.
+        any_missing = bool(np.isnan(X).any())
+        leaves = np.empty(len(X), dtype=np.intp)
+        # Chunks keep the per-level working arrays cache-resident.
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            leaves[start:start + len(chunk)] = self._apply_chunk(chunk, any_missing)
+        return leaves
+
+    def _apply_chunk(self, X, any_missing):
+        n, n_cols = X.shape
+        flat = X.ravel()
+        base = np.arange(n, dtype=np.intp) * n_cols
+
+        node2, idx = np.zeros(n, dtype=np.intp), np.empty(n, dtype=np.intp)
+        x, thr     = np.empty(n, dtype=X.dtype), np.empty(n, dtype=X.dtype)
+        right      = np.empty(n, dtype=bool)
+        for _ in range(self.depth):
+            np.take(self._feature2, node2, out=idx)
+            idx += base
+            np.take(flat, idx, out=x)
+            np.take(self._threshold2, node2, out=thr)
+            np.greater(x, thr, out=right)
+            if any_missing:
+                nan = np.isnan(x)
+                right[nan] = ~self.missing_left[node2[nan] // 2]
+            node2 += right
+            np.take(self._children2, node2, out=node2)
+        return node2 // 2
+
+    def _apply_scalar(self, X):
+        """Same traversal with Python scalars — cheaper than numpy dispatch for a few rows."""
+        feature, threshold = self._lists
+        children, missing_left = self._children_list, self._missing_list
+        leaves = []
+        for row in np.asarray(X, dtype=self.input_dtype).tolist():
+            node = 0
+            for _ in range(self.depth):
+                x = row[feature[node]]
+                if x != x:
+                    right = not missing_left[node]
+                else:
+                    right = x > threshold[node]
+                node = children[2 * node + right]
+            leaves.append(node)
+        return np.array(leaves, dtype=np.intp)
+
+    def predict_proba(self, X):
+        return self.leaf_proba[self.apply(X)]
+
+    # ── Contributions ─────────────────────────────────────────────────────────
+    def contributions(self, X, output=1):
+        """Decompose each row's `predict_proba(X)[:, output]` along its decision path.
+
+        Every split a row passes moves it from the node's value to the child's
+        (`leaf_proba` holds every node's class fractions, not just the leaves');
+        that change is credited to the split's feature. Returns `(bias, C)`: the
+        root's value and an `(n_samples, n_features)` matrix, with
+        `bias + C.sum(axis=1)` equal to the prediction up to rounding.
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        value = self.leaf_proba[:, output]
+        if len(X) <= SCALAR_ROWS:
+            return float(value[0]), self._contributions_scalar(X, value.tolist())
+
+        X = np.asarray(X, dtype=self.input_dtype)
+        if not X.flags.f_contiguous:
+            X = np.ascontiguousarray(X)
+        # NaN compares False against every threshold, so it must be routed even
+        # where `missing_left` is False: the greater-than alone would send it left.
+        any_missing = bool(np.isnan(X).any())
+        # `C` shares `X`'s memory layout, so one flat index addresses both:
+        # `encode`'s Fortran-ordered matrix is read in place, without a copy.
+        C = np.zeros(X.shape, order="F" if X.flags.f_contiguous else "C")
+        row_step, col_step = (s // X.itemsize for s in X.strides)
+        feature2 = self._feature2 * col_step
+        # Value change of every (node, went_right) slot, indexed like `_children2`.
+        delta2 = (value[self.children] - value[:, None]).ravel()
+        flat_x, flat_c = X.ravel(order="K"), C.ravel(order="K")
+        for start in range(0, len(X), CHUNK_ROWS):
+            rows = np.arange(start, min(start + CHUNK_ROWS, len(X)), dtype=np.intp) * row_step
+            self._contributions_chunk(flat_x, flat_c, rows, feature2, any_missing, delta2)
+        return float(value[0]), C
+
+    def _contributions_chunk(self, flat_x, flat_c, base, feature2, any_missing, delta2):
+        # `_apply_chunk`, plus one scatter-add of the value change per level.
+        # Leaves loop back to themselves, so rows already there add exactly 0.
+        n = len(base)
+        node2, idx = np.zeros(n, dtype=np.intp), np.empty(n, dtype=np.intp)
+        x, thr     = np.empty(n, dtype=flat_x.dtype), np.empty(n, dtype=flat_x.dtype)
+        right      = np.empty(n, dtype=bool)
+        delta      = np.empty(n)
+        for _ in range(self.depth):
+            np.take(feature2, node2, out=idx)
+            idx += base
+            np.take(flat_x, idx, out=x)
+            np.take(self._threshold2, node2, out=thr)
+            np.greater(x, thr, out=right)
+            if any_missing:
+                nan = np.isnan(x)
+                right[nan] = ~self.missing_left[node2[nan] // 2]
+            node2 += right
+            np.take(delta2, node2, out=delta)
+            flat_c[idx] += delta            # one feature per row: no repeated indices
+            np.take(self._children2, node2, out=node2)
+
+    def _contributions_scalar(self, X, value):
+        feature, threshold = self._lists
+        children, missing_left = self._children_list, self._missing_list
+        rows = []
+        for row in np.asarray(X, dtype=self.input_dtype).tolist():
+            contrib = [0.0] * len(row)
+            node = 0
+            for _ in range(self.depth):
+                x = row[feature[node]]
+                if x != x:
+                    right = not missing_left[node]
+                else:
+                    right = x > threshold[node]
+                child = children[2 * node + right]
+                contrib[feature[node]] += value[child] - value[node]
+                node = child
+            rows.append(contrib)
+        return np.array(rows, dtype=np.float64).reshape(len(X), -1)
+
+
+def main(argv=None):
+    from .scoring import load_package
+
+    parser = argparse.ArgumentParser(description="Export the package's decision tree to flat arrays.")
+    parser.add_argument("package", help="model package, e.g. dt_model.pkl")
+    parser.add_argument("output", help="destination .npz")
+    args = parser.parse_args(argv)
+
+    package = load_package(args.package)
+    if package is None:
+        parser.error(f"model package not found: {args.package}")
+    tree = CompiledTree.from_sklearn(package["model"])
+    tree.save(args.output)
+    print(f"Exported {len(tree.feature)} nodes (depth {tree.depth}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Exact Shapley values for the decision tree (path-dependent TreeSHAP).
+
+    explainer = TreeShap(scorer.fused["dt"])
+    base, phi = explainer.shap_values(X)        # phi: (n_rows, n_features)
+
+These are the Shapley values of the game TreeSHAP defines for a tree: a
+feature outside the coalition follows both children of each of its splits,
+weighted by the training cover of each child. They are additive, so
+`base + phi.sum(axis=1)` is the tree's default probability, and `base` is the
+cover-weighted mean leaf value. Brute force needs `2**n_features` coalitions
+per row; this is polynomial.
+
+Every leaf contributes on its own. Along the path to a leaf, each distinct
+feature `j` has a zero fraction `z_j` (the product of the cover ratios of its
+splits on the path) and a one fraction `o_j` (1 if the row satisfies all of
+those splits, else 0). The leaf's share of `phi_i` is
+
+    v * (o_i - z_i) * sum_k  k! (d-k-1)! / d!  *  [t^k] prod_{j != i} (z_j + o_j t)
+
+with `v` the leaf value and `d` the number of distinct features on the path.
+`path_shares` evaluates it in `O(d²)` per leaf and row, TreeSHAP's
+EXTEND/UNWIND polynomial. Because `o` is binary, a leaf's share depends on a
+row only through the `2**d` on/off pattern of its `o_j`, so for paths of up to
+`TABLE_FEATURES` distinct features the shares are computed once per pattern
+when the explainer is built. Explaining a chunk of rows is then one
+comparison per (leaf, path feature), one gather from the tables and one small
+matrix product, all vectorized over the chunk. Longer paths evaluate the
+polynomial on the chunk's rows directly.
+
+`creditiq.parallel.ParallelScorer.shap_values` spreads the rows across
+processes; `scripts/check_treeshap.py` compares against brute-force Shapley
+values, and `benchmarks/bench_treeshap.py` measures throughput.
+"""
+from math import factorial
+
+import numpy as np
+
+TABLE_FEATURES = 12       # longest path (in distinct features) that gets a pattern table
+CHUNK_ROWS     = 1024
+
+
+def shapley_weights(d):
+    """`k! (d-k-1)! / d!` for coalition sizes `k = 0 … d-1`."""
+    return np.array([factorial(k) * factorial(d - k - 1) / factorial(d) for k in range(d)])
+
+
+def path_shares(z, O):
+    """Shapley shares of each path feature for a leaf of value 1.
+
+    `z` holds the path's zero fractions `(d,)` and `O` the one fractions of
+    `m` rows or patterns `(m, d)`; returns `(m, d)`.
+    """
+    m, d = O.shape
+    # Coefficients of prod_j (z_j + o_j t), lowest degree first.
+    P = np.zeros((m, d + 1))
+    P[:, 0] = 1.0
+    for j in range(d):
+        P[:, 1:j + 2] = P[:, 1:j + 2] * z[j] + P[:, :j + 1] * O[:, j, None]
+        P[:, 0] *= z[j]
+
+    w = shapley_weights(d)
+    # o_i = 0: the factor is the constant z_i, and (o_i - z_i) / z_i = -1.
+    off = -(P[:, :d] @ w)
+    out = np.empty((m, d))
+    Q = np.empty((m, d))
+    for i in range(d):
+        # o_i = 1: divide (z_i + t) back out, from the top coefficient down.
+        Q[:, d - 1] = P[:, d]
+        for k in range(d - 1, 0, -1):
+            np.subtract(P[:, k], z[i] * Q[:, k], out=Q[:, k - 1])
+        out[:, i] = np.where(O[:, i] > 0, (1.0 - z[i]) * (Q @ w), off)
+    return out
+
+
+class TreeShap:
+    """Path-dependent TreeSHAP over a `CompiledTree`'s node arrays.
+
+    The tree needs `cover`, the training weight reaching each node: trees from
+    `CompiledTree.from_sklearn` carry it, and so do artifacts that ship
+    `dt_cover.npy`.
+    """
+
+    def __init__(self, tree, output=1, table_features=TABLE_FEATURES):
+        if tree.cover is None:
+            raise ValueError("TreeSHAP needs the tree's node cover; re-export the model "
+                             "artifact from the pickled package")
+        if not 0 <= table_features <= 16:
+            raise ValueError(f"table_features must be between 0 and 16, got {table_features}")
+        self.n_features  = tree.n_features
+        self.input_dtype = tree.input_dtype
+        value = tree.leaf_proba[:, output]
+        # Effective split thresholds in the input dtype, exactly as `CompiledTree` compares.
+        threshold = tree._threshold2[::2]
+
+        tabled, direct, base = [], [], 0.0
+        for leaf, path in self._paths(tree):
+            feats = {}                           # feature -> (lo, hi, z, nan_ok), in path order
+            for node, right, child in path:
+                f = int(tree.feature[node])
+                lo, hi, z, nan_ok = feats.get(f, (-np.inf, np.inf, 1.0, True))
+                t = threshold[node]
+                lo, hi = (max(lo, t), hi) if right else (lo, min(hi, t))
+                z *= tree.cover[child] / tree.cover[node]
+                nan_ok = nan_ok and right != bool(tree.missing_left[node])
+                feats[f] = (lo, hi, z, nan_ok)
+            base += value[leaf] * np.prod([z for _, _, z, _ in feats.values()])
+            if feats:
+                entry = (value[leaf], np.array(list(feats), dtype=np.intp),
+                         np.array(list(feats.values()), dtype=np.float64))
+                (tabled if len(feats) <= table_features else direct).append(entry)
+        self.base = float(base)
+        self._build_tables(tabled)
+        self._direct = [(v, fs, c[:, 0, None].astype(self.input_dtype),
+                         c[:, 1, None].astype(self.input_dtype), c[:, 2], c[:, 3, None].astype(bool))
+                        for v, fs, c in direct]
+
+    def _build_tables(self, tabled):
+        """Pattern tables of the tabled leaves, each padded to `width` path features.
+
+        Leaf `l`'s path feature `k` is slot `l * width + k`; its on/off bits form
+        the pattern code, and row `offset[l] + code` of `table` holds the shares.
+        """
+        sizes = np.array([len(fs) for _, fs, _ in tabled], dtype=np.intp)
+        width = int(sizes.max()) if len(sizes) else 0
+        conds = np.concatenate([c for _, _, c in tabled]) if tabled else np.zeros((0, 4))
+        self._width   = width
+        self._feature = np.concatenate([fs for _, fs, _ in tabled]) if tabled else np.zeros(0, np.intp)
+        self._lo      = conds[:, 0, None].astype(self.input_dtype)
+        self._hi      = conds[:, 1, None].astype(self.input_dtype)
+        self._nan_ok  = conds[:, 3, None].astype(bool)
+        starts        = np.cumsum(sizes) - sizes
+        self._slot    = (np.repeat(np.arange(len(sizes)) * width - starts, sizes)
+                         + np.arange(len(self._feature)))
+        self._weights = (1 << np.arange(width, dtype=np.uint16))[None, :, None]
+
+        rows, self._offset = [], np.cumsum(1 << sizes) - (1 << sizes)
+        for v, fs, c in tabled:
+            d = len(fs)
+            patterns = (np.arange(1 << d)[:, None] >> np.arange(d)) & 1
+            shares = np.zeros((1 << d, width))
+            shares[:, :d] = v * path_shares(c[:, 2], patterns.astype(np.float64))
+            rows.append(shares)
+        self._table = np.concatenate(rows) if rows else np.zeros((0, width))
+        self._scatter = np.zeros((len(sizes) * width, self.n_features))
+        self._scatter[self._slot, self._feature] = 1.0
+
+    @property
+    def nbytes(self):
+        """Memory held by the pattern tables and their scatter matrix."""
+        return self._table.nbytes + self._scatter.nbytes
+
+    @staticmethod
+    def _paths(tree):
+        """`(leaf, [(node, went_right, child), ...])` for every leaf, depth first."""
+        stack = [(0, [])]
+        while stack:
+            node, path = stack.pop()
+            left, right = tree.children[node]
+            if left == node:
+                yield node, path
+                continue
+            stack.append((int(right), path + [(node, True, int(right))]))
+            stack.append((int(left), path + [(node, False, int(left))]))
+
+    def shap_values(self, X):
+        """`(base, phi)`: expected value and `(n_rows, n_features)` Shapley values."""
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X[None, :]
+        # Feature-major, so gathering a path feature's values is a contiguous copy;
+        # free for `encode`'s Fortran-ordered matrix.
+        XT = np.ascontiguousarray(X.T)
+        phi = np.zeros((len(X), max(X.shape[1], self.n_features)))
+        any_missing = bool(np.isnan(XT).any())
+        for start in range(0, len(X), CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, len(X))
+            self._explain_chunk(XT[:, start:stop], phi[start:stop], any_missing)
+        return self.base, phi[:, :X.shape[1]]
+
+    def _explain_chunk(self, XT, phi, any_missing):
+        n = XT.shape[1]
+        if len(self._feature):
+            x  = XT[self._feature]
+            on = x > self._lo
+            on &= x <= self._hi
+            if any_missing:
+                on |= np.isnan(x) & self._nan_ok
+            bits = np.zeros((len(self._scatter), n), dtype=bool)
+            bits[self._slot] = on
+            codes = (bits.reshape(-1, self._width, n).view(np.uint8) * self._weights).sum(
+                axis=1, dtype=np.intp)
+            codes += self._offset[:, None]
+            shares = np.take(self._table, codes.T, axis=0)      # (n, leaves, width)
+            phi[:, :self.n_features] += shares.reshape(n, -1) @ self._scatter
+
+        for v, fs, lo, hi, z, nan_ok in self._direct:
+            x  = XT[fs]
+            on = (x > lo) & (x <= hi)
+            if any_missing:
+                on |= np.isnan(x) & nan_ok
+            phi[:, fs] += v * path_shares(z, on.T.astype(np.float64))
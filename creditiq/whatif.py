@@ -0,0 +1,58 @@
+"""What-if grids: one applicant's default probability over two varied inputs.
+
+    grid = sensitivity_grid(scorer, applicant, "loan_amnt($)", "loan_int_rate", model="dt")
+    grid["prob"]      # (n, n) default probabilities, rows follow grid["y"], columns grid["x"]
+
+Every cell is the applicant with the two inputs replaced. `loan_percent_income`
+is re-derived from the loan amount and income the way `CreditScorer.prepare`
+does for new applicants, and the grade follows from each cell's rate, ratio
+and credit history inside `CreditScorer.encode`. The unchanged inputs stay
+scalars and are broadcast, so the whole grid is one `encode` and one
+`predict_proba` call.
+"""
+import numpy as np
+
+from .scoring import COLUMN_ALIASES
+
+# Inputs a grid can vary: label and the `(low, high)` range around the current value.
+# Each feeds the grade, so the grid's row count follows from them.
+AXES = {
+    "loan_amnt($)":               ("Loan Amount ($)",      lambda v: (max(500.0, v * 0.2), max(v * 3.0, 5000.0))),
+    "loan_int_rate":              ("Interest Rate (%)",    lambda v: (5.0, 25.0)),
+    "cb_person_cred_hist_length": ("Credit History (yrs)", lambda v: (2.0, 30.0)),
+}
+GRID_SIZE = 50
+
+
+def axis_values(column, current, n=GRID_SIZE):
+    """`n` evenly spaced values of `column` around `current`."""
+    if column not in AXES:
+        raise ValueError(f"Cannot vary {column!r}; choose one of {', '.join(AXES)}")
+    low, high = AXES[column][1](float(current))
+    return np.linspace(low, high, n)
+
+
+def sensitivity_grid(scorer, applicant, x, y, model="dt", n=GRID_SIZE):
+    """Default probability of `applicant` over an `n` x `n` grid of inputs `x` and `y`.
+
+    Returns `x` / `y` (axis values), `prob`, `grade` and `loan_percent_income`
+    (each `(n, n)`, indexed `[y, x]`), and the applicant's own `current` point.
+    """
+    if x == y:
+        raise ValueError("x and y must be different inputs")
+    cols = {COLUMN_ALIASES.get(k, k): v for k, v in applicant.items()}
+    current = (float(cols[x]), float(cols[y]))
+    xs = axis_values(x, cols[x], n)
+    ys = axis_values(y, cols[y], n)
+    gx, gy = np.meshgrid(xs, ys)
+    cols[x], cols[y] = gx.ravel(), gy.ravel()
+    if {"person_income($)", "loan_amnt($)"} <= cols.keys():
+        cols.pop("loan_percent_income", None)     # re-derived per cell by `prepare`
+    cols = scorer.prepare(cols)
+    X, grade_idx = scorer.encode(cols)
+    prob = scorer.predict_proba(X, model)
+    lpi  = np.broadcast_to(cols["loan_percent_income"], prob.shape)
+    return {"x": xs, "y": ys, "prob": prob.reshape(n, n),
+            "grade": scorer.grade_labels[grade_idx].reshape(n, n),
+            "loan_percent_income": lpi.reshape(n, n), "current": current,
+            "threshold": scorer.thresholds[model]}
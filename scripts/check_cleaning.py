@@ -0,0 +1,154 @@
+"""Checks for the incremental cleaning pipeline (`creditiq.cleaning`).
+
+    python scripts/check_cleaning.py [--days 5] [--rows-per-day 400]
+
+Checks:
+
+* a full rebuild of `data/raw/credit_risk_dataset_raw.csv` equals the
+  committed cleaned dataset on every column the raw file has, with the
+  notebook's statistics (int rate median 10.99, amount fences -5,800 and
+  23,000, employment length median 4);
+* in a temporary copy, `--days` batches of new raw rows (resampled from the
+  raw file with jitter, missing values, out-of-range ages, outlier amounts and
+  exact duplicates) appended one run at a time give a cleaned CSV and Parquet
+  copy identical to one full rebuild with the same statistics;
+* a run interrupted after appending (cleaned rows written, state not) is
+  undone and redone by the next run; a half-written last raw line waits;
+* a raw file rewritten with the same rows (different line endings) appends
+  nothing, new rows after the rewrite are still found, and a removed
+  processed row is refused.
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq import cleaning  # noqa: E402
+from creditiq.io import read_table  # noqa: E402
+
+RAW     = os.path.join(ROOT, cleaning.RAW)
+CLEANED = os.path.join(ROOT, cleaning.CLEANED)
+NOTEBOOK_PARAMS = {"int_rate_median": 10.99, "amount_lower": -5800.0, "amount_upper": 23000.0,
+                   "emp_length_median": 4.0}
+
+
+def new_rows(raw, n, rng):
+    """`n` plausible new raw rows, with the cases each cleaning step handles."""
+    rows = raw.sample(n, replace=True, random_state=rng).reset_index(drop=True)
+    rows["person_income"] = (rows["person_income"] * rng.uniform(0.9, 1.1, n)).round()
+    rows["loan_amnt"] = (rows["loan_amnt"] * rng.uniform(0.8, 1.6, n) // 25 * 25)
+    rows.loc[rng.random(n) < 0.1, "loan_int_rate"] = np.nan
+    rows.loc[rng.random(n) < 0.05, "person_emp_length"] = np.nan
+    rows.loc[rng.random(n) < 0.01, "person_emp_length"] = 99
+    rows.loc[rng.random(n) < 0.01, "person_age"] = rng.choice([14, 123, 144])
+    rows.loc[rng.random(n) < 0.005, "loan_intent"] = np.nan
+    return pd.concat([rows, rows.iloc[:n // 50]], ignore_index=True)     # same-day duplicates
+
+
+def append_raw(path, rows):
+    with open(path, "ab") as f:
+        rows.to_csv(f, header=False, index=False, lineterminator="\r\n")
+
+
+def same_files(a, b):
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        return fa.read() == fb.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--rows-per-day", type=int, default=400)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(0)
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"{'ok  ' if ok else 'FAIL'}  {name:<52} {detail}")
+        if not ok:
+            failures.append(name)
+
+    raw_df = cleaning.parse_raw(open(RAW, "rb").read())
+    full, params, _ = cleaning.clean(raw_df)
+    committed = cleaning.read_cleaned(CLEANED)
+    problems = cleaning.compare(full, committed, cleaning.raw_columns(raw_df.columns))
+    check("full rebuild = committed cleaned dataset", not problems,
+          "; ".join(problems) or f"({len(full):,} rows)")
+    check("fitted statistics = notebook's", params == NOTEBOOK_PARAMS, str(params))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw, cleaned = os.path.join(tmp, "raw.csv"), os.path.join(tmp, "cleaned.csv")
+        ref_raw, ref_cleaned = os.path.join(tmp, "ref_raw.csv"), os.path.join(tmp, "ref.csv")
+        shutil.copy(RAW, raw)
+        cleaning.rebuild(raw, cleaned)
+        cleaning.write_table(pd.read_csv(cleaned), os.path.join(tmp, "cleaned.parquet"))
+
+        appended = 0
+        for _ in range(args.days):
+            append_raw(raw, new_rows(raw_df, args.rows_per_day, rng))
+            summary = cleaning.update(raw, cleaned)
+            appended += summary["appended"]
+        check(f"{args.days} daily runs took the append path", summary["mode"] == "append",
+              f"({appended:,} cleaned rows appended)")
+
+        shutil.copy(raw, ref_raw)
+        cleaning.rebuild(ref_raw, ref_cleaned, params=params)
+        check("incremental CSV = full rebuild, byte for byte", same_files(cleaned, ref_cleaned))
+        copy = read_table(os.path.join(tmp, "cleaned.parquet"))
+        check("incremental Parquet copy = full rebuild",
+              not cleaning.compare(pd.read_csv(ref_cleaned), copy, cleaning.COLUMNS))
+        check("--verify passes", not cleaning.verify(raw, cleaned)["problems"])
+
+        # Interrupted: the cleaned rows are appended, the state is not saved.
+        state = cleaning.load_state(cleaning.state_path(cleaned))
+        append_raw(raw, new_rows(raw_df, 50, rng))
+        cleaning.update(raw, cleaned)
+        cleaning.save_state(cleaning.state_path(cleaned), state)
+        with open(raw, "ab") as f:
+            f.write(b"33,51000,RENT,2.0,EDUCA")          # half-written line
+        summary = cleaning.update(raw, cleaned)
+        with open(raw, "ab") as f:
+            f.write(b"TION,8000,7.9,0,0.16,N,5\r\n")
+        last = cleaning.update(raw, cleaned)
+        shutil.copy(raw, ref_raw)
+        cleaning.rebuild(ref_raw, ref_cleaned, params=params)
+        check("interrupted run undone and redone", same_files(cleaned, ref_cleaned),
+              f"({summary['new_rows']} rows redone, then {last['new_rows']} completed line)")
+
+        # Same rows rewritten with different line endings: nothing new.
+        data = open(raw, "rb").read().replace(b"\r\n", b"\n")
+        open(raw, "wb").write(data)
+        summary = cleaning.update(raw, cleaned)
+        check("rewritten raw file appends nothing", summary["mode"] == "rescan" and not summary["new_rows"],
+              f"({summary['mode']}, {summary['new_rows']} new)")
+        extra = new_rows(raw_df, 30, rng)
+        append_raw(raw, extra)
+        summary = cleaning.update(raw, cleaned)
+        check("rows appended after the rewrite found", summary["new_rows"] == len(extra),
+              f"({summary['new_rows']} of {len(extra)})")
+        problems = cleaning.verify(raw, cleaned)["problems"]
+        check("--verify passes after the rewrite", not problems, "; ".join(problems))
+
+        lines = open(raw, "rb").read().split(b"\n")
+        open(raw, "wb").write(b"\n".join(lines[:100] + lines[101:]))
+        try:
+            cleaning.update(raw, cleaned)
+            check("removed processed row refused", False)
+        except ValueError as e:
+            check("removed processed row refused", "--rebuild" in str(e))
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
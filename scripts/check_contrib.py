@@ -0,0 +1,111 @@
+"""Checks for per-applicant contributions (`CreditScorer.contributions`).
+
+    python scripts/check_contrib.py [--model-path dt_model.pkl]
+
+The references are built from the package's sklearn models on all rows of
+the cleaned dataset. Checks:
+
+* decision tree: contributions equal a per-row walk of sklearn's
+  `decision_path` over `tree_.value`, crediting each split's change in
+  default probability to its feature, on every row;
+* decision tree: base rate plus contributions equals the default probability;
+* logistic regression: contributions equal `coef_ × scaler.transform(X)`
+  summed per input, and base plus contributions equals the log-odds;
+* the scalar (few-row) paths agree with the vectorized ones;
+* `CreditScorer.score(..., contributions=True)` columns match.
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.scoring import CreditScorer, load_package  # noqa: E402
+
+DATA = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+
+
+def path_contributions(tree, Z):
+    """Reference tree decomposition from sklearn's own decision paths, one row at a time."""
+    t, paths = tree.tree_, tree.decision_path(Z)
+    value = t.value[:, 0, 1] / t.value[:, 0, :].sum(axis=1)
+    C = np.zeros(Z.shape)
+    for i in range(len(Z)):
+        nodes = paths.indices[paths.indptr[i]:paths.indptr[i + 1]]
+        for parent, child in zip(nodes[:-1], nodes[1:]):
+            C[i, t.feature[parent]] += value[child] - value[parent]
+    return value[0], C
+
+
+def by_input(package, inputs, C):
+    """Sum feature-level contributions into inputs: `get_dummies` columns into their categorical."""
+    features, cat_cols = package["feature_columns"], package["cat_cols"]
+    return np.column_stack([
+        C[:, [j for j, f in enumerate(features)
+              if f == name or (name in cat_cols and f.startswith(f"{name}_"))]].sum(axis=1)
+        for name in inputs])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=os.path.join(ROOT, "dt_model.pkl"))
+    parser.add_argument("--data", default=DATA)
+    parser.add_argument("--tol", type=float, default=1e-12)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", module="sklearn")
+
+    package = load_package(args.model_path)
+    if package is None:
+        parser.error(f"model package not found: {args.model_path}")
+    scorer = CreditScorer(package)
+    df     = pd.read_csv(args.data)
+    X, _   = scorer.encode(df)
+    Z      = package["scaler"].transform(pd.DataFrame(X, columns=scorer.feature_columns))
+    inputs = scorer.contribution_inputs
+    failures = []
+
+    def check(name, diff, detail=""):
+        ok = diff <= args.tol
+        print(f"{'ok  ' if ok else 'FAIL'}  {name:<42} max |diff| {diff:.2e} {detail}")
+        if not ok:
+            failures.append(name)
+
+    base, C = scorer.contributions(X, "dt")
+    ref_base, ref_C = path_contributions(package["model"], Z)
+    ref_C = by_input(package, inputs, ref_C)
+    check("tree vs sklearn decision_path", max(abs(base - ref_base), np.abs(C - ref_C).max()),
+          f"({len(X):,} rows)")
+    check("tree, base + contributions = prob",
+          np.abs(base + C.sum(axis=1) - scorer.predict_proba(X, "dt")).max())
+
+    lr = package["lr_model"]
+    base, C = scorer.contributions(X, "lr")
+    ref_C = by_input(package, inputs, lr.coef_.ravel() * Z)
+    check("logistic vs coef_ × scaled value",
+          max(abs(base - lr.intercept_[0]), np.abs(C - ref_C).max()))
+    check("logistic, base + contributions = log-odds",
+          np.abs(base + C.sum(axis=1) - lr.decision_function(Z)).max())
+
+    for model in ("dt", "lr"):
+        few = scorer.contributions(X[:10], model)[1]
+        check(f"{model}, scalar path vs vectorized",
+              np.abs(few - scorer.contributions(X, model)[1][:10]).max())
+
+    scored = scorer.score(df, contributions=True)
+    diff = max(np.abs(scored[f"{m}_contrib_{col}"] - scorer.contributions(X, m)[1][:, k]).max()
+               for m in ("dt", "lr") for k, col in enumerate(inputs))
+    check("score(contributions=True) columns", diff)
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
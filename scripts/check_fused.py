@@ -0,0 +1,109 @@
+"""Equivalence checks: fused models vs the package's `scaler` + `model` / `lr_model`.
+
+    python scripts/check_fused.py [--model-path dt_model.pkl]
+
+The reference is the original app pipeline — `get_dummies` on the cleaned
+dataset, `scaler.transform`, then sklearn `predict_proba` — run on all rows.
+Checks:
+
+* fused decision tree: probabilities bit-identical on the full dataset;
+* fused decision tree at the edges: every split's raw threshold and its float64
+  neighbours, substituted into real rows, take the same path as sklearn;
+* fused logistic regression: probabilities within `--lr-tol`, and identical
+  decisions at the package threshold;
+* `CreditScorer.score` end to end against the reference.
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.fused import fuse_package  # noqa: E402
+from creditiq.scoring import CreditScorer, load_package  # noqa: E402
+
+DATA = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+
+
+def reference_matrix(package, df):
+    """Unscaled feature matrix built the way the notebook and original app did."""
+    X = pd.get_dummies(df.drop(columns=["loan_status", "loan_grade"], errors="ignore"),
+                       columns=package["cat_cols"], drop_first=True)
+    return X.reindex(columns=package["feature_columns"], fill_value=0).astype(float)
+
+
+def edge_rows(tree, X, rng, per_split=4):
+    """Real rows with one feature replaced by a split's raw threshold or its neighbours."""
+    internal = np.flatnonzero(np.isfinite(tree.threshold))
+    rows = []
+    for node in internal:
+        j, T = tree.feature[node], tree.threshold[node]
+        for value in (np.nextafter(T, -np.inf), T, np.nextafter(T, np.inf)):
+            block = X[rng.integers(0, len(X), per_split)].copy()
+            block[:, j] = value
+            rows.append(block)
+    return np.vstack(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=os.path.join(ROOT, "dt_model.pkl"))
+    parser.add_argument("--data", default=DATA)
+    parser.add_argument("--lr-tol", type=float, default=1e-12)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", module="sklearn")
+
+    package = load_package(args.model_path)
+    if package is None:
+        parser.error(f"model package not found: {args.model_path}")
+    scaler, dt, lr = package["scaler"], package["model"], package["lr_model"]
+    fused  = fuse_package(package)
+    df     = pd.read_csv(args.data)
+    X_df   = reference_matrix(package, df)
+    X      = X_df.to_numpy()
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{'ok  ' if ok else 'FAIL'}  {name:<34} {detail}")
+        if not ok:
+            failures.append(name)
+
+    ref_dt = dt.predict_proba(scaler.transform(X_df))
+    got_dt = fused["dt"].predict_proba(X)
+    check("decision tree, full dataset", np.array_equal(ref_dt, got_dt),
+          f"{len(X):,} rows, {int((ref_dt != got_dt).any(axis=1).sum())} differ")
+
+    edges = edge_rows(fused["dt"], X, np.random.default_rng(0))
+    ref_e = dt.predict_proba(scaler.transform(pd.DataFrame(edges, columns=X_df.columns)))
+    got_e = fused["dt"].predict_proba(edges)
+    check("decision tree, split boundaries", np.array_equal(ref_e, got_e),
+          f"{len(edges):,} rows, {int((ref_e != got_e).any(axis=1).sum())} differ")
+
+    thr    = package.get("lr_threshold", 0.35)
+    ref_lr = lr.predict_proba(scaler.transform(X_df))[:, 1]
+    got_lr = fused["lr"].predict_proba(X)[:, 1]
+    diff   = float(np.abs(ref_lr - got_lr).max())
+    check("logistic regression, probabilities", diff <= args.lr_tol,
+          f"max |diff| {diff:.2e} (tol {args.lr_tol:.0e})")
+    flips = int(((ref_lr >= thr) != (got_lr >= thr)).sum())
+    check("logistic regression, decisions", flips == 0, f"{flips} flipped at threshold {thr}")
+
+    scored = CreditScorer(package).score(df)
+    check("CreditScorer.score, tree", np.array_equal(scored["dt_default_prob"], ref_dt[:, 1]),
+          "bit-identical" if np.array_equal(scored["dt_default_prob"], ref_dt[:, 1]) else "differs")
+    diff = float(np.abs(scored["lr_default_prob"] - ref_lr).max())
+    check("CreditScorer.score, logistic", diff <= args.lr_tol, f"max |diff| {diff:.2e}")
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
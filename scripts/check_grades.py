@@ -0,0 +1,117 @@
+"""Equivalence checks: `derive_grades` (searchsorted) vs the original if/elif ladder.
+
+    python scripts/check_grades.py
+
+The reference is the Predict page's original per-applicant ladder, evaluated
+in plain Python floats. Checks:
+
+* risk scores at every breakpoint, one ulp either side, ±1e-9 away, the
+  midpoints between breakpoints, ±inf and NaN;
+* applicant inputs whose score lands exactly on a breakpoint through the
+  real `int_rate*2 + pct_income*100 - cred_hist` arithmetic, plus near misses;
+* every row of the cleaned dataset;
+* custom breakpoints and labels from a package, including rejection of
+  unsorted breakpoints.
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.scoring import GRADE_BREAKPOINTS, GRADES, derive_grades, grade_table  # noqa: E402
+
+DATA = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+
+
+def ladder(loan_int_rate, loan_percent_income, cred_hist):
+    """The original Predict-page code, one applicant at a time."""
+    risk_score = (loan_int_rate * 2) + (loan_percent_income * 100) - cred_hist
+    if risk_score <= 25:   derived_grade = "A"
+    elif risk_score <= 35: derived_grade = "B"
+    elif risk_score <= 45: derived_grade = "C"
+    elif risk_score <= 55: derived_grade = "D"
+    elif risk_score <= 65: derived_grade = "E"
+    elif risk_score <= 75: derived_grade = "F"
+    else:                  derived_grade = "G"
+    return derived_grade
+
+
+def compare(rate, pct, hist):
+    rate, pct, hist = (np.asarray(a, dtype=float) for a in (rate, pct, hist))
+    got  = GRADES[derive_grades(rate, pct, hist)]
+    want = np.array([ladder(r, p, h) for r, p, h in zip(rate.tolist(), pct.tolist(), hist.tolist())])
+    return len(want), int((got != want).sum())
+
+
+def score_values():
+    """Risk scores around every breakpoint; halved, they go in as the interest rate (exactly)."""
+    values = [-np.inf, np.inf, np.nan, -1e9, 0.0, 1e9]
+    for b in GRADE_BREAKPOINTS:
+        values += [b, np.nextafter(b, -np.inf), np.nextafter(b, np.inf), b - 1e-9, b + 1e-9]
+    values += [(a + b) / 2 for a, b in zip(GRADE_BREAKPOINTS, GRADE_BREAKPOINTS[1:])]
+    return np.array(values)
+
+
+def boundary_inputs():
+    """Applicant inputs whose computed score is at or within rounding of a breakpoint."""
+    rates = np.round(np.arange(5.0, 24.01, 0.01), 2)
+    # loan_percent_income is rounded to 4 decimals upstream; a 4-decimal grid
+    # gives scores a rounding error away from a breakpoint as well as exact hits.
+    pcts  = np.round(np.arange(0.0, 0.831, 0.0007), 4)
+    hists = np.arange(2, 31)
+    rows  = []
+    for pct, hist in itertools.product(pcts, hists):
+        score = rates * 2 + pct * 100 - hist
+        near  = np.abs(score[:, None] - np.array(GRADE_BREAKPOINTS)[None, :]).min(axis=1) <= 0.011
+        for rate in rates[near]:
+            rows.append((rate, pct, hist))
+    return np.array(rows).T
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DATA)
+    args = parser.parse_args(argv)
+    failures = []
+
+    def check(name, n, bad):
+        print(f"{'ok  ' if not bad else 'FAIL'}  {name:<40} {n:>9,} cases, {bad} differ")
+        if bad:
+            failures.append(name)
+
+    scores = score_values()
+    zeros  = np.zeros_like(scores)
+    check("scores at breakpoints", *compare(scores / 2, zeros, zeros))
+
+    rate, pct, hist = boundary_inputs()
+    exact = int(np.isin(rate * 2 + pct * 100 - hist, GRADE_BREAKPOINTS).sum())
+    n, bad = compare(rate, pct, hist)
+    check(f"inputs near breakpoints ({exact:,} exact)", n, bad)
+
+    df = pd.read_csv(args.data)
+    check("cleaned dataset", *compare(df["loan_int_rate"], df["loan_percent_income"],
+                                      df["cb_person_cred_hist_length"]))
+
+    bps, labels = grade_table({"grade_breakpoints": [10, 20], "grade_labels": ["low", "mid", "high"]})
+    got = labels[derive_grades(np.array([5, 10, 10.5, 20, 21]) / 2, 0, 0, bps)]
+    check("package breakpoints", 5, int((got != ["low", "low", "mid", "mid", "high"]).sum()))
+    try:
+        grade_table({"grade_breakpoints": [20, 10]})
+        check("unsorted breakpoints rejected", 1, 1)
+    except ValueError:
+        check("unsorted breakpoints rejected", 1, 0)
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
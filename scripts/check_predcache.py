@@ -0,0 +1,196 @@
+"""Checks when the Predict page's prediction cache may and may not serve a result.
+
+    python scripts/check_predcache.py [--model-path model_artifact] [--pickle-path dt_model.pkl]
+
+Drives `PredictionCache.score_one` with a fake clock against scorers loaded
+by a `ModelRegistry` over a throwaway copy of the bundled artifact:
+
+* applicants that encode to the same feature row (raw column aliases,
+  `loan_percent_income` derived instead of given, -0.0 for 0.0) hit one
+  entry, and a hit equals uncached `score_one`;
+* after the version's manifest is rewritten in place with a new threshold
+  and the registry reloads it, the same applicant misses and gets the new
+  decision;
+* a different version misses too;
+* in the default layout, `model_artifact/` as the registry's fallback next
+  to the `dt_model.pkl` it was converted from, retraining only the pickle
+  (a new threshold) makes the registry reload: the same applicant misses and
+  gets the pickle's decision, and regenerating the artifact reloads again;
+* entries expire `ttl` seconds after they were computed, and the least
+  recently used entry is evicted once `max_entries` or `max_bytes` is passed.
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.artifact import MANIFEST, convert  # noqa: E402
+from creditiq.predcache import PredictionCache  # noqa: E402
+from creditiq.registry import SMOKE_APPLICANTS, ModelRegistry  # noqa: E402
+from creditiq.scoring import load_package  # noqa: E402
+from creditiq.train import save_package  # noqa: E402
+
+APPLICANT = SMOKE_APPLICANTS[1]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def aliased(applicant):
+    """Same applicant under the raw column names, with `loan_percent_income` left to be derived."""
+    out = {k: v for k, v in applicant.items() if k != "loan_percent_income"}
+    out["person_income"] = out.pop("person_income($)")
+    out["loan_amnt"]     = out.pop("loan_amnt($)")
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=os.path.join(ROOT, "model_artifact"))
+    parser.add_argument("--pickle-path", default=os.path.join(ROOT, "dt_model.pkl"),
+                        help="the pickle --model-path was converted from")
+    args = parser.parse_args(argv)
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"{'ok  ' if ok else 'FAIL'}  {name:<52} {detail}")
+        if not ok:
+            failures.append(name)
+
+    def counts(cache):
+        s = cache.stats()
+        return s["hits"], s["misses"], s["evictions"], s["expirations"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models = os.path.join(tmp, "models")
+        os.makedirs(models)
+        shutil.copytree(args.model_path, os.path.join(models, "v1"))
+        registry = ModelRegistry(models)
+        scorer   = registry.current
+        clock    = Clock()
+        cache    = PredictionCache(ttl=60, clock=clock)
+
+        # ── Identical encoded rows ──
+        first = cache.score_one(scorer, APPLICANT)
+        check("first lookup misses", counts(cache) == (0, 1, 0, 0))
+        check("miss equals uncached score_one", first == scorer.score_one(APPLICANT))
+        same = [aliased(APPLICANT),
+                {**APPLICANT, "loan_percent_income": round(APPLICANT["loan_amnt($)"]
+                                                           / APPLICANT["person_income($)"], 4)},
+                {**APPLICANT, "person_emp_length": float(APPLICANT["person_emp_length"])}]
+        hits = [cache.score_one(scorer, a) for a in same]
+        check("same encoded row hits", counts(cache) == (3, 1, 0, 0), f"(hits, misses) {counts(cache)[:2]}")
+        check("hits equal uncached score_one", all(h == first for h in hits))
+        zero = {**APPLICANT, "person_emp_length": 0.0}
+        cache.score_one(scorer, zero)
+        cache.score_one(scorer, {**zero, "person_emp_length": -0.0})
+        check("-0.0 shares the 0.0 entry", counts(cache)[:2] == (4, 2))
+        hits[0]["pred"] = "mutated"
+        check("returned dicts are copies", cache.score_one(scorer, APPLICANT) == first)
+
+        # ── Threshold rewritten in place ──
+        # Just past the applicant's probability, so the decision flips.
+        path = os.path.join(models, "v1", MANIFEST)
+        with open(path) as f:
+            manifest = json.load(f)
+        manifest["thresholds"]["dt"] = first["default_prob"] + (1e-6 if first["pred"] == 1 else -1e-6)
+        with open(path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.utime(path, (os.path.getmtime(path) + 1,) * 2)   # a new mtime even on coarse clocks
+        registry.refresh()
+        reloaded = registry.current
+        check("registry reloaded the rewritten version",
+              reloaded.version == "v1" and reloaded.load_id != scorer.load_id
+              and reloaded.thresholds["dt"] == manifest["thresholds"]["dt"])
+        misses = counts(cache)[1]
+        after = cache.score_one(reloaded, APPLICANT)
+        check("threshold change misses", counts(cache)[1] == misses + 1)
+        check("new threshold's decision served", after["pred"] == 1 - first["pred"]
+              and after == reloaded.score_one(APPLICANT), f"pred {first['pred']} -> {after['pred']}")
+        check("old load still hits its own entry", cache.score_one(scorer, APPLICANT) == first
+              and counts(cache)[1] == misses + 1)
+
+        # ── Version change ──
+        shutil.copytree(args.model_path, os.path.join(models, "v2"))
+        registry.refresh()
+        check("version change misses", registry.version == "v2"
+              and cache.score_one(registry.current, APPLICANT)["model_version"] == "v2"
+              and counts(cache)[1] == misses + 2)
+
+        # ── TTL expiry ──
+        clock.now += 59.9
+        cache.score_one(scorer, APPLICANT)
+        check("entry served just before ttl", counts(cache)[3] == 0)
+        clock.now += 0.2
+        cache.score_one(scorer, APPLICANT)
+        check("entry expires after ttl", counts(cache)[3] == 1 and counts(cache)[1] == misses + 3)
+
+        # ── Retrained dt_model.pkl behind model_artifact/ ──
+        default = os.path.join(tmp, "default")
+        os.makedirs(default)
+        pickle_path   = shutil.copy(args.pickle_path, os.path.join(default, "dt_model.pkl"))
+        artifact_path = shutil.copytree(args.model_path, os.path.join(default, "model_artifact"))
+        fallback = ModelRegistry(os.path.join(default, "models"), fallback=artifact_path)
+        served   = fallback.current
+        cache    = PredictionCache(clock=clock)
+        first    = cache.score_one(served, APPLICANT)
+        check("bundled artifact served, not stale", served.version == "model_artifact"
+              and not fallback.stale)
+        package = load_package(pickle_path)
+        package["dt_threshold"] = first["default_prob"] + (1e-6 if first["pred"] == 1 else -1e-6)
+        save_package(package, pickle_path)            # retrained in the notebook, artifact left as is
+        os.utime(pickle_path, (os.path.getmtime(pickle_path) + 1,) * 2)
+        fallback.refresh()
+        retrained = fallback.current
+        check("pickle retrain reloads the artifact version",
+              retrained.load_id != served.load_id and "model_artifact" in fallback.stale
+              and retrained.thresholds["dt"] == package["dt_threshold"])
+        after = cache.score_one(retrained, APPLICANT)
+        check("pickle retrain misses", counts(cache)[:2] == (0, 2))
+        check("retrained pickle's decision served", after["pred"] == 1 - first["pred"])
+        convert(package, artifact_path, source=pickle_path, overwrite=True)
+        fallback.refresh()
+        check("regenerated artifact reloads, no longer stale",
+              fallback.current.load_id != retrained.load_id and not fallback.stale
+              and cache.score_one(fallback.current, APPLICANT)["pred"] == after["pred"]
+              and counts(cache)[:2] == (0, 3))
+
+        # ── Eviction ──
+        small = PredictionCache(max_entries=2, clock=clock)
+        applicants = [{**APPLICANT, "person_age": age} for age in (30, 31, 32)]
+        small.score_one(scorer, applicants[0])
+        small.score_one(scorer, applicants[1])
+        small.score_one(scorer, applicants[0])          # 0 is now the most recently used
+        small.score_one(scorer, applicants[2])          # evicts 1
+        before = counts(small)
+        small.score_one(scorer, applicants[0])
+        small.score_one(scorer, applicants[1])
+        check("max_entries evicts least recently used",
+              before[2] == 1 and counts(small)[:2] == (before[0] + 1, before[1] + 1)
+              and small.stats()["entries"] == 2)
+        one_entry = small.stats()["bytes"] // 2
+        sized = PredictionCache(max_bytes=int(one_entry * 2.5), clock=clock)
+        for a in applicants:
+            sized.score_one(scorer, a)
+        stats = sized.stats()
+        check("max_bytes bounds the cache", stats["evictions"] == 1 and stats["entries"] == 2
+              and stats["bytes"] <= sized.max_bytes, f"{stats['bytes']:,} bytes")
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Checks the model registry's version swaps, rollback pin and validation.
+
+    python scripts/check_registry.py [--model-path model_artifact]
+
+Builds a throwaway `models/` root from copies of the bundled artifact and
+drives `ModelRegistry.refresh()` directly, as the watcher thread would:
+
+* a new version directory is loaded and swapped in, while a scorer taken
+  before the swap keeps serving the old version;
+* `rollback(persist=True)` writes the `ACTIVE` pin, survives the next
+  refresh and is followed by a second registry on the same root; `unpin()`
+  returns to the newest version;
+* a version with a corrupted array (checksum mismatch), different feature
+  columns or non-finite predictions is rejected and the active version
+  keeps serving.
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.artifact import MANIFEST, _sha256  # noqa: E402
+from creditiq.registry import PIN_FILE, SMOKE_APPLICANTS, ModelRegistry  # noqa: E402
+
+
+def add_version(models, name, source, edit=None):
+    """Copy `source` in as version `name`, applying `edit(path, manifest)` first.
+
+    The copy is assembled under a `.tmp-` name and renamed into place, as a
+    deployment would, so the registry never sees it half-written.
+    """
+    tmp = os.path.join(models, f"{name}.tmp-{os.getpid()}")
+    shutil.copytree(source, tmp)
+    if edit is not None:
+        with open(os.path.join(tmp, MANIFEST)) as f:
+            manifest = json.load(f)
+        edit(tmp, manifest)
+        with open(os.path.join(tmp, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(models, name))
+
+
+def rejection(registry, version):
+    return next((e["detail"] for e in reversed(registry.history)
+                 if e["event"] == "rejected" and e["version"] == version), None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=os.path.join(ROOT, "model_artifact"))
+    args = parser.parse_args(argv)
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"{'ok  ' if ok else 'FAIL'}  {name:<52} {detail}")
+        if not ok:
+            failures.append(name)
+
+    def corrupt(path, manifest):
+        with open(os.path.join(path, "dt_threshold.npy"), "r+b") as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b"\xff" * 8)
+
+    def rename_feature(path, manifest):
+        manifest["feature_columns"][0] = "applicant_age"
+
+    def nan_intercept(path, manifest):
+        # A consistent artifact (checksums updated) whose model is broken.
+        spec = manifest["arrays"]["lr_intercept"]
+        np.save(os.path.join(path, spec["file"]), np.full(1, np.nan), allow_pickle=False)
+        spec["sha256"] = _sha256(os.path.join(path, spec["file"]))
+
+    applicant = {k: [v] for k, v in SMOKE_APPLICANTS[1].items()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models = os.path.join(tmp, "models")
+        os.makedirs(models)
+        add_version(models, "v1", args.model_path)
+        registry = ModelRegistry(models)
+        check("first version served", registry.version == "v1")
+
+        # ── New version swap ──
+        before = registry.current
+        add_version(models, "v2", args.model_path,
+                    lambda path, m: m["thresholds"].update(dt=0.5))
+        changed = registry.refresh()
+        check("new version swapped in", changed and registry.version == "v2",
+              f"active {registry.version}, versions {registry.versions()}")
+        check("new version's manifest served", registry.current.thresholds["dt"] == 0.5)
+        check("scorer taken before the swap still scores",
+              before.version == "v1" and before.thresholds["dt"] == 0.35
+              and len(before.score(applicant)["dt_pred"]) == 1)
+        check("unchanged versions not reloaded", not registry.refresh()
+              and sum(e["event"] == "loaded" for e in registry.history) == 2)
+
+        # ── Rollback pin ──
+        target = registry.rollback(persist=True)
+        with open(os.path.join(models, PIN_FILE)) as f:
+            pin = f.read().strip()
+        check("rollback(persist=True) serves and pins v1", target == registry.version == pin == "v1")
+        check("rollback survives refresh", not registry.refresh() and registry.version == "v1")
+        other = ModelRegistry(models)
+        check("second registry on the root follows the pin", other.version == "v1")
+        add_version(models, "v3", args.model_path)
+        registry.refresh()
+        check("newer version does not override the pin", registry.version == "v1"
+              and "v3" in registry.versions())
+        registry.unpin()
+        check("unpin() serves the newest version", registry.version == "v3" and registry.pinned() is None)
+
+        # ── Rejected versions ──
+        for name, edit, expect in (("v4", corrupt, "checksum mismatch"),
+                                   ("v5", rename_feature, "feature columns differ"),
+                                   ("v6", nan_intercept, "smoke test failed")):
+            add_version(models, name, args.model_path, edit)
+            changed = registry.refresh()
+            detail = rejection(registry, name) or ""
+            check(f"{edit.__name__} version rejected", expect in detail, detail[:60])
+            check(f"{edit.__name__}: active version unchanged",
+                  not changed and registry.version == "v3" and name not in registry.versions())
+        check("rejected versions not retried", not registry.refresh()
+              and sum(e["event"] == "rejected" for e in registry.history) == 3)
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Checks `CompiledTree` traversal, in particular how missing values are routed.
+
+    python scripts/check_tree.py [--model-path dt_model.pkl]
+
+Every tree is checked on rows with NaNs injected, through both inference
+paths: the vectorized one (batches over `SCALAR_ROWS`) and the scalar one
+(batches of one row). Checks:
+
+* package tree as trained (float32 on scaled features), fused (float64 on
+  raw features) and a synthetic tree trained with missing values: both paths
+  reach the same leaves and contributions, and the sklearn trees reach
+  sklearn's own `apply` leaves;
+* the synthetic tree with every node's missing-value direction rewritten to
+  right, then to left: both paths agree and reach sklearn's leaves. With
+  every `missing_left` False no node sends NaN left, so the vectorized path
+  must still route NaN rather than leave it to `x > threshold`.
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import copy
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.scoring import CreditScorer, load_package  # noqa: E402
+from creditiq.tree import SCALAR_ROWS, CompiledTree  # noqa: E402
+
+DATA = os.path.join(ROOT, "data", "cleaned", "cleaned_credit_risk.csv")
+
+
+def with_nans(X, rate, seed=0):
+    X = np.array(X, dtype=np.float64)
+    X[np.random.default_rng(seed).random(X.shape) < rate] = np.nan
+    return X
+
+
+def synthetic(seed=0):
+    """A tree trained with missing values, so `missing_left` mixes True and False."""
+    from sklearn.tree import DecisionTreeClassifier
+    rng = np.random.default_rng(seed)
+    X = with_nans(rng.normal(size=(4000, 6)), 0.1, seed)
+    y = (np.nan_to_num(X[:, 0]) + np.nan_to_num(X[:, 1]) * np.nan_to_num(X[:, 2]) > 0).astype(int)
+    return DecisionTreeClassifier(max_depth=10, min_samples_leaf=5, random_state=seed).fit(X, y), X
+
+
+def routed(clf, missing_left):
+    """A copy of `clf` with every node's missing-value direction set to `missing_left`."""
+    clf   = copy.deepcopy(clf)
+    state = clf.tree_.__getstate__()
+    state["nodes"]["missing_go_to_left"][:] = missing_left
+    clf.tree_.__setstate__(state)
+    return clf
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=os.path.join(ROOT, "dt_model.pkl"))
+    parser.add_argument("--data", default=DATA)
+    parser.add_argument("--rows", type=int, default=2000, help="rows checked per tree")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", module="sklearn")
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"{'ok  ' if ok else 'FAIL'}  {name:<52} {detail}")
+        if not ok:
+            failures.append(name)
+
+    def both_paths(name, tree, X):
+        leaves = tree.apply(X)
+        scalar = np.concatenate([tree.apply(row) for row in X])
+        check(f"{name}: vectorized leaves = scalar", len(X) > SCALAR_ROWS and np.array_equal(leaves, scalar),
+              f"{int((leaves != scalar).sum())} of {len(X):,} rows differ")
+        base, C = tree.contributions(X)
+        rows    = [tree.contributions(row) for row in X]
+        check(f"{name}: vectorized contributions = scalar",
+              all(b == base for b, _ in rows) and np.array_equal(C, np.vstack([c for _, c in rows])))
+        return leaves
+
+    package = load_package(args.model_path)
+    if package is None:
+        parser.error(f"model package not found: {args.model_path}")
+    scorer = CreditScorer(package)
+    X, _   = scorer.encode(pd.read_csv(args.data).head(args.rows))
+    X      = with_nans(X, 0.05)
+    Z      = scorer.transform(X)
+
+    # ── Package trees ──
+    leaves = both_paths("as-trained tree", CompiledTree.from_sklearn(package["model"]), Z)
+    check("as-trained tree: leaves = sklearn apply",
+          np.array_equal(leaves, package["model"].apply(Z.astype(np.float32))))
+    both_paths("fused tree", scorer.fused["dt"], X)
+
+    # ── Synthetic tree, mixed and uniform missing_left ──
+    clf, S = synthetic()
+    for name, model in (("synthetic tree", clf),
+                        ("missing_left all False", routed(clf, False)),
+                        ("missing_left all True", routed(clf, True))):
+        tree   = CompiledTree.from_sklearn(model)
+        leaves = both_paths(name, tree, S)
+        check(f"{name}: leaves = sklearn apply", np.array_equal(leaves, model.apply(S.astype(np.float32))),
+              f"missing_left {int(tree.missing_left.sum())} of {len(tree.missing_left)} nodes")
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Checks that applicants with missing inputs are left unscored, never approved.
+
+    python scripts/check_unscored.py [--model-path model_artifact] [--workers 2]
+
+The raw dataset has missing `person_emp_length` and `loan_int_rate` values,
+which give the logistic regression a NaN probability. Checks, on every raw row:
+
+* `CreditScorer.score`: wherever a model's probability is NaN its `pred` and
+  `risk_level` are None, and everywhere else they match the threshold and the
+  risk bands;
+* `CreditScorer.records` (the single-applicant and HTTP path): unscored rows
+  have None for `default_prob`, `pred`, `confidence` and the risk level;
+* `ParallelScorer.score` agrees with `CreditScorer.score`;
+* the batch CLI's CSV and Parquet output keep unscored decisions empty, and
+  report how many rows were left unscored.
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from creditiq.batch import score_file  # noqa: E402
+from creditiq.io import read_table  # noqa: E402
+from creditiq.parallel import ParallelScorer  # noqa: E402
+from creditiq.scoring import MODEL_KEYS, RISK_CUTOFFS, CreditScorer  # noqa: E402
+
+RAW = os.path.join(ROOT, "data", "raw", "credit_risk_dataset_raw.csv")
+
+
+def expected(prob, threshold):
+    """`(pred, risk_level)` written out one row at a time, None when unscored."""
+    pred, level = [], []
+    for p in prob:
+        if np.isnan(p):
+            pred.append(None)
+            level.append(None)
+            continue
+        pred.append(int(p >= threshold))
+        level.append("LOW RISK" if p < RISK_CUTOFFS[0] else "MEDIUM RISK" if p < RISK_CUTOFFS[1]
+                     else "HIGH RISK")
+    return pred, level
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=os.path.join(ROOT, "model_artifact"))
+    parser.add_argument("--data", default=RAW)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", module="sklearn")
+
+    scorer = CreditScorer.from_path(args.model_path)
+    df     = pd.read_csv(args.data)
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"{'ok  ' if ok else 'FAIL'}  {name:<52} {detail}")
+        if not ok:
+            failures.append(name)
+
+    out = scorer.score(df)
+    unscored = {key: np.isnan(out[f"{key}_default_prob"]) for key in MODEL_KEYS}
+    check("raw data has unscored rows", unscored["lr"].any(),
+          ", ".join(f"{key} {mask.sum():,}" for key, mask in unscored.items()))
+    for key in MODEL_KEYS:
+        pred, level = expected(out[f"{key}_default_prob"], scorer.thresholds[key])
+        check(f"score(): {key} pred and risk level", list(out[f"{key}_pred"]) == pred
+              and list(out[f"{key}_risk_level"]) == level)
+
+    records = scorer.records(*scorer.encode(df), df["loan_percent_income"], "lr")
+    nulls = ("default_prob", "pred", "confidence", "risk_level", "risk_class")
+    rows = np.flatnonzero(unscored["lr"])
+    check("records(): unscored rows are all None",
+          all(records[i][k] is None for i in rows for k in nulls), f"({len(rows):,} rows)")
+    check("records(): scored rows match score()",
+          all(records[i]["pred"] == out["lr_pred"][i] for i in np.flatnonzero(~unscored["lr"])))
+
+    with ParallelScorer(scorer, workers=args.workers) as pool:
+        pooled = pool.score(df)
+    check(f"ParallelScorer.score ({args.workers} workers) = score()",
+          all(list(pooled[c]) == list(out[c]) for c in out if not c.endswith("_default_prob"))
+          and all(np.array_equal(pooled[c], out[c], equal_nan=True) for c in out if c.endswith("_default_prob")))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ("csv", "parquet"):
+            dst = os.path.join(tmp, f"scored.{ext}")
+            stats = score_file(scorer, args.data, dst, chunk_rows=5_000)
+            written = read_table(dst)
+            empty = all(written.loc[unscored[key], [f"{key}_pred", f"{key}_risk_level"]].isna().all(axis=None)
+                        and written.loc[~unscored[key], f"{key}_pred"].notna().all()
+                        for key in MODEL_KEYS)
+            check(f"batch {ext}: unscored decisions empty", empty,
+                  f"({stats['unscored']:,} reported unscored)")
+            check(f"batch {ext}: unscored count", stats["unscored"] == int(np.logical_or(*unscored.values()).sum()))
+
+    print("All checks passed." if not failures else f"{len(failures)} check(s) failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())